@@ -0,0 +1,154 @@
+# Copyright (c) 2016 The UUV Simulator Authors.
+# All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Evaluation of many ROS bags in a process pool. Each bag is evaluated in a
+worker, which only returns the computed KPIs and a summary of the
+evaluation, so that the recordings are never held in memory at once.
+"""
+import os
+import time
+import multiprocessing
+from .evaluation import Evaluation
+
+KPI_COLUMNS = ['bag', 'kpi', 'value']
+SUMMARY_COLUMNS = ['bag', 'output_dir', 'success', 'message', 'time',
+                   'n_kpis']
+
+
+def _get_pool(num_processes):
+    try:
+        context = multiprocessing.get_context('fork')
+    except AttributeError:
+        # Python 2, child processes are always forked
+        context = multiprocessing
+    # Each worker is replaced after one evaluation, releasing its memory
+    return context.Pool(processes=num_processes, maxtasksperchild=1)
+
+
+def evaluate_bag(job):
+    """Evaluate one bag, `job` is a dictionary with the arguments of
+    `evaluate_many` for this bag. Returns the index of the job, the KPIs
+    and the summary of the evaluation.
+    """
+    start_time = time.time()
+    summary = dict(bag=job['bag'], output_dir=job['output_dir'],
+                   success=False, message='', n_kpis=0)
+    kpis = dict()
+    try:
+        output_dir = job['output_dir']
+        if output_dir is None:
+            output_dir = os.path.dirname(os.path.abspath(job['bag']))
+        elif not os.path.isdir(output_dir):
+            os.makedirs(output_dir)
+        sim_eval = Evaluation(job['bag'], output_dir,
+                              time_offset=job['time_offset'],
+                              num_decompression_processes=1)
+        if isinstance(job['kpis'], list) and len(job['kpis']) and \
+                isinstance(job['kpis'][0], dict):
+            # KPI configuration, as in the evaluation configuration files
+            sim_eval.set_kpis(job['kpis'])
+            sim_eval.compute_kpis()
+        kpis = sim_eval.get_kpis()
+        if isinstance(job['kpis'], list) and len(job['kpis']) and \
+                not isinstance(job['kpis'][0], dict):
+            kpis = dict((tag, kpis[tag]) for tag in job['kpis'] if tag in kpis)
+
+        if job['save_evaluation']:
+            sim_eval.save_evaluation()
+        elif job['save_kpis']:
+            sim_eval.save_kpis()
+        if job['dataframe_format'] is not None:
+            sim_eval.save_dataframes(file_format=job['dataframe_format'])
+        del sim_eval
+        summary['success'] = True
+        summary['n_kpis'] = len(kpis)
+    except Exception as e:
+        summary['message'] = str(e)
+    summary['time'] = time.time() - start_time
+    return job['index'], kpis, summary
+
+
+def evaluate_many(bags, kpis=None, time_offset=0.0, workers=None,
+                  output_dirs=None, save_kpis=False, save_evaluation=False,
+                  dataframe_format=None, summaries=False):
+    """Evaluate a list of bags in a pool of `workers` processes (all CPUs
+    if None) and return a data frame with one row per bag and KPI (columns
+    `bag`, `kpi` and `value`).
+
+    `kpis` is either a list of KPI tags (e.g. `rmse_position`) to be
+    returned, or a KPI configuration list as used by
+    `Evaluation.set_kpis`. All KPIs are returned if None. The results are
+    stored in `output_dirs` (one per bag, the bag's directory if None) if
+    `save_kpis`, `save_evaluation` or `dataframe_format` are set. If
+    `summaries` is True, a second data frame with the time and status of
+    each evaluation is also returned.
+    """
+    import pandas
+    if output_dirs is None:
+        output_dirs = [None for _ in bags]
+    assert len(output_dirs) == len(bags), 'Number of output directories and bags is different'
+    assert time_offset >= 0.0, 'Time offset cannot be negative'
+
+    jobs = list()
+    for i, (bag, output_dir) in enumerate(zip(bags, output_dirs)):
+        jobs.append(dict(index=i, bag=bag, output_dir=output_dir, kpis=kpis,
+                         time_offset=time_offset, save_kpis=save_kpis,
+                         save_evaluation=save_evaluation,
+                         dataframe_format=dataframe_format))
+
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    workers = max(1, min(workers, len(jobs)))
+
+    results = [None for _ in jobs]
+    # Daemonic processes are not allowed to create child processes
+    if workers == 1 or multiprocessing.current_process().daemon:
+        for job in jobs:
+            i, bag_kpis, summary = evaluate_bag(job)
+            results[i] = (bag_kpis, summary)
+    else:
+        pool = _get_pool(workers)
+        try:
+            for i, bag_kpis, summary in pool.imap_unordered(evaluate_bag, jobs):
+                results[i] = (bag_kpis, summary)
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+
+    rows = dict((c, list()) for c in KPI_COLUMNS)
+    summary_rows = dict((c, list()) for c in SUMMARY_COLUMNS)
+    for job, (bag_kpis, summary) in zip(jobs, results):
+        for tag in sorted(bag_kpis.keys()):
+            rows['bag'].append(job['bag'])
+            rows['kpi'].append(tag)
+            rows['value'].append(float(bag_kpis[tag]))
+        for c in SUMMARY_COLUMNS:
+            summary_rows[c].append(summary[c])
+
+    df = pandas.DataFrame(rows, columns=KPI_COLUMNS)
+    if summaries:
+        return df, pandas.DataFrame(summary_rows, columns=SUMMARY_COLUMNS)
+    return df
+
+
+def get_kpi_dicts(df):
+    """Return the KPIs of the data frame of `evaluate_many` as a dictionary
+    of `{bag: {kpi: value}}`.
+    """
+    kpis = dict()
+    for bag, tag, value in zip(df['bag'], df['kpi'], df['value']):
+        kpis.setdefault(bag, dict())[tag] = value
+    return kpis
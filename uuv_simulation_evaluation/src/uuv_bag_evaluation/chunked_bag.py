@@ -0,0 +1,193 @@
+# Copyright (c) 2016 The UUV Simulator Authors.
+# All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Reading of compressed ROS bags (recorded with `--bz2` or `--lz4`) with the
+chunks decompressed in a pool of workers. The chunk index of the bag is
+used to select the chunks holding the requested topics, which are read
+sequentially from the file and decompressed in parallel, while the
+messages are returned in timestamp order as in `rosbag.Bag.read_messages`.
+"""
+import bz2
+import multiprocessing
+import multiprocessing.pool
+from collections import deque
+from io import BytesIO
+
+COMPRESSION_NONE = 'none'
+COMPRESSION_BZ2 = 'bz2'
+COMPRESSION_LZ4 = 'lz4'
+
+
+def decompress_chunk(compression, data):
+    if compression == COMPRESSION_BZ2:
+        return bz2.decompress(data)
+    elif compression == COMPRESSION_LZ4:
+        import roslz4
+        return roslz4.decompress(data)
+    elif compression == COMPRESSION_NONE:
+        return data
+    raise ValueError('Unsupported chunk compression, compression=%s' % str(compression))
+
+
+def is_compressed(bag):
+    chunk_headers = getattr(bag, '_chunk_headers', None)
+    if getattr(bag, '_version', None) != 200 or not chunk_headers:
+        return False
+    return any(h.compression != COMPRESSION_NONE for h in chunk_headers.values())
+
+
+def get_decompression_pool(num_processes):
+    if multiprocessing.current_process().daemon:
+        # Daemonic processes are not allowed to create child processes,
+        # bz2 releases the GIL while decompressing
+        return multiprocessing.pool.ThreadPool(num_processes)
+    return multiprocessing.Pool(num_processes)
+
+
+class ParallelChunkReader(object):
+    """
+    Proxy for a ROS bag decompressing the chunks read by `read_messages`
+    in a pool of `num_processes` workers. The bag is read directly if it
+    is not compressed or only one process is available. A `pool` created
+    with `get_decompression_pool` can be shared between readers, otherwise
+    the reader creates its own pool on the first read. All other
+    attributes are forwarded to the bag.
+    """
+
+    def __init__(self, bag, num_processes=None, pool=None):
+        self._bag = bag
+        if num_processes is None:
+            num_processes = multiprocessing.cpu_count()
+        self._num_processes = max(1, int(num_processes))
+        self._is_compressed = is_compressed(bag)
+        self._pool = pool
+        self._owns_pool = pool is None
+
+    def __getattr__(self, name):
+        return getattr(self._bag, name)
+
+    @property
+    def num_processes(self):
+        return self._num_processes
+
+    @property
+    def is_parallel(self):
+        return self._is_compressed and self._num_processes > 1
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = get_decompression_pool(self._num_processes)
+            self._owns_pool = True
+        return self._pool
+
+    def close_pool(self):
+        if self._pool is not None and self._owns_pool:
+            self._pool.terminate()
+            self._pool.join()
+        self._pool = None
+
+    def read_messages(self, topics=None, start_time=None, end_time=None,
+                      connection_filter=None, raw=False,
+                      return_connection_header=False):
+        if not self.is_parallel:
+            if return_connection_header:
+                return self._bag.read_messages(
+                    topics, start_time, end_time, connection_filter, raw,
+                    return_connection_header=True)
+            return self._bag.read_messages(
+                topics, start_time, end_time, connection_filter, raw)
+        return self._read_parallel(topics, start_time, end_time,
+                                   connection_filter, raw,
+                                   return_connection_header)
+
+    def _read_chunk(self, chunk_pos):
+        header = self._bag._chunk_headers[chunk_pos]
+        self._bag._file.seek(header.data_pos)
+        return header.compression, self._bag._file.read(header.compressed_size)
+
+    def _read_parallel(self, topics, start_time, end_time, connection_filter,
+                       raw, return_connection_header):
+        connections = self._bag._get_connections(topics, connection_filter)
+        entries = list(self._bag._get_entries(connections, start_time, end_time))
+        if len(entries) == 0:
+            return
+
+        # Chunks in the order they are first needed and number of messages
+        # still to be read from each one, so that the decompressed data is
+        # released as soon as possible
+        chunk_order = list()
+        n_refs = dict()
+        for entry in entries:
+            if entry.chunk_pos not in n_refs:
+                n_refs[entry.chunk_pos] = 0
+                chunk_order.append(entry.chunk_pos)
+            n_refs[entry.chunk_pos] += 1
+
+        pool = self._get_pool()
+        # Number of chunks decompressed ahead of the reading position
+        max_pending = 2 * self._num_processes
+        pending = deque()
+        chunks = dict()
+        n_submitted = 0
+
+        for entry in entries:
+            while entry.chunk_pos not in chunks:
+                while len(pending) < max_pending and n_submitted < len(chunk_order):
+                    chunk_pos = chunk_order[n_submitted]
+                    pending.append((chunk_pos, pool.apply_async(
+                        decompress_chunk, self._read_chunk(chunk_pos))))
+                    n_submitted += 1
+                chunk_pos, result = pending.popleft()
+                chunks[chunk_pos] = BytesIO(result.get())
+
+            msg = self._read_record(chunks[entry.chunk_pos], entry.offset, raw,
+                                    (entry.chunk_pos, entry.offset),
+                                    return_connection_header)
+            n_refs[entry.chunk_pos] -= 1
+            if n_refs[entry.chunk_pos] == 0:
+                del chunks[entry.chunk_pos]
+            yield msg
+
+    def _read_record(self, chunk, offset, raw, position,
+                     return_connection_header):
+        from rosbag.bag import _read_header, _read_uint8_field, \
+            _read_uint32_field, _read_time_field, _read_record_data, \
+            _skip_sized, _get_message_type, _OP_CONNECTION, BagMessage
+
+        chunk.seek(offset)
+        # Skip the connection records stored before the message
+        while True:
+            header = _read_header(chunk)
+            if _read_uint8_field(header, 'op') != _OP_CONNECTION:
+                break
+            _skip_sized(chunk)
+
+        connection_info = self._bag._connections[_read_uint32_field(header, 'conn')]
+        t = _read_time_field(header, 'time')
+        msg_type = _get_message_type(connection_info)
+        data = _read_record_data(chunk)
+
+        if raw:
+            msg = connection_info.datatype, data, connection_info.md5sum, \
+                position, msg_type
+        else:
+            msg = msg_type()
+            msg.deserialize(data)
+
+        if return_connection_header:
+            from rosbag.bag import BagMessageWithConnectionHeader
+            return BagMessageWithConnectionHeader(
+                connection_info.topic, msg, t, connection_info.header)
+        return BagMessage(connection_info.topic, msg, t)
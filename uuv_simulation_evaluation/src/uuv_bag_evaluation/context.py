@@ -0,0 +1,27 @@
+# Copyright (c) 2016 The UUV Simulator Authors.
+# All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+class EvaluationContext(object):
+    """
+    Recording and error set of one evaluation. The context is passed
+    explicitly to the parsers, the error set and the KPIs, so that several
+    recordings can be evaluated in the same process. Without a context,
+    the last `Recording` and `ErrorSet` created are used.
+    """
+
+    def __init__(self, recording=None, error_set=None):
+        self.recording = recording
+        self.error_set = error_set
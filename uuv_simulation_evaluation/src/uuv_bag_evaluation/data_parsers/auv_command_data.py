@@ -16,8 +16,9 @@ from __future__ import print_function
 import rospy
 import numpy as np
 import os
-import matplotlib.pyplot as plt
-from simulation_data import SimulationData, COLOR_RED, COLOR_GREEN, COLOR_BLUE
+from simulation_data import SimulationData, get_pyplot, COLOR_RED, COLOR_GREEN, COLOR_BLUE
+from topic_index import get_topic_index
+from raw_messages import read_stamped_arrays
 
 
 class AUVCommandData(SimulationData):
@@ -26,59 +27,48 @@ class AUVCommandData(SimulationData):
     def __init__(self, bag):
         super(AUVCommandData, self).__init__()
 
-        for x in bag.get_type_and_topic_info():
-            for k in x:
-                if 'uuv_auv_control_allocator/AUVCommand' in x[k][0]:
-                    self._topic_name = k
-                    self._logger.info('AUV wrench command topic found <%s>' % k)
-                    break
-            if self._topic_name is not None:
-                break
+        self._topic_name = get_topic_index(bag).find_topic(msg_type='uuv_auv_control_allocator/AUVCommand')
+        if self._topic_name is not None:
+            self._logger.info('AUV wrench command topic found <%s>' % self._topic_name)
 
         try:
-            self._time = list()
-            self._recorded_data['force'] = list()
-            self._recorded_data['torque'] = list()
-            self._recorded_data['surge_speed'] = list()
-            for topic, msg, time in bag.read_messages(self._topic_name):
-                    time = msg.header.stamp.to_sec()
-                    self._time.append(time)
-                    self._recorded_data['force'].append([msg.command.force.x, msg.command.force.y, msg.command.force.z])
-                    self._recorded_data['torque'].append([msg.command.torque.x, msg.command.torque.y, msg.command.torque.z])
-                    self._recorded_data['surge_speed'].append(float(msg.surge_speed))
+            self._time = np.array([])
+            self._recorded_data['force'] = np.zeros((0, 3))
+            self._recorded_data['torque'] = np.zeros((0, 3))
+            self._recorded_data['surge_speed'] = np.array([])
+            self._time, values = read_stamped_arrays(
+                bag, self._topic_name,
+                ['command.force.x', 'command.force.y', 'command.force.z',
+                 'command.torque.x', 'command.torque.y', 'command.torque.z',
+                 'surge_speed'])
+            self._recorded_data['force'] = values[:, 0:3]
+            self._recorded_data['torque'] = values[:, 3:6]
+            self._recorded_data['surge_speed'] = values[:, 6]
             self._logger.info('%s=loaded' % self._topic_name)
         except Exception as e:
             self._logger.warning('Error reading AUV command input topic, message=' + str(e))
 
     def get_as_dataframe(self, add_group_name=None):
         try:
-            import pandas
-
             if len(self._recorded_data['force']) == 0:
                 return None
 
             data = dict()
-            data[self.LABEL + '_time'] = self._time
-            data[self.LABEL + '_force_x'] = [x[0] for x in self._recorded_data['force']]
-            data[self.LABEL + '_force_y'] = [x[1] for x in self._recorded_data['force']]
-            data[self.LABEL + '_force_z'] = [x[2] for x in self._recorded_data['force']]
-
-            data[self.LABEL + '_torque_x'] = [x[0] for x in self._recorded_data['torque']]
-            data[self.LABEL + '_torque_y'] = [x[1] for x in self._recorded_data['torque']]
-            data[self.LABEL + '_torque_z'] = [x[2] for x in self._recorded_data['torque']]
-
-            data[self.LABEL + '_surge_speed'] = self._recorded_data['surge_speed']
+            data[self.LABEL + '_time'] = np.asarray(self._time)
+            for tag in ['force', 'torque']:
+                for i, col in enumerate(self.get_columns(self._recorded_data[tag], 3)):
+                    data[self.LABEL + '_%s_%s' % (tag, 'xyz'[i])] = col
 
-            if add_group_name is not None:
-                data['group'] = [add_group_name for _ in range(len(self._time))]
+            data[self.LABEL + '_surge_speed'] = np.asarray(self._recorded_data['surge_speed'])
 
-            return pandas.DataFrame(data)
+            return self.build_dataframe(data, add_group_name)
 
         except Exception as ex:
             self._logger.error('Error while exporting as pandas.DataFrame, message=' + str(ex))
             return None
 
     def plot(self, output_dir):
+        plt = get_pyplot()
         if not os.path.isdir(output_dir):
             self._logger.error('Invalid output directory, dir=' + str(output_dir))
             raise Exception('Invalid output directory')
@@ -98,7 +88,7 @@ class AUVCommandData(SimulationData):
                 min_y = 0
                 max_y = 0
                 
-                ax_tm[0].plot(
+                self.plot_series(ax_tm[0], 
                     self._time, 
                     [f[0] for f in self._recorded_data['force']],
                     color=COLOR_RED,
@@ -108,7 +98,7 @@ class AUVCommandData(SimulationData):
                 min_y = min(min_y, np.min([f[0] for f in self._recorded_data['force']]))
                 max_y = max(max_y, np.max([f[0] for f in self._recorded_data['force']]))
                 
-                ax_tm[0].plot(
+                self.plot_series(ax_tm[0], 
                     self._time, 
                     [f[1] for f in self._recorded_data['force']],
                     color=COLOR_GREEN,
@@ -118,7 +108,7 @@ class AUVCommandData(SimulationData):
                 min_y = min(min_y, np.min([f[1] for f in self._recorded_data['force']]))
                 max_y = max(max_y, np.max([f[1] for f in self._recorded_data['force']]))
 
-                ax_tm[0].plot(
+                self.plot_series(ax_tm[0], 
                     self._time, 
                     [f[2] for f in self._recorded_data['force']],
                     color=COLOR_BLUE,
@@ -141,7 +131,7 @@ class AUVCommandData(SimulationData):
                 min_y = 0
                 max_y = 0
 
-                ax_tm[1].plot(
+                self.plot_series(ax_tm[1], 
                     self._time, 
                     [x[0] for x in self._recorded_data['torque']],
                     color=COLOR_RED,
@@ -151,7 +141,7 @@ class AUVCommandData(SimulationData):
                 min_y = min(min_y, np.min([x[0] for x in self._recorded_data['torque']]))
                 max_y = max(max_y, np.max([x[0] for x in self._recorded_data['torque']]))
                 
-                ax_tm[1].plot(
+                self.plot_series(ax_tm[1], 
                     self._time, 
                     [x[1] for x in self._recorded_data['torque']],
                     color=COLOR_GREEN,
@@ -161,7 +151,7 @@ class AUVCommandData(SimulationData):
                 min_y = min(min_y, np.min([x[1] for x in self._recorded_data['torque']]))
                 max_y = max(max_y, np.max([x[1] for x in self._recorded_data['torque']]))
                 
-                ax_tm[1].plot(
+                self.plot_series(ax_tm[1], 
                     self._time, 
                     [x[2] for x in self._recorded_data['torque']],
                     color=COLOR_BLUE,
@@ -184,9 +174,9 @@ class AUVCommandData(SimulationData):
                 min_y = 0
                 max_y = 0
 
-                ax_tm[2].plot(self._time, self._recorded_data['surge_speed'],
-                            linewidth=self._plot_configs['linewidth'],
-                            label=r'$U$')
+                self.plot_series(ax_tm[2], self._time, self._recorded_data['surge_speed'],
+                                         linewidth=self._plot_configs['linewidth'],
+                                         label=r'$U$')
                 min_y = np.min(self._recorded_data['surge_speed'])
                 max_y = np.max(self._recorded_data['surge_speed'])
                 
@@ -16,24 +16,22 @@ from __future__ import print_function
 import rospy
 import numpy as np
 import os
-import matplotlib.pyplot as plt
-from simulation_data import SimulationData, COLOR_RED, COLOR_GREEN, COLOR_BLUE
+from simulation_data import SimulationData, get_pyplot, COLOR_RED, COLOR_GREEN, COLOR_BLUE
+from topic_index import get_topic_index
 
 
 class ConcentrationSensorData(SimulationData):
     LABEL = 'concentration_sensor'
+    PLOT_JOBS = ['plot_concentration',
+                 'plot_concentration_3d']
 
     def __init__(self, bag):
         super(ConcentrationSensorData, self).__init__()
 
-        for x in bag.get_type_and_topic_info():
-            for k in x:
-                if 'uuv_sensor_plugins_ros_msgs/ChemicalParticleConcentration' in x[k][0]:
-                    self._topic_name = k
-                    self._logger.info('Particle concentration topic found <%s>' % k)
-                    break
-            if self._topic_name is not None:
-                break
+        self._topic_name = get_topic_index(bag).find_topic(
+            msg_type='uuv_sensor_plugins_ros_msgs/ChemicalParticleConcentration')
+        if self._topic_name is not None:
+            self._logger.info('Particle concentration topic found <%s>' % self._topic_name)
 
         self._time = list()
 
@@ -45,28 +43,27 @@ class ConcentrationSensorData(SimulationData):
                     self._time.append(time)
                     self._recorded_data['conc'].append(msg.concentration)
                     self._recorded_data['pos'].append([msg.position.x, msg.position.y, msg.position.z])
+            self._time = np.array(self._time)
+            self._recorded_data['conc'] = np.array(self._recorded_data['conc'])
+            self._recorded_data['pos'] = np.array(self._recorded_data['pos']).reshape(-1, 3)
             self._logger.info('%s=loaded' % self._topic_name)
         except Exception as e:
             self._logger.warning('Error reading particle concentration topic, message=' + str(e))
 
     def get_as_dataframe(self, add_group_name=None):
         try:
-            import pandas
-
             if len(self._recorded_data['conc']) == 0:
                 return None
 
+            pos_x, pos_y, pos_z = self.get_columns(self._recorded_data['pos'], 3)
             data = dict(
-                concentration_time=self._time,
-                concentration=self._recorded_data['conc'],
-                concentration_pos_x=[x[0] for x in self._recorded_data['pos']],
-                concentration_pos_y=[x[1] for x in self._recorded_data['pos']],
-                concentration_pos_z=[x[2] for x in self._recorded_data['pos']])
-
-            if add_group_name is not None:
-                data['group'] = [add_group_name for _ in range(len(self._time))]
+                concentration_time=np.asarray(self._time),
+                concentration=np.asarray(self._recorded_data['conc']),
+                concentration_pos_x=pos_x,
+                concentration_pos_y=pos_y,
+                concentration_pos_z=pos_z)
 
-            return pandas.DataFrame(data)
+            return self.build_dataframe(data, add_group_name)
             
         except Exception as ex:
             self._logger.error('Error while exporting as pandas.DataFrame, message=' + str(ex))
@@ -76,7 +73,10 @@ class ConcentrationSensorData(SimulationData):
         if not os.path.isdir(output_dir):
             self._logger.error('Invalid output directory, dir=' + str(output_dir))
             raise Exception('Invalid output directory')
+        self.run_plot_jobs(output_dir)
 
+    def plot_concentration(self, output_dir):
+        plt = get_pyplot()
         try:
             fig = None
             output_path = (self._output_dir if output_dir is None else output_dir)            
@@ -85,7 +85,7 @@ class ConcentrationSensorData(SimulationData):
                 fig = self.get_figure()        
                 ax = fig.gca()
 
-                ax.plot(
+                self.plot_series(ax, 
                     self._time, 
                     self._recorded_data['conc'], 
                     color=COLOR_RED, 
@@ -119,6 +119,8 @@ class ConcentrationSensorData(SimulationData):
                 plt.close(fig)
                 del fig
 
+    def plot_concentration_3d(self, output_dir):
+        plt = get_pyplot()
         try:       
             fig = None     
             if len(self._recorded_data['pos']):
@@ -16,8 +16,8 @@ from __future__ import print_function
 import rospy
 import numpy as np
 import os
-import matplotlib.pyplot as plt
-from simulation_data import SimulationData, COLOR_RED, COLOR_GREEN, COLOR_BLUE
+from simulation_data import SimulationData, get_pyplot, COLOR_RED, COLOR_GREEN, COLOR_BLUE
+from topic_index import get_topic_index
 
 
 class CurrentVelocityData(SimulationData):
@@ -26,14 +26,9 @@ class CurrentVelocityData(SimulationData):
     def __init__(self, bag):
         super(CurrentVelocityData, self).__init__()
 
-        for x in bag.get_type_and_topic_info():
-            for k in x:
-                if 'current_velocity' in k:
-                    self._topic_name = k
-                    self._logger.info('Current velocity topic found <%s>' % k)
-                    break
-            if self._topic_name is not None:
-                break
+        self._topic_name = get_topic_index(bag).find_topic(contains='current_velocity')
+        if self._topic_name is not None:
+            self._logger.info('Current velocity topic found <%s>' % self._topic_name)
 
         self._time = list()
 
@@ -43,24 +38,20 @@ class CurrentVelocityData(SimulationData):
                 self._time.append(msg.header.stamp.to_sec())
                 self._recorded_data['vel'].append(
                     [msg.twist.linear.x,  msg.twist.linear.y,  msg.twist.linear.z])
+            self._time = np.array(self._time)
+            self._recorded_data['vel'] = np.array(self._recorded_data['vel']).reshape(-1, 3)
             self._logger.info('%s=loaded' % self._topic_name)
         except Exception as e:
             self._logger.error('Error retrieving current velocity data from rosbag, message=' + str(e))
 
     def get_as_dataframe(self, add_group_name=None):
         try:
-            import pandas
-
             data = dict()
-            data[self.LABEL + '_time'] = self._time
-            data[self.LABEL + '_vel_x'] = [x[0] for x in self._recorded_data['vel']]
-            data[self.LABEL + '_vel_y'] = [x[1] for x in self._recorded_data['vel']]
-            data[self.LABEL + '_vel_z'] = [x[2] for x in self._recorded_data['vel']]
-
-            if add_group_name is not None:
-                data['group'] = [add_group_name for _ in range(len(self._time))]
+            data[self.LABEL + '_time'] = np.asarray(self._time)
+            for i, col in enumerate(self.get_columns(self._recorded_data['vel'], 3)):
+                data[self.LABEL + '_vel_' + 'xyz'[i]] = col
 
-            return pandas.DataFrame(data)
+            return self.build_dataframe(data, add_group_name)
 
         except Exception as ex:
             print('Error while exporting as pandas.DataFrame, message=' + str(ex))
@@ -71,6 +62,7 @@ class CurrentVelocityData(SimulationData):
         return self._time, self._recorded_data['vel']
 
     def plot(self, output_dir):
+        plt = get_pyplot()
         if not os.path.isdir(output_dir):
             self._logger.error('Invalid output directory, dir=' + str(output_dir))
             raise Exception('Invalid output directory')
@@ -81,19 +73,19 @@ class CurrentVelocityData(SimulationData):
             fig = self.get_figure()        
             ax = fig.gca()
 
-            ax.plot(
+            self.plot_series(ax, 
                 self._time, 
                 [v[0] for v in self._recorded_data['vel']], 
                 color=COLOR_RED, 
                 label=r'$u_C$',
                 linewidth=self._plot_configs['linewidth'])
-            ax.plot(
+            self.plot_series(ax, 
                 self._time, 
                 [v[1] for v in self._recorded_data['vel']], 
                 color=COLOR_GREEN, 
                 label=r'$v_C$',
                 linewidth=self._plot_configs['linewidth'])
-            ax.plot(
+            self.plot_series(ax, 
                 self._time, 
                 [v[2] for v in self._recorded_data['vel']], 
                 color=COLOR_BLUE, 
@@ -0,0 +1,108 @@
+# Copyright (c) 2016 The UUV Simulator Authors.
+# All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Visual decimation of time series before plotting, so that the size of the
+figures does not grow with the length of the recording.
+
+* `minmax`: the samples are split into buckets and the minimum and maximum
+  of each bucket are kept, preserving the envelope and all peaks of the
+  signal
+* `lttb`: Largest-Triangle-Three-Buckets, keeps one sample per bucket
+  selected to preserve the visual shape of the signal
+"""
+import numpy as np
+
+DECIMATION_METHODS = ['minmax', 'lttb']
+
+
+def get_minmax_indices(y, n_buckets):
+    y = np.asarray(y, dtype=float)
+    n = y.size
+    if n_buckets < 1 or n <= 2 * n_buckets:
+        return np.arange(n)
+    # Buckets with the same number of samples, the remaining samples are
+    # stored in an extra bucket
+    bucket_size = n // n_buckets
+    n_full = bucket_size * n_buckets
+    offsets = np.arange(n_buckets) * bucket_size
+    buckets = y[:n_full].reshape(n_buckets, bucket_size)
+    idx = [np.array([0, n - 1]),
+           offsets + np.nanargmin(buckets, axis=1),
+           offsets + np.nanargmax(buckets, axis=1)]
+    if n_full < n:
+        idx.append(n_full + np.array([np.nanargmin(y[n_full:]),
+                                      np.nanargmax(y[n_full:])]))
+    return np.unique(np.concatenate(idx))
+
+
+def get_lttb_indices(t, y, n_out):
+    t = np.asarray(t, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = y.size
+    if n_out < 3 or n <= n_out:
+        return np.arange(n)
+
+    # The first and last samples are always kept, the remaining samples
+    # are split into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    idx = np.zeros(n_out, dtype=int)
+    idx[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average point of the next bucket, the last sample for the last one
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+        else:
+            next_start, next_end = n - 1, n
+        t_avg = np.mean(t[next_start:next_end])
+        y_avg = np.mean(y[next_start:next_end])
+        # Sample forming the largest triangle with the previously selected
+        # sample and the average of the next bucket
+        area = np.abs((t[a] - t_avg) * (y[start:end] - y[a]) -
+                      (t[a] - t[start:end]) * (y_avg - y[a]))
+        a = start + int(np.nanargmax(area)) if np.any(np.isfinite(area)) else start
+        idx[i + 1] = a
+    return idx
+
+
+def get_path_indices(points, max_points):
+    # Union of the min/max envelopes of each coordinate of a N x M path
+    points = np.asarray(points, dtype=float)
+    n, n_dims = points.shape
+    if n <= max_points:
+        return np.arange(n)
+    n_buckets = max(1, max_points // (2 * n_dims))
+    return np.unique(np.concatenate(
+        [get_minmax_indices(points[:, i], n_buckets) for i in range(n_dims)]))
+
+
+def decimate(t, y, max_points, method='minmax'):
+    """Return the decimated time and value vectors, with at most
+    `max_points` samples (plus the end points for `minmax`). The input is
+    returned unchanged if it is already smaller than `max_points`.
+    """
+    t = np.asarray(t)
+    y = np.asarray(y)
+    if method is None or max_points is None or y.size <= max_points:
+        return t, y
+    assert t.size == y.size, 'Time and value vectors must have the same length'
+    if method == 'minmax':
+        idx = get_minmax_indices(y, max_points // 2)
+    elif method == 'lttb':
+        idx = get_lttb_indices(t, y, max_points)
+    else:
+        raise ValueError('Invalid decimation method, options=%s' % str(DECIMATION_METHODS))
+    return t[idx], y[idx]
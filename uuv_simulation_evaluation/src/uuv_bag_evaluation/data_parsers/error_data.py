@@ -16,26 +16,27 @@ from __future__ import print_function
 import rospy
 import numpy as np
 import os
-import matplotlib.pyplot as plt
-from simulation_data import SimulationData, COLOR_RED, COLOR_GREEN, COLOR_BLUE
+from simulation_data import SimulationData, get_pyplot, COLOR_RED, COLOR_GREEN, COLOR_BLUE
+from topic_index import get_topic_index
 import uuv_bag_evaluation.error 
 from uuv_trajectory_generator import TrajectoryGenerator, TrajectoryPoint
 
 
 class ErrorData(SimulationData):
     LABEL = 'error'
+    PLOT_JOBS = ['plot_pose_errors',
+                 'plot_position_heading_errors',
+                 'plot_velocity_errors',
+                 'plot_quaternion_errors',
+                 'plot_cross_track_error']
 
     def __init__(self, bag):
         super(ErrorData, self).__init__(message_type='uuv_control_msgs/TrajectoryPoint')
 
-        for x in bag.get_type_and_topic_info():
-            for k in x:
-                if 'error' in k and self._message_type in x[k][0]:
-                    self._topic_name = k
-                    self._logger.info('Error topic found <%s>' % k)
-                    break
-            if self._topic_name is not None:
-                break
+        self._topic_name = get_topic_index(bag).find_topic(
+            msg_type=self._message_type, contains='error')
+        if self._topic_name is not None:
+            self._logger.info('Error topic found <%s>' % self._topic_name)
 
         try:
             self._recorded_data['error'] = TrajectoryGenerator()
@@ -48,40 +49,46 @@ class ErrorData(SimulationData):
 
         self._error_set = None
 
+    def get_error_set(self):
+        # Error set of the evaluation context, if available
+        if self._context is not None and self._context.error_set is not None:
+            return self._context.error_set
+        return uuv_bag_evaluation.error.ErrorSet.get_instance()
+
     def get_as_dataframe(self, add_group_name=None):
         try:
-            import pandas
-
             # Create error set object
             if self._error_set is None:
-                self._error_set = uuv_bag_evaluation.error.ErrorSet.get_instance()
+                self._error_set = self.get_error_set()
 
             data = dict()
-            data['time'] = self._error_set.get_time()            
+            data['time'] = self._error_set.get_time()
 
             for tag in self._error_set.get_tags():
                 if tag == 'cross_track':
                     continue
-                elif tag in ['position', 'linear_velocity', 'angular_velocity', 'quaternion']:
-                    data[tag + '_x'] = [x[0] for x in self._error_set.get_data(tag)]
-                    data[tag + '_y'] = [x[1] for x in self._error_set.get_data(tag)]
-                    data[tag + '_z'] = [x[2] for x in self._error_set.get_data(tag)]
+                # Each error vector is retrieved only once from the error set
+                values = self._error_set.get_data(tag)
+                if values is None or any(v is None for v in values):
+                    continue
+                if tag in ['position', 'linear_velocity', 'angular_velocity', 'quaternion']:
+                    for i, col in enumerate(self.get_columns(values, 3)):
+                        data[tag + '_' + 'xyz'[i]] = col
                 else:
-                    data[tag] = self._error_set.get_data(tag)
+                    data[tag] = np.asarray(values, dtype=float)
 
-            if add_group_name is not None:
-                data['group'] = [add_group_name for _ in range(len(data['time']))]            
-
-            df_error = pandas.DataFrame(data)
+            df_error = self.build_dataframe(data, add_group_name)
 
             data = dict()
-            data[tag + 'cross_track_time'] = self._error_set.get_time('desired')
-            data[tag + 'cross_track'] = self._error_set.get_data('cross_track')
-            
-            if add_group_name is not None:
-                data['group'] = [add_group_name for _ in range(len(data['time']))]
+            # The cross-track error is computed for each odometry sample if
+            # the error topic is available
+            if self._recorded_data['error'] is None:
+                data['cross_track_time'] = self._error_set.get_time()
+            else:
+                data['cross_track_time'] = self._error_set.get_time('desired')
+            data['cross_track'] = np.asarray(self._error_set.get_data('cross_track'), dtype=float)
 
-            df_error_ct = pandas.DataFrame(data)
+            df_error_ct = self.build_dataframe(data, add_group_name)
 
             return dict(error=df_error, error_cross_track=df_error_ct)
 
@@ -97,10 +104,13 @@ class ErrorData(SimulationData):
         if not os.path.isdir(output_dir):
             self._logger.error('Invalid output directory, dir=' + str(output_dir))
             raise rospy.ROSException('Invalid output directory')
-        
+        self.run_plot_jobs(output_dir)
+
+    def plot_pose_errors(self, output_dir):
+        plt = get_pyplot()
         try:
             # Create error set object
-            self._error_set = uuv_bag_evaluation.error.ErrorSet.get_instance()
+            self._error_set = self.get_error_set()
 
             if self._error_set is None:
                 self._logger.info('Error set has not been correctly initialized')
@@ -116,19 +126,19 @@ class ErrorData(SimulationData):
             fig = self.get_figure()        
             ax = fig.gca()
             
-            ax.plot(
+            self.plot_series(ax, 
                 t, 
                 self._error_set.get_data('x'), 
                 color=COLOR_RED, 
                 label=r'$X$',
                 linewidth=self._plot_configs['linewidth'])
-            ax.plot(
+            self.plot_series(ax, 
                 t, 
                 self._error_set.get_data('y'), 
                 color=COLOR_GREEN, 
                 label=r'$Y$',
                 linewidth=self._plot_configs['linewidth'])
-            ax.plot(
+            self.plot_series(ax, 
                 t, 
                 self._error_set.get_data('z'), 
                 color=COLOR_BLUE, 
@@ -152,19 +162,19 @@ class ErrorData(SimulationData):
             fig = self.get_figure()        
             ax = fig.gca()
             
-            ax.plot(
+            self.plot_series(ax, 
                 t, 
                 self._error_set.get_data('roll'), 
                 color=COLOR_RED, 
                 label=r'$\phi$',
                 linewidth=self._plot_configs['linewidth'])
-            ax.plot(
+            self.plot_series(ax, 
                 t, 
                 self._error_set.get_data('pitch'), 
                 color=COLOR_GREEN, 
                 label=r'$\theta$',
                 linewidth=self._plot_configs['linewidth'])
-            ax.plot(
+            self.plot_series(ax, 
                 t, 
                 self._error_set.get_data('yaw'), 
                 color=COLOR_BLUE, 
@@ -189,6 +199,10 @@ class ErrorData(SimulationData):
             plt.close(fig)
             del fig
 
+    def plot_position_heading_errors(self, output_dir):
+        plt = get_pyplot()
+        if self._error_set is None:
+            self._error_set = self.get_error_set()
         try:
             output_path = (self._output_dir if output_dir is None else output_dir)
             
@@ -200,7 +214,7 @@ class ErrorData(SimulationData):
             # self.add_disturbance_activation_spans(ax, 0, error.max())
 
             t = self._error_set.get_time()
-            ax.plot(
+            self.plot_series(ax, 
                 t, 
                 error, 
                 linewidth=self._plot_configs['linewidth'],
@@ -231,7 +245,7 @@ class ErrorData(SimulationData):
             # self.add_disturbance_activation_spans(ax, np.min(error), np.max(error))
 
             t = self._error_set.get_time()
-            ax.plot(
+            self.plot_series(ax, 
                 t, 
                 error, 
                 color=COLOR_RED,
@@ -257,26 +271,33 @@ class ErrorData(SimulationData):
             plt.close(fig)
             del fig
 
+    def plot_velocity_errors(self, output_dir):
+        plt = get_pyplot()
+        if self._error_set is None:
+            self._error_set = self.get_error_set()
         try:
             ##################################################################################
             # Plotting velocity errors
             ##################################################################################                        
+            output_path = (self._output_dir if output_dir is None else output_dir)
+            t = self._error_set.get_time()
+
             fig = self.get_figure()        
             ax = fig.gca()
 
-            ax.plot(
+            self.plot_series(ax, 
                 t, 
                 [e[0] for e in self._error_set.get_data('linear_velocity')], 
                 label=r'$\dot{X}$',
                 linewidth=self._plot_configs['linewidth'],
                 color=COLOR_RED)
-            ax.plot(
+            self.plot_series(ax, 
                 t, 
                 [e[1] for e in self._error_set.get_data('linear_velocity')], 
                 label=r'$\dot{Y}$',
                 linewidth=self._plot_configs['linewidth'],
                 color=COLOR_GREEN)
-            ax.plot(
+            self.plot_series(ax, 
                 t, 
                 [e[2] for e in self._error_set.get_data('linear_velocity')], 
                 label=r'$\dot{Z}$',
@@ -300,19 +321,19 @@ class ErrorData(SimulationData):
             fig = self.get_figure()        
             ax = fig.gca()
 
-            ax.plot(
+            self.plot_series(ax, 
                 t, 
                 [e[0] for e in self._error_set.get_data('angular_velocity')], 
                 label=r'$\omega_x$',
                 linewidth=self._plot_configs['linewidth'],
                 color=COLOR_RED)
-            ax.plot(
+            self.plot_series(ax, 
                 t, 
                 [e[1] for e in self._error_set.get_data('angular_velocity')], 
                 label=r'$\omega_y$',
                 linewidth=self._plot_configs['linewidth'],
                 color=COLOR_GREEN)
-            ax.plot(
+            self.plot_series(ax, 
                 t, 
                 [e[2] for e in self._error_set.get_data('angular_velocity')], 
                 label=r'$\omega_z$',
@@ -336,29 +357,34 @@ class ErrorData(SimulationData):
             self._logger.error('Error while plotting velocity errors, message=' + str(e))
             plt.close(fig)
             del fig
-        
+
+    def plot_quaternion_errors(self, output_dir):
+        plt = get_pyplot()
+        if self._error_set is None:
+            self._error_set = self.get_error_set()
         try:    
             ##################################################################################
             # Plotting quaternion vector errors
             ##################################################################################
 
+            output_path = (self._output_dir if output_dir is None else output_dir)
             t = self._error_set.get_time()            
             fig = self.get_figure()        
             ax = fig.gca()
 
-            ax.plot(
+            self.plot_series(ax, 
                 t, 
                 [e[0] for e in self._error_set.get_data('quaternion')], 
                 label=r'$\epsilon_x$',
                 linewidth=self._plot_configs['linewidth'],
                 color=COLOR_RED)
-            ax.plot(
+            self.plot_series(ax, 
                 t, 
                 [e[1] for e in self._error_set.get_data('quaternion')], 
                 label=r'$\epsilon_y$',
                 linewidth=self._plot_configs['linewidth'],
                 color=COLOR_GREEN)
-            ax.plot(
+            self.plot_series(ax, 
                 t, 
                 [e[2] for e in self._error_set.get_data('quaternion')], 
                 label=r'$\epsilon_z$',
@@ -382,11 +408,16 @@ class ErrorData(SimulationData):
             plt.close(fig)
             del fig
 
+    def plot_cross_track_error(self, output_dir):
+        plt = get_pyplot()
+        if self._error_set is None:
+            self._error_set = self.get_error_set()
         try:    
             ##################################################################################
             # Plotting cross-track errors
             ##################################################################################
 
+            output_path = (self._output_dir if output_dir is None else output_dir)
             t = self._error_set.get_time('desired')
             
             fig = self.get_figure()        
@@ -395,7 +426,7 @@ class ErrorData(SimulationData):
             ax.set_title(
                 'Cross-track error', 
                 fontsize=self._plot_configs['title_fontsize'])
-            ax.plot(
+            self.plot_series(ax, 
                 t, 
                 self._error_set.get_data('cross_track'), 
                 linewidth=self._plot_configs['linewidth'],
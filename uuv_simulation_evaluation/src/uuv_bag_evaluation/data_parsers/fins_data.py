@@ -15,123 +15,114 @@
 from __future__ import print_function
 import rospy
 import numpy as np
-import matplotlib.pyplot as plt
 import os
-from simulation_data import SimulationData, COLOR_RED, COLOR_GREEN, COLOR_BLUE
+from simulation_data import SimulationData, get_pyplot, COLOR_RED, COLOR_GREEN, COLOR_BLUE
+from topic_index import get_topic_index
+from raw_messages import read_stamped_arrays
 
 
 class FinsData(SimulationData):
     LABEL = 'fins'
+    PLOT_JOBS = ['plot_output_angles',
+                 'plot_input_angles']
 
     def __init__(self, bag):
         super(FinsData, self).__init__()
         
-        for x in bag.get_type_and_topic_info():
-            for k in x:
-                if self._prefix is None:
-                    if 'fins' in k:
-                        rospy.loginfo('Fins topic prefix found <%s>' % k)
-                        i = len('fins')
-                        i_max = k.find('fins') + i
-                        self._prefix = k[:i_max]
-                        break
-            if self._prefix is not None:
-                break
-    
+        topic_index = get_topic_index(bag)
+        prefixes = topic_index.get_actuator_prefixes('fins')
+        if len(prefixes):
+            self._prefix = prefixes[0]
+            self._logger.info('Fins topic prefix found <%s>' % self._prefix)
+
         try:
-            # Find all fins input topics
+            # Read the recorded fin input topics
             if self._prefix is not None:
-                for i in range(16):
-                    for topic, msg, time in bag.read_messages('%s/%d/input' % (self._prefix, i)):
-                        if i not in self._recorded_data:
-                            self._recorded_data[i] = dict(input=dict(time=list(), values=list()))
-                        t = msg.header.stamp.to_sec()
-                        self._recorded_data[i]['input']['time'].append(t)
-                        self._recorded_data[i]['input']['values'].append(float(msg.data))
-                    if i in self._recorded_data:
-                        self._logger.info('%s/%d/input=loaded' % (self._prefix, i))
+                for i, topic in topic_index.get_actuator_topics('fins', 'input', self._prefix):
+                    t, values = read_stamped_arrays(bag, topic, ['data'])
+                    if len(t):
+                        self._recorded_data[i] = dict(input=dict(time=t, values=values[:, 0]))
+                        self._logger.info('%s=loaded' % topic)
         except Exception as e:
             self._logger.error('Error retrieving fin input data from rosbag, message=' + str(e))
 
         try:
-            # Find all fins output topics
+            # Read the recorded fin output topics
             if self._prefix is not None:
-                for i in range(16):
-                    for topic, msg, time in bag.read_messages('%s/%d/output' % (self._prefix, i)):
-                        if 'output' not in self._recorded_data[i]:
-                            self._recorded_data[i]['output'] = dict(time=list(), values=list())
-                        t = msg.header.stamp.to_sec()
-                        self._recorded_data[i]['output']['time'].append(t)
-                        self._recorded_data[i]['output']['values'].append(float(msg.data))
-                    if i in self._recorded_data:
-                        self._logger.info('%s/%d/output=loaded' % (self._prefix, i))
+                for i, topic in topic_index.get_actuator_topics('fins', 'output', self._prefix):
+                    if i not in self._recorded_data:
+                        continue
+                    t, values = read_stamped_arrays(bag, topic, ['data'])
+                    if len(t):
+                        self._recorded_data[i]['output'] = dict(time=t, values=values[:, 0])
+                        self._logger.info('%s=loaded' % topic)
         except Exception as e:
             self._logger.error('Error retrieving fin output data from rosbag, message=' + str(e))
 
         try:
-            # Find all fin wrench topics
+            # Read the recorded fin wrench topics
             if self._prefix is not None:
-                for i in range(16):
-                    for topic, msg, time in bag.read_messages('%s/%d/wrench_topic' % (self._prefix, i)):
-                        if 'wrench' not in self._recorded_data[i]:
-                            self._recorded_data[i]['wrench'] = dict(time=list(), force=list(), torque=list())
-                        time = msg.header.stamp.to_sec()
-                        self._recorded_data[i]['wrench']['time'].append(time)
-                        self._recorded_data[i]['wrench']['force'].append(
-                            [msg.wrench.force.x, msg.wrench.force.y, msg.wrench.force.z])
-                        self._recorded_data[i]['wrench']['torque'].append(
-                            [msg.wrench.torque.x, msg.wrench.torque.y, msg.wrench.torque.z])
-                    if i in self._recorded_data:
-                        self._logger.info('%s/%d/wrench_topic=loaded' % (self._prefix, i))
+                for i, topic in topic_index.get_actuator_topics('fins', 'wrench_topic', self._prefix):
+                    if i not in self._recorded_data:
+                        continue
+                    t, values = read_stamped_arrays(
+                        bag, topic,
+                        ['wrench.force.x', 'wrench.force.y', 'wrench.force.z',
+                         'wrench.torque.x', 'wrench.torque.y', 'wrench.torque.z'])
+                    if len(t):
+                        self._recorded_data[i]['wrench'] = dict(
+                            time=t, force=values[:, 0:3], torque=values[:, 3:6])
+                        self._logger.info('%s=loaded' % topic)
         except Exception as e:
             self._logger.error('Error retrieving fin wrench data from rosbag, message=' + str(e))
 
+        # Input and output arrays of all fins, if they share the same time
+        # stamps
+        self._matrix = dict()
+        for tag in ['input', 'output']:
+            self._matrix[tag] = self.align_series(
+                dict((i, self._recorded_data[i][tag]) for i in self._recorded_data
+                     if tag in self._recorded_data[i]))
+            if self._matrix[tag] is not None and \
+                self._matrix[tag][1].shape[0] != self.n_fins:
+                self._matrix[tag] = None
+
     def get_as_dataframe(self, add_group_name=None):
         try:
             import pandas
 
-            data = dict()
-            for i in self._recorded_data:
-                data[self.LABEL + '_id'] = [i for _ in range(self._recorded_data[i]['output']['time'])]
-                if add_group_name is not None:
-                    data['group'] = [add_group_name for _ in range(self._recorded_data[i]['output']['time'])]
-                
-                data[self.LABEL + '_output_time'] = self._recorded_data[i]['output']['time']
-                data[self.LABEL + '_output_values'] = self._recorded_data[i]['output']['values']
-
-            df_output = pandas.DataFrame(data)
-
-            data = dict()
-            for i in self._recorded_data:
-                data[self.LABEL + '_id'] = [i for _ in range(self._recorded_data[i]['input']['time'])]
-                if add_group_name is not None:
-                    data['group'] = [add_group_name for _ in range(self._recorded_data[i]['input']['time'])]
-                
-                data[self.LABEL + '_input_time'] = self._recorded_data[i]['input']['time']
-                data[self.LABEL + '_input_values'] = self._recorded_data[i]['input']['values']
-
-            df_input = pandas.DataFrame(data)
-
-            data = dict()
-            for i in self._recorded_data:
-                data[self.LABEL + '_id'] = [i for _ in range(self._recorded_data[i]['wrench']['time'])]
-                if add_group_name is not None:
-                    data['group'] = [add_group_name for _ in range(self._recorded_data[i]['wrench']['time'])]
-                
-                data[self.LABEL + '_wrench_force_x'] = [x[0] for x in self._recorded_data[i]['wrench']['force']]
-                data[self.LABEL + '_wrench_force_y'] = [x[1] for x in self._recorded_data[i]['wrench']['force']]
-                data[self.LABEL + '_wrench_force_z'] = [x[2] for x in self._recorded_data[i]['wrench']['force']]
-
-                data[self.LABEL + '_wrench_torque_x'] = [x[0] for x in self._recorded_data[i]['wrench']['torque']]
-                data[self.LABEL + '_wrench_torque_y'] = [x[1] for x in self._recorded_data[i]['wrench']['torque']]
-                data[self.LABEL + '_wrench_torque_z'] = [x[2] for x in self._recorded_data[i]['wrench']['torque']]
-
-            if len(data) == 0:
+            dfs = list()
+            for tag in ['input', 'output']:
+                columns = self.concatenate_by_id(
+                    dict((i, [self._recorded_data[i][tag]['time'],
+                              self._recorded_data[i][tag]['values']])
+                         for i in self._recorded_data if tag in self._recorded_data[i]))
+                if columns is None:
+                    continue
+                data = dict()
+                data[self.LABEL + '_id'] = columns[0]
+                data[self.LABEL + '_%s_time' % tag] = columns[1]
+                data[self.LABEL + '_%s_values' % tag] = columns[2]
+                dfs.append(self.build_dataframe(data, add_group_name))
+
+            columns = self.concatenate_by_id(
+                dict((i, [self._recorded_data[i]['wrench']['time'],
+                          self._recorded_data[i]['wrench']['force'],
+                          self._recorded_data[i]['wrench']['torque']])
+                     for i in self._recorded_data if 'wrench' in self._recorded_data[i]))
+            if columns is not None:
+                data = dict()
+                data[self.LABEL + '_id'] = columns[0]
+                data[self.LABEL + '_wrench_time'] = columns[1]
+                for k, tag in zip([2, 3], ['force', 'torque']):
+                    for i, col in enumerate(self.get_columns(columns[k], 3)):
+                        data[self.LABEL + '_wrench_%s_%s' % (tag, 'xyz'[i])] = col
+                dfs.append(self.build_dataframe(data, add_group_name))
+
+            if len(dfs) == 0:
                 return None
-                
-            df_wrench = pandas.DataFrame(data)
 
-            return pandas.concat([df_input, df_output, df_wrench], ignore_index=True)
+            return pandas.concat(dfs, ignore_index=True)
 
         except Exception as ex:
             print('Error while exporting as pandas.DataFrame, message=' + str(ex))
@@ -141,11 +132,22 @@ class FinsData(SimulationData):
     def n_fins(self):
         return len(self._recorded_data.keys())
 
+    def get_input_matrix(self):
+        # Time stamps and n_fins x n_samples array of fin input angles, or
+        # None if the fins were not sampled on the same time stamps
+        return self._matrix['input']
+
+    def get_output_matrix(self):
+        return self._matrix['output']
+
     def plot(self, output_dir):
         if not os.path.isdir(output_dir):
             rospy.logerr('Invalid output directory, dir=' + str(output_dir))
             raise Exception('Invalid output directory')
-        
+        self.run_plot_jobs(output_dir)
+
+    def plot_output_angles(self, output_dir):
+        plt = get_pyplot()
         try:
             ##############################################################################
             # All fin outputs
@@ -158,10 +160,10 @@ class FinsData(SimulationData):
                 min_t = 0.0
                 max_t = 0.0
                 for i in self._recorded_data.keys():
-                    ax_all.plot(self._recorded_data[i]['output']['time'],
-                                self._recorded_data[i]['output']['values'],
-                                linewidth=self._plot_configs['linewidth'],
-                                label=r'%d' % i)
+                    self.plot_series(ax_all, self._recorded_data[i]['output']['time'],
+                                             self._recorded_data[i]['output']['values'],
+                                             linewidth=self._plot_configs['linewidth'],
+                                             label=r'%d' % i)
 
                     max_y = np.max([max_y, np.max(np.abs(self._recorded_data[i]['output']['values']))])
                     min_t = np.min([min_t, np.min(self._recorded_data[i]['output']['time'])])
@@ -191,7 +193,8 @@ class FinsData(SimulationData):
                 plt.close(fig_all)
                 del fig_all
 
-        
+    def plot_input_angles(self, output_dir):
+        plt = get_pyplot()
         try:
             ##############################################################################
             # All fin inputs
@@ -204,10 +207,10 @@ class FinsData(SimulationData):
                 min_t = 0.0
                 max_t = 0.0
                 for i in self._recorded_data.keys():
-                    ax_all.plot(self._recorded_data[i]['input']['time'],
-                                self._recorded_data[i]['input']['values'],
-                                linewidth=self._plot_configs['linewidth'],
-                                label=r'%d' % i)
+                    self.plot_series(ax_all, self._recorded_data[i]['input']['time'],
+                                             self._recorded_data[i]['input']['values'],
+                                             linewidth=self._plot_configs['linewidth'],
+                                             label=r'%d' % i)
 
                     max_y = np.max([max_y, np.max(np.abs(self._recorded_data[i]['input']['values']))])
                     min_t = np.min([min_t, np.min(self._recorded_data[i]['input']['time'])])
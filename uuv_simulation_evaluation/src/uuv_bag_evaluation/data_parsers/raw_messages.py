@@ -0,0 +1,157 @@
+# Copyright (c) 2016 The UUV Simulator Authors.
+# All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Decoding of stamped messages with a fixed layout (a `std_msgs/Header`
+followed by numeric fields, e.g. `FloatStamped` or `WrenchStamped`) from
+the serialized data returned by `read_messages(raw=True)`, without creating
+a message object for each sample.
+"""
+import struct
+import numpy as np
+
+# Struct format of the numeric ROS field types
+FIELD_FORMATS = dict(float64='d', float32='f',
+                     int8='b', uint8='B', byte='b', char='B', bool='B',
+                     int16='h', uint16='H',
+                     int32='i', uint32='I',
+                     int64='q', uint64='Q')
+
+HEADER_TYPES = ['std_msgs/Header', 'Header']
+
+# Sequence number, stamp and length of the frame ID of the header
+HEADER_STRUCT = struct.Struct('<IIII')
+
+_LAYOUTS = dict()
+
+
+def _get_fields(names, slot_types, prefix=''):
+    # Flattened list of (field name, struct format), None if any field has
+    # a variable size
+    from roslib.message import get_message_class
+    fields = list()
+    for name, slot_type in zip(names, slot_types):
+        if slot_type in FIELD_FORMATS:
+            fields.append((prefix + name, FIELD_FORMATS[slot_type]))
+        elif '/' in slot_type and '[' not in slot_type and \
+                slot_type not in HEADER_TYPES:
+            sub_class = get_message_class(slot_type)
+            if sub_class is None:
+                return None
+            sub_fields = _get_fields(sub_class.__slots__, sub_class._slot_types,
+                                     prefix + name + '.')
+            if sub_fields is None:
+                return None
+            fields += sub_fields
+        else:
+            return None
+    return fields
+
+
+def get_layout(msg_class):
+    """Return the names and the struct of the fields after the header of
+    a stamped message type, or None if the layout is not fixed.
+    """
+    if msg_class in _LAYOUTS:
+        return _LAYOUTS[msg_class]
+    layout = None
+    try:
+        if len(msg_class._slot_types) and \
+                msg_class._slot_types[0] in HEADER_TYPES:
+            fields = _get_fields(msg_class.__slots__[1:],
+                                 msg_class._slot_types[1:])
+            if fields is not None and len(fields):
+                layout = ([f[0] for f in fields],
+                          struct.Struct('<' + ''.join([f[1] for f in fields])))
+    except Exception:
+        layout = None
+    _LAYOUTS[msg_class] = layout
+    return layout
+
+
+def decode(buffers, layout, indexes):
+    """Decode the serialized messages in `buffers`, returns the header
+    stamps and a N x len(indexes) array with the selected fields.
+    """
+    n_samples = len(buffers)
+    names, body = layout
+    t = np.empty(n_samples)
+    values = np.empty((n_samples, len(indexes)))
+    if n_samples == 0:
+        return t, values
+
+    # If all messages have the same size (i.e., the same frame ID length),
+    # the messages are decoded at once with a structured data type
+    n_frame = HEADER_STRUCT.unpack_from(buffers[0], 0)[3]
+    msg_size = HEADER_STRUCT.size + n_frame + body.size
+    if all(len(b) == msg_size for b in buffers):
+        dtype = [('seq', '<u4'), ('secs', '<u4'), ('nsecs', '<u4'),
+                 ('frame_len', '<u4')]
+        if n_frame > 0:
+            dtype.append(('frame_id', 'V%d' % n_frame))
+        fmt = body.format[1:] if body.format[:1] in ('<', b'<') else body.format
+        if isinstance(fmt, bytes):
+            fmt = fmt.decode()
+        dtype += [('f%d' % i, '<' + c) for i, c in enumerate(fmt)]
+        data = np.frombuffer(b''.join(buffers), dtype=np.dtype(dtype))
+        t[:] = data['secs'] + 1e-9 * data['nsecs']
+        for k, i in enumerate(indexes):
+            values[:, k] = data['f%d' % i]
+        return t, values
+
+    for j, b in enumerate(buffers):
+        _, secs, nsecs, n_frame = HEADER_STRUCT.unpack_from(b, 0)
+        t[j] = secs + 1e-9 * nsecs
+        fields = body.unpack_from(b, HEADER_STRUCT.size + n_frame)
+        for k, i in enumerate(indexes):
+            values[j, k] = fields[i]
+    return t, values
+
+
+def _get_attr(msg, name):
+    for attr in name.split('.'):
+        msg = getattr(msg, attr)
+    return msg
+
+
+def read_stamped_arrays(bag, topic, fields):
+    """Read the header stamps and the fields (attribute paths, e.g.
+    `wrench.force.x`) of all messages of a stamped topic. The messages are
+    decoded from their serialized data if the layout of the message type
+    is fixed, otherwise they are deserialized.
+    """
+    buffers = list()
+    layout = None
+    try:
+        for _, msg, _ in bag.read_messages(topic, raw=True):
+            if layout is None:
+                layout = get_layout(msg[4])
+                if layout is None or \
+                        any(f not in layout[0] for f in fields):
+                    layout = None
+                    break
+            buffers.append(msg[1])
+    except Exception:
+        layout = None
+
+    if layout is not None:
+        return decode(buffers, layout, [layout[0].index(f) for f in fields])
+
+    t = list()
+    values = list()
+    for _, msg, _ in bag.read_messages(topic):
+        t.append(msg.header.stamp.to_sec())
+        values.append([_get_attr(msg, f) for f in fields])
+    return np.array(t, dtype=float), \
+        np.array(values, dtype=float).reshape(-1, len(fields))
@@ -16,8 +16,8 @@ from __future__ import print_function
 import rospy
 import numpy as np
 import os
-import matplotlib.pyplot as plt
-from simulation_data import SimulationData, COLOR_RED
+from simulation_data import SimulationData, get_pyplot, COLOR_RED
+from topic_index import get_topic_index
 
 
 class SalinityData(SimulationData):
@@ -27,14 +27,10 @@ class SalinityData(SimulationData):
         super(SalinityData, self).__init__()
 
         self._unit = None
-        for x in bag.get_type_and_topic_info():
-            for k in x:
-                if 'uuv_sensor_plugins_ros_msgs/Salinity' in x[k][0]:
-                    self._topic_name = k
-                    self._logger.info('Particle salinity topic found <%s>' % k)
-                    break
-            if self._topic_name is not None:
-                break
+        self._topic_name = get_topic_index(bag).find_topic(
+            msg_type='uuv_sensor_plugins_ros_msgs/Salinity')
+        if self._topic_name is not None:
+            self._logger.info('Particle salinity topic found <%s>' % self._topic_name)
 
         self._time = list()
 
@@ -46,31 +42,29 @@ class SalinityData(SimulationData):
                     self._recorded_data['salinity'].append(msg.salinity)
                     if self._unit is None:
                         self._unit = msg.unit
+            self._time = np.array(self._time)
+            self._recorded_data['salinity'] = np.array(self._recorded_data['salinity'])
             self._logger.info('%s=loaded' % self._topic_name)
         except Exception as e:
             self._logger.error('Error reading salinity topic, message=' + str(e))
 
     def get_as_dataframe(self, add_group_name=None):
         try:
-            import pandas
-
             if len(self._recorded_data['salinity']) == 0:
                 return None
                 
             data = dict()
-            data[self.LABEL + '_time'] = self._time
-            data[self.LABEL + '_salinity'] = self._recorded_data['salinity']
-
-            if add_group_name is not None:
-                data['group'] = [add_group_name for _ in range(len(self._time))]
+            data[self.LABEL + '_time'] = np.asarray(self._time)
+            data[self.LABEL + '_salinity'] = np.asarray(self._recorded_data['salinity'])
 
-            return pandas.DataFrame(data)
+            return self.build_dataframe(data, add_group_name)
 
         except Exception as ex:
             print('Error while exporting as pandas.DataFrame, message=' + str(ex))
             return None
 
     def plot(self, output_dir):
+        plt = get_pyplot()
         if not os.path.isdir(output_dir):
             self._logger.error('Invalid output directory, dir=' + str(output_dir))
             raise Exception('Invalid output directory')
@@ -81,7 +75,7 @@ class SalinityData(SimulationData):
             
             ax = fig.add_subplot(111)
 
-            ax.plot(
+            self.plot_series(ax, 
                 self._time, 
                 self._recorded_data['salinity'], 
                 color=COLOR_RED, 
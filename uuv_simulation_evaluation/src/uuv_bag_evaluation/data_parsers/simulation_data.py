@@ -15,23 +15,47 @@
 import numpy as np 
 import logging
 import sys
-import matplotlib.pyplot as plt
+from decimation import decimate, get_path_indices, DECIMATION_METHODS
 
-try:
-    import seaborn
-    plt.style.use('seaborn-ticks')
-    plt.rcParams['legend.frameon'] = True
-    COLOR_RED = seaborn.xkcd_rgb['pale red']
-    COLOR_GREEN = seaborn.xkcd_rgb['medium green']
-    COLOR_BLUE = seaborn.xkcd_rgb['denim blue']
-except:
-    COLOR_RED = '#d62728'
-    COLOR_GREEN = '#2ca02c'
-    COLOR_BLUE = '#1f77b4'
+# Colors from the seaborn xkcd palette ('pale red', 'medium green' and
+# 'denim blue'), defined here to avoid importing seaborn without plotting
+COLOR_RED = '#d9544d'
+COLOR_GREEN = '#39ad48'
+COLOR_BLUE = '#3b5b92'
+
+_PYPLOT = None
+
+
+def get_pyplot():
+    # matplotlib is only imported and configured when the first figure is
+    # created, so that evaluations that only compute KPIs do not load it
+    global _PYPLOT
+    if _PYPLOT is None:
+        import matplotlib.pyplot as plt
+        # Registers the 3D projection
+        from mpl_toolkits.mplot3d import Axes3D
+
+        try:
+            import seaborn
+            plt.style.use('seaborn-ticks')
+            plt.rcParams['legend.frameon'] = True
+        except:
+            pass
+
+        try:
+            plt.rc('text', usetex=True)
+            plt.rc('font', family='sans-serif')
+        except Exception as e:
+            print('Cannot use Latex configuration with matplotlib, message=' + str(e))
+        _PYPLOT = plt
+    return _PYPLOT
 
 
 class SimulationData(object):
     LABEL = ""
+    # Names of the methods generating each figure, called with the output
+    # directory as argument. If empty, plot() is the only plotting job
+    PLOT_JOBS = list()
 
     def __init__(self, topic_name=None, message_type=None, prefix=None):
         # Setting up the log
@@ -49,6 +73,8 @@ class SimulationData(object):
         self._prefix = prefix
         self._recorded_data = dict()
         self._output_dir = '/tmp'
+        # Evaluation context of the recording, see set_context
+        self._context = None
 
         self._plot_configs = dict(                                    
             figsize=[12, 6],
@@ -62,7 +88,11 @@ class SimulationData(object):
             labelpad=10,
             legend=dict(
                 loc='upper right',
-                fontsize=22))
+                fontsize=22),
+            # Visual decimation of the time series, method=None disables it
+            decimation=dict(
+                method='minmax',
+                max_points=2000))
 
     @staticmethod
     def get_all_parsers():
@@ -72,6 +102,9 @@ class SimulationData(object):
     def get_all_labels():
         return [parser.LABEL for parser in SimulationData.get_all_parsers()]
         
+    def set_context(self, context):
+        self._context = context
+
     def read_data(self, bag):
         raise NotImplementedError()
 
@@ -80,11 +113,41 @@ class SimulationData(object):
 
     def plot(self, output_dir):
         raise NotImplementedError()
+
+    def get_plot_jobs(self):
+        if len(self.PLOT_JOBS):
+            return list(self.PLOT_JOBS)
+        return ['plot']
+
+    def run_plot_jobs(self, output_dir):
+        for job in self.get_plot_jobs():
+            getattr(self, job)(output_dir)
     
     def get_data(self):
         return self._time, self._recorded_data    
 
+    def set_decimation(self, method='minmax', max_points=2000):
+        if method is not None and method not in DECIMATION_METHODS:
+            raise ValueError('Invalid decimation method, options=%s' % str(DECIMATION_METHODS))
+        self._plot_configs['decimation'] = dict(method=method, max_points=max_points)
+
+    def plot_series(self, ax, t, y, *args, **kwargs):
+        t, y = decimate(
+            t, y,
+            max_points=self._plot_configs['decimation']['max_points'],
+            method=self._plot_configs['decimation']['method'])
+        return ax.plot(t, y, *args, **kwargs)
+
+    def decimate_path(self, points):
+        points = np.asarray(points)
+        if self._plot_configs['decimation']['method'] is None or \
+            self._plot_configs['decimation']['max_points'] is None:
+            return points
+        return points[get_path_indices(
+            points, self._plot_configs['decimation']['max_points'])]
+
     def get_figure(self, n_rows=1):
+        plt = get_pyplot()
         return plt.figure(
             figsize=(self._plot_configs['figsize'][0], n_rows * self._plot_configs['figsize'][1]))
 
@@ -113,3 +176,58 @@ class SimulationData(object):
 
     def get_as_dataframe(self, add_group_name=None):
         raise NotImplementedError()
+
+    @staticmethod
+    def align_series(series):
+        # Converts the time series of each unit (e.g. thruster or fin),
+        # given as dict(time, values) per unit ID, into contiguous arrays.
+        # If the IDs are 0..N-1 and all units share the same time stamps,
+        # the values are stacked in a N x n_samples array, the per-unit
+        # values become views of its rows and (time, values) is returned
+        for i in series:
+            series[i]['time'] = np.array(series[i]['time'], dtype=float)
+            series[i]['values'] = np.array(series[i]['values'], dtype=float)
+
+        ids = sorted(series.keys())
+        if len(ids) == 0 or ids != list(range(len(ids))):
+            return None
+        t = series[0]['time']
+        for i in ids[1:]:
+            if not np.array_equal(series[i]['time'], t):
+                return None
+        values = np.vstack([series[i]['values'] for i in ids])
+        for i in ids:
+            series[i]['time'] = t
+            series[i]['values'] = values[i]
+        return t, values
+
+    @staticmethod
+    def get_columns(values, n_columns):
+        # Column views of a sequence of vectors stored as a N x n_columns array
+        values = np.asarray(values, dtype=float).reshape(-1, n_columns)
+        return [values[:, i] for i in range(n_columns)]
+
+    @staticmethod
+    def concatenate_by_id(series):
+        # Long form of the time series of each unit (e.g. thruster or fin),
+        # `series` maps the unit ID to a list of arrays of equal length.
+        # Returns the ID column followed by the concatenated arrays
+        ids = sorted(series.keys())
+        if len(ids) == 0:
+            return None
+        n_samples = [len(series[i][0]) for i in ids]
+        output = [np.repeat(ids, n_samples)]
+        for k in range(len(series[ids[0]])):
+            output.append(np.concatenate(
+                [np.asarray(series[i][k], dtype=float) for i in ids]))
+        return output
+
+    @staticmethod
+    def build_dataframe(data, add_group_name=None):
+        # Data frame built in one step from the column arrays, the group
+        # name is repeated for all samples
+        import pandas
+        if add_group_name is not None and len(data):
+            n_samples = len(data[list(data.keys())[0]])
+            data['group'] = np.repeat(add_group_name, n_samples)
+        return pandas.DataFrame(data)
@@ -16,96 +16,83 @@ from __future__ import print_function
 import rospy
 import numpy as np
 import os
-import matplotlib.pyplot as plt
-from simulation_data import SimulationData, COLOR_RED, COLOR_GREEN, COLOR_BLUE
+from simulation_data import SimulationData, get_pyplot, COLOR_RED, COLOR_GREEN, COLOR_BLUE
+from topic_index import get_topic_index
+from raw_messages import read_stamped_arrays
 
 
 class ThrusterData(SimulationData):
     LABEL = 'thrusters'
+    PLOT_JOBS = ['plot_thrusts',
+                 'plot_thrusts_all',
+                 'plot_thrusts_avg',
+                 'plot_thrusts_max',
+                 'plot_thruster_input']
 
     def __init__(self, bag):
         super(ThrusterData, self).__init__()
         
-        for x in bag.get_type_and_topic_info():
-            for k in x:
-                if self._prefix is None:
-                    if 'thrusters' in k:
-                        self._logger.info('Thruster topic prefix found <%s>' % k)
-                        i = len('thrusters')
-                        i_max = k.find('thrusters') + i
-                        self._prefix = k[:i_max]
-                        break
-            if self._prefix is not None:
-                break
+        topic_index = get_topic_index(bag)
+        prefixes = topic_index.get_actuator_prefixes('thrusters')
+        if len(prefixes):
+            self._prefix = prefixes[0]
+            self._logger.info('Thruster topic prefix found <%s>' % self._prefix)
 
         try:
             self._recorded_data = dict()
-            # Find all thruster output topics
+            # Read the recorded thruster output topics
             if self._prefix is not None:
-                for i in range(16):
-                    for topic, msg, time in bag.read_messages('%s/%d/thrust' % (self._prefix, i)):
-                        if i not in self._recorded_data:
-                            self._recorded_data[i] = dict(thrust=dict(time=list(), values=list()))
-                        t = msg.header.stamp.to_sec()
-                        self._recorded_data[i]['thrust']['time'].append(t)
-                        self._recorded_data[i]['thrust']['values'].append(float(msg.data))
-                    if i in self._recorded_data:
-                        self._logger.info('%s/%d/thrust=loaded' % (self._prefix, i))
+                for i, topic in topic_index.get_actuator_topics('thrusters', 'thrust', self._prefix):
+                    t, values = read_stamped_arrays(bag, topic, ['data'])
+                    if len(t):
+                        self._recorded_data[i] = dict(thrust=dict(time=t, values=values[:, 0]))
+                        self._logger.info('%s=loaded' % topic)
         except Exception as e:
             self._logger.warning('Error retrieving thrust output from rosbag, message=' + str(e))
 
         try:
-            # Find all thruster input topics
+            # Read the recorded thruster input topics
             if self._prefix is not None:
-                for i in range(16):
-                    for topic, msg, time in bag.read_messages('%s/%d/input' % (self._prefix, i)):
-                        if 'input' not in self._recorded_data[i]:
-                            self._recorded_data[i]['input'] = dict(time=list(), values=list())
-                        t = msg.header.stamp.to_sec()
-                        self._recorded_data[i]['input']['time'].append(t)
-                        self._recorded_data[i]['input']['values'].append(float(msg.data))
-                    if i in self._recorded_data:
-                        self._logger.info('%s/%d/input=loaded' % (self._prefix, i))
+                for i, topic in topic_index.get_actuator_topics('thrusters', 'input', self._prefix):
+                    if i not in self._recorded_data:
+                        continue
+                    t, values = read_stamped_arrays(bag, topic, ['data'])
+                    if len(t):
+                        self._recorded_data[i]['input'] = dict(time=t, values=values[:, 0])
+                        self._logger.info('%s=loaded' % topic)
         except Exception as e:
             self._logger.warning('Error retrieving thruster input data from rosbag, message=' + str(e))
 
+        # Thrust and input arrays of all thrusters, if they share the same
+        # time stamps
+        self._matrix = dict()
+        for tag in ['thrust', 'input']:
+            self._matrix[tag] = self.align_series(
+                dict((i, self._recorded_data[i][tag]) for i in self._recorded_data
+                     if tag in self._recorded_data[i]))
+            if self._matrix[tag] is not None and \
+                self._matrix[tag][1].shape[0] != self.n_thrusters:
+                self._matrix[tag] = None
+
     def get_as_dataframe(self, add_group_name=None):
         try:
-            import pandas
-
-            data = dict()
-            data[self.LABEL + '_id'] = list()
-            data[self.LABEL + '_output_time'] = list()
-            data[self.LABEL + '_output_values'] = list()
-            if add_group_name is not None:
-                data['group'] = list()
-            for i in self._recorded_data:
-                data[self.LABEL + '_id'] += [i for _ in range(len(self._recorded_data[i]['thrust']['time']))]
-                if add_group_name is not None:
-                    data['group'] += [add_group_name for _ in range(len(self._recorded_data[i]['thrust']['time']))]
-                
-                data[self.LABEL + '_output_time'] += self._recorded_data[i]['thrust']['time']
-                data[self.LABEL + '_output_values'] += self._recorded_data[i]['thrust']['values']
-
-            df_output = pandas.DataFrame(data)        
-
-            data = dict()
-            data[self.LABEL + '_id'] = list()
-            data[self.LABEL + '_input_time'] = list()
-            data[self.LABEL + '_input_values'] = list()
-            if add_group_name is not None:
-                data['group'] = list()
-            for i in self._recorded_data:
-                data[self.LABEL + '_id'] += [i for _ in range(len(self._recorded_data[i]['input']['time']))]
-                if add_group_name is not None:
-                    data['group'] += [add_group_name for _ in range(len(self._recorded_data[i]['input']['time']))]
-                
-                data[self.LABEL + '_input_time'] += self._recorded_data[i]['input']['time']
-                data[self.LABEL + '_input_values'] += self._recorded_data[i]['input']['values']        
-
-            df_input = pandas.DataFrame(data)
-
-            return dict(input=df_input, output=df_output)
+            output = dict()
+            for tag, label in [('thrust', 'output'), ('input', 'input')]:
+                columns = self.concatenate_by_id(
+                    dict((i, [self._recorded_data[i][tag]['time'],
+                              self._recorded_data[i][tag]['values']])
+                         for i in self._recorded_data if tag in self._recorded_data[i]))
+                if columns is None:
+                    continue
+                data = dict()
+                data[self.LABEL + '_id'] = columns[0]
+                data[self.LABEL + '_%s_time' % label] = columns[1]
+                data[self.LABEL + '_%s_values' % label] = columns[2]
+                output[label] = self.build_dataframe(data, add_group_name)
+
+            if len(output) == 0:
+                return None
+            return output
 
         except Exception as ex:
             self._logger.error('Error while exporting as pandas.DataFrame, message=' + str(ex))
@@ -125,11 +112,55 @@ class ThrusterData(SimulationData):
             return None
         return self._recorded_data[idx]['thrust']['time'], self._recorded_data[idx]['thrust']['values']
 
+    def get_thrust_matrix(self):
+        # Time stamps and n_thrusters x n_samples array of thrust forces, or
+        # None if the thrusters were not sampled on the same time stamps
+        return self._matrix['thrust']
+
+    def get_input_matrix(self):
+        return self._matrix['input']
+
+    def get_max_abs_thrust(self):
+        if self._matrix['thrust'] is not None:
+            return np.max(np.abs(self._matrix['thrust'][1]))
+        max_y = 0.0
+        for i in range(self.n_thrusters):
+            max_y = np.max([max_y, np.max(np.abs(self._recorded_data[i]['thrust']['values']))])
+        return max_y
+
+    def get_abs_thrust_avg_max(self):
+        # Average and maximum element-wise absolute thrust forces, interpolated
+        # at the time stamps of the first thruster
+        if self._matrix['thrust'] is not None:
+            t0, thrusts = self._matrix['thrust']
+            return t0, np.mean(np.abs(thrusts), axis=0), np.max(np.abs(thrusts), axis=0)
+        t0 = np.array(self._recorded_data[0]['thrust']['time'])
+        thrust_sum = np.zeros(t0.shape)
+        thrust_max = np.zeros(t0.shape)
+        self._logger.info('Computing sum and maximum element-wise values for the thrust forces')
+        for i in range(self.n_thrusters):
+            thrust_sum += np.interp(
+                t0,
+                self._recorded_data[i]['thrust']['time'],
+                np.abs(self._recorded_data[i]['thrust']['values']))
+            thrust_max = np.maximum(
+                thrust_max,
+                np.interp(
+                    t0,
+                    self._recorded_data[i]['thrust']['time'],
+                    np.abs(self._recorded_data[i]['thrust']['values'])))
+
+        thrust_sum /= self.n_thrusters
+        return t0, thrust_sum, thrust_max
+
     def plot(self, output_dir):
         if not os.path.isdir(output_dir):
             self._logger.error('Invalid output directory, dir=' + str(output_dir))
             raise Exception('Invalid output directory')
+        self.run_plot_jobs(output_dir)
 
+    def plot_thrusts(self, output_dir):
+        plt = get_pyplot()
         fig, ax = plt.subplots(self.n_thrusters, 1,
                                figsize=(self._plot_configs['figsize'][0],
                                         self.n_thrusters * self._plot_configs['figsize'][1]))
@@ -145,7 +176,7 @@ class ThrusterData(SimulationData):
                     # Find largest absolute thrust force value
                     max_y = np.max([max_y, np.max(np.abs(self._recorded_data[i]['thrust']['values']))])
 
-                    ax[i].plot(
+                    self.plot_series(ax[i], 
                         self._recorded_data[i]['thrust']['time'],
                         self._recorded_data[i]['thrust']['values'],
                         linewidth=self._plot_configs['linewidth'],
@@ -168,7 +199,7 @@ class ThrusterData(SimulationData):
                 # Find largest absolute thrust force value
                 max_y = np.max(np.abs(self._recorded_data[0]['thrust']['values']))
 
-                ax.plot(
+                self.plot_series(ax, 
                     self._recorded_data[0]['thrust']['time'],
                     self._recorded_data[0]['thrust']['values'],
                     linewidth=self._plot_configs['linewidth'],
@@ -199,8 +230,11 @@ class ThrusterData(SimulationData):
             plt.close(fig)
             del fig
 
+    def plot_thrusts_all(self, output_dir):
+        plt = get_pyplot()
         fig_all = self.get_figure()
         try:
+            max_y = self.get_max_abs_thrust()
             ##############################################################################
             # All thrust outputs
             ##############################################################################
@@ -208,10 +242,10 @@ class ThrusterData(SimulationData):
             ax_all = fig_all.gca()
 
             for i in self._recorded_data:                
-                ax_all.plot(self._recorded_data[i]['thrust']['time'],
-                            self._recorded_data[i]['thrust']['values'],
-                            linewidth=self._plot_configs['linewidth'],
-                            label='%d' % i)
+                self.plot_series(ax_all, self._recorded_data[i]['thrust']['time'],
+                                         self._recorded_data[i]['thrust']['values'],
+                                         linewidth=self._plot_configs['linewidth'],
+                                         label='%d' % i)
 
             ax_all.set_xlim(np.min(self._recorded_data[i]['thrust']['time']), np.max(self._recorded_data[i]['thrust']['time']))
             ax_all.set_ylim(-max_y, max_y)
@@ -240,6 +274,8 @@ class ThrusterData(SimulationData):
             plt.close(fig_all)
             del fig_all
 
+    def plot_thrusts_avg(self, output_dir):
+        plt = get_pyplot()
         fig_avg = self.get_figure()
         try:
             ##############################################################################
@@ -247,27 +283,12 @@ class ThrusterData(SimulationData):
             ##############################################################################            
             ax_avg = fig_avg.gca()
             
-            t0 = np.array(self._recorded_data[0]['thrust']['time'])
-            thrust_sum = np.zeros(t0.shape)
-            thrust_max = np.zeros(t0.shape)
-            self._logger.info('Computing sum and maximum element-wise values for the thrust forces')
-            for i in range(self.n_thrusters):                
-                thrust_sum += np.interp(
-                    t0, 
-                    self._recorded_data[i]['thrust']['time'], 
-                    np.abs(self._recorded_data[i]['thrust']['values']))
-                thrust_max = np.maximum(
-                    thrust_max, 
-                    np.interp(
-                        t0, 
-                        self._recorded_data[i]['thrust']['time'], 
-                        np.abs(self._recorded_data[i]['thrust']['values'])))
-
-            thrust_sum /= self.n_thrusters
-            ax_avg.plot(t0,
-                        thrust_sum,
-                        linewidth=self._plot_configs['linewidth'],
-                        label=r'$%d$' % i)
+            t0, thrust_sum, _ = self.get_abs_thrust_avg_max()
+            i = self.n_thrusters - 1
+            self.plot_series(ax_avg, t0,
+                                     thrust_sum,
+                                     linewidth=self._plot_configs['linewidth'],
+                                     label=r'$%d$' % i)
 
             ax_avg.set_xlim(np.min(t0), np.max(t0))
 
@@ -291,17 +312,21 @@ class ThrusterData(SimulationData):
             plt.close(fig_avg)
             del fig_avg
 
+    def plot_thrusts_max(self, output_dir):
+        plt = get_pyplot()
         fig_max = self.get_figure()
         try:
             ##############################################################################
             # Maximum thruster output for each time step
             ##############################################################################            
             ax_max = fig_max.gca()
+            t0, _, thrust_max = self.get_abs_thrust_avg_max()
+            i = self.n_thrusters - 1
             self._logger.info('Plotting maximum element-wise values for the thrust forces')
-            ax_max.plot(t0,
-                        thrust_max,
-                        linewidth=self._plot_configs['linewidth'],
-                        label=r'$%d$' % i)
+            self.plot_series(ax_max, t0,
+                                     thrust_max,
+                                     linewidth=self._plot_configs['linewidth'],
+                                     label=r'$%d$' % i)
 
             ax_max.set_xlim(np.min(t0), np.max(t0))
 
@@ -325,6 +350,8 @@ class ThrusterData(SimulationData):
             plt.close(fig_max)
             del fig_max
 
+    def plot_thruster_input(self, output_dir):
+        plt = get_pyplot()
         fig_in = plt.figure(figsize=(self._plot_configs['figsize'][0],
                                      self._plot_configs['figsize'][1]))
         try:
@@ -340,7 +367,7 @@ class ThrusterData(SimulationData):
             min_y = 0
             max_y = 0
             for i in range(self.n_thrusters):                
-                ax_min.plot(
+                self.plot_series(ax_min, 
                     self._recorded_data[i]['input']['time'],
                     self._recorded_data[i]['input']['values'],
                     linewidth=self._plot_configs['linewidth'],
@@ -16,14 +16,10 @@ from __future__ import print_function
 import rospy
 import numpy as np
 import os
-import matplotlib.pyplot as plt
-from simulation_data import SimulationData, COLOR_RED, COLOR_GREEN, COLOR_BLUE
+from simulation_data import SimulationData, get_pyplot, COLOR_RED, COLOR_GREEN, COLOR_BLUE
+from topic_index import get_topic_index
+from raw_messages import read_stamped_arrays
 
-try:
-    plt.rc('text', usetex=True)
-    plt.rc('font', family='sans-serif')
-except Exception as e:
-    print('Cannot use Latex configuration with matplotlib, message=', str(e))
 
 class ThrusterManagerData(SimulationData):
     LABEL = 'thruster_manager'
@@ -31,26 +27,21 @@ class ThrusterManagerData(SimulationData):
     def __init__(self, bag):
         super(ThrusterManagerData, self).__init__()
 
-        for x in bag.get_type_and_topic_info():
-            for k in x:
-                if 'thruster_manager' in k and 'geometry_msgs/WrenchStamped' in x[k][0]:
-                    self._topic_name = k
-                    self._logger.info('Thruster manager input topic found <%s>' % k)
-                    break
-            if self._topic_name is not None:
-                break
+        self._topic_name = get_topic_index(bag).find_topic(
+            msg_type='geometry_msgs/WrenchStamped', contains='thruster_manager')
+        if self._topic_name is not None:
+            self._logger.info('Thruster manager input topic found <%s>' % self._topic_name)
 
         self._time = list()
 
         try:
-            self._recorded_data['force'] = list()
-            self._recorded_data['torque'] = list()
             # Find thruster manager input topic
-            for topic, msg, time in bag.read_messages(self._topic_name):
-                time = msg.header.stamp.to_sec()
-                self._time.append(time)
-                self._recorded_data['force'].append([msg.wrench.force.x, msg.wrench.force.y, msg.wrench.force.z])
-                self._recorded_data['torque'].append([msg.wrench.torque.x, msg.wrench.torque.y, msg.wrench.torque.z])            
+            self._time, values = read_stamped_arrays(
+                bag, self._topic_name,
+                ['wrench.force.x', 'wrench.force.y', 'wrench.force.z',
+                 'wrench.torque.x', 'wrench.torque.y', 'wrench.torque.z'])
+            self._recorded_data['force'] = values[:, 0:3]
+            self._recorded_data['torque'] = values[:, 3:6]
             self._logger.info('%s=loaded' % self._topic_name)
         except Exception as e:
             self._logger.error('Error retrieving thruster manager input wrench data from rosbag, message=' + str(e))
@@ -59,28 +50,23 @@ class ThrusterManagerData(SimulationData):
 
     def get_as_dataframe(self, add_group_name=None):
         try:
-            import pandas
-            
-            data = dict()
-            data[self.LABEL + '_time'] = self._time
-            data[self.LABEL + '_force_x'] = [x[0] for x in self._recorded_data['force']]
-            data[self.LABEL + '_force_y'] = [x[1] for x in self._recorded_data['force']]
-            data[self.LABEL + '_force_z'] = [x[2] for x in self._recorded_data['force']]
+            if self._recorded_data['force'] is None or self._recorded_data['torque'] is None:
+                return None
 
-            data[self.LABEL + '_torque_x'] = [x[0] for x in self._recorded_data['torque']]
-            data[self.LABEL + '_torque_y'] = [x[1] for x in self._recorded_data['torque']]
-            data[self.LABEL + '_torque_z'] = [x[2] for x in self._recorded_data['torque']]
-
-            if add_group_name is not None:
-                data['group'] = [add_group_name for _ in range(len(self._time))]
+            data = dict()
+            data[self.LABEL + '_time'] = np.asarray(self._time)
+            for tag in ['force', 'torque']:
+                for i, col in enumerate(self.get_columns(self._recorded_data[tag], 3)):
+                    data[self.LABEL + '_%s_%s' % (tag, 'xyz'[i])] = col
 
-            return pandas.DataFrame(data)
+            return self.build_dataframe(data, add_group_name)
 
         except Exception as ex:
             print('Error while exporting as pandas.DataFrame, message=' + str(ex))
             return None
 
     def plot(self, output_dir):
+        plt = get_pyplot()
         if not os.path.isdir(output_dir):
             self._logger.error('Invalid output directory, dir=' + str(output_dir))
             raise Exception('Invalid output directory')
@@ -98,7 +84,7 @@ class ThrusterManagerData(SimulationData):
             min_y = 0
             max_y = 0
 
-            ax_tm[0].plot(
+            self.plot_series(ax_tm[0], 
                 self._time, 
                 [f[0] for f in self._recorded_data['force']],
                 color=COLOR_RED,
@@ -108,7 +94,7 @@ class ThrusterManagerData(SimulationData):
             min_y = min(min_y, np.min([f[0] for f in self._recorded_data['force']]))
             max_y = max(max_y, np.max([f[0] for f in self._recorded_data['force']]))
             
-            ax_tm[0].plot(
+            self.plot_series(ax_tm[0], 
                 self._time, 
                 [f[1] for f in self._recorded_data['force']],
                 color=COLOR_GREEN,
@@ -118,7 +104,7 @@ class ThrusterManagerData(SimulationData):
             min_y = min(min_y, np.min([f[1] for f in self._recorded_data['force']]))
             max_y = max(max_y, np.max([f[1] for f in self._recorded_data['force']]))
             
-            ax_tm[0].plot(
+            self.plot_series(ax_tm[0], 
                 self._time, 
                 [f[2] for f in self._recorded_data['force']],
                 color=COLOR_BLUE,
@@ -128,7 +114,7 @@ class ThrusterManagerData(SimulationData):
             min_y = min(min_y, np.min([f[2] for f in self._recorded_data['force']]))
             max_y = max(max_y, np.max([f[2] for f in self._recorded_data['force']]))
 
-            ax_tm[0].set_xlim(np.min(t), np.max(t))            
+            ax_tm[0].set_xlim(np.min(self._time), np.max(self._time))            
             ax_tm[0].set_ylim(min_y, max_y)
 
             self.config_2dplot(
@@ -141,7 +127,7 @@ class ThrusterManagerData(SimulationData):
             min_y = 0
             max_y = 0
 
-            ax_tm[1].plot(
+            self.plot_series(ax_tm[1], 
                 self._time, 
                 [x[0] for x in self._recorded_data['torque']],
                 color=COLOR_RED,
@@ -151,7 +137,7 @@ class ThrusterManagerData(SimulationData):
             min_y = min(min_y, np.min([x[0] for x in self._recorded_data['torque']]))
             max_y = max(max_y, np.max([x[0] for x in self._recorded_data['torque']]))
             
-            ax_tm[1].plot(
+            self.plot_series(ax_tm[1], 
                 self._time, 
                 [x[1] for x in self._recorded_data['torque']],
                 color=COLOR_GREEN,
@@ -161,7 +147,7 @@ class ThrusterManagerData(SimulationData):
             min_y = min(min_y, np.min([x[1] for x in self._recorded_data['torque']]))
             max_y = max(max_y, np.max([x[1] for x in self._recorded_data['torque']]))
 
-            ax_tm[1].plot(
+            self.plot_series(ax_tm[1], 
                 self._time, 
                 [x[2] for x in self._recorded_data['torque']],
                 color=COLOR_BLUE,
@@ -171,7 +157,7 @@ class ThrusterManagerData(SimulationData):
             min_y = min(min_y, np.min([x[2] for x in self._recorded_data['torque']]))
             max_y = max(max_y, np.max([x[2] for x in self._recorded_data['torque']]))               
             
-            ax_tm[1].set_xlim(np.min(t), np.max(t))            
+            ax_tm[1].set_xlim(np.min(self._time), np.max(self._time))            
             ax_tm[1].set_ylim(min_y, max_y)
 
             self.config_2dplot(
@@ -0,0 +1,152 @@
+# Copyright (c) 2016 The UUV Simulator Authors.
+# All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Index of the topics of a recording, built once from the bag's topic info
+so that the parsers can find their topics without scanning all topics.
+"""
+import re
+
+ACTUATOR_GROUPS = ['thrusters', 'fins']
+
+# Actuator topics, e.g. /rexrov/thrusters/12/thrust
+ACTUATOR_PATTERN = re.compile(
+    r'^(?P<prefix>.*/(?P<group>%s))/(?P<index>\d+)/(?P<name>[^/]+)$' %
+    '|'.join(ACTUATOR_GROUPS))
+
+# Vehicle namespace, first element of the topic name
+NAMESPACE_PATTERN = re.compile(r'^/?(?P<namespace>[^/]+)/')
+
+# Name of the ground truth odometry topic of the vehicles
+GROUND_TRUTH_TOPIC = 'pose_gt'
+
+
+class TopicIndex(object):
+    """
+    Topics of a recording indexed by message type, vehicle namespace and,
+    for the thruster and fin topics, by actuator index.
+    """
+
+    def __init__(self, bag):
+        # Topic name to message type, in the order given by the bag
+        self._types = dict()
+        self._topics = list()
+        self._by_type = dict()
+        self._by_namespace = dict()
+        # Actuator group -> topic prefix -> index -> name -> topic
+        self._actuators = dict((group, dict()) for group in ACTUATOR_GROUPS)
+
+        topics = bag.get_type_and_topic_info().topics
+        for topic in topics:
+            msg_type = topics[topic].msg_type
+            self._types[topic] = msg_type
+            self._topics.append(topic)
+            self._by_type.setdefault(msg_type, list()).append(topic)
+
+            match = NAMESPACE_PATTERN.match(topic)
+            if match is not None:
+                self._by_namespace.setdefault(
+                    match.group('namespace'), list()).append(topic)
+
+            match = ACTUATOR_PATTERN.match(topic)
+            if match is not None:
+                actuators = self._actuators[match.group('group')].setdefault(
+                    match.group('prefix'), dict())
+                actuators.setdefault(int(match.group('index')), dict())[
+                    match.group('name')] = topic
+
+    @property
+    def topics(self):
+        return self._topics
+
+    @property
+    def namespaces(self):
+        return sorted(self._by_namespace.keys())
+
+    def get_type(self, topic):
+        return self._types.get(topic, None)
+
+    def get_namespace(self, topic):
+        match = NAMESPACE_PATTERN.match(topic)
+        return None if match is None else match.group('namespace')
+
+    def get_topics(self, msg_type=None, contains=None, namespace=None):
+        """Return the topics with the message type `msg_type`, whose name
+        contains the string `contains` and in the vehicle `namespace`.
+        """
+        if msg_type is not None:
+            topics = self._by_type.get(msg_type, list())
+        elif namespace is not None:
+            topics = self._by_namespace.get(namespace, list())
+        else:
+            topics = self._topics
+        if namespace is not None:
+            topics = [t for t in topics if self.get_namespace(t) == namespace]
+        if contains is not None:
+            topics = [t for t in topics if contains in t]
+        return list(topics)
+
+    def find_topic(self, msg_type=None, contains=None, namespace=None):
+        """Return the first topic matching the arguments of `get_topics`,
+        or None.
+        """
+        topics = self.get_topics(msg_type, contains, namespace)
+        return topics[0] if len(topics) else None
+
+    def find_odometry_topic(self, namespace=None):
+        """Return the odometry topic of the vehicle trajectory, or None. The
+        ground truth topic (`pose_gt`) is preferred to other odometry topics,
+        e.g. in the NED frame (`pose_gt_ned`). If there is no ground truth
+        topic, the last odometry topic of the bag is used.
+        """
+        topics = self.get_topics(msg_type='nav_msgs/Odometry', namespace=namespace)
+        if len(topics) == 0:
+            return None
+        candidates = sorted([t for t in topics if t.split('/')[-1] == GROUND_TRUTH_TOPIC])
+        if len(candidates) == 0:
+            candidates = sorted([t for t in topics
+                                 if GROUND_TRUTH_TOPIC in t and 'ned' not in t])
+        if len(candidates) > 0:
+            return candidates[0]
+        return topics[-1]
+
+    def get_actuator_prefixes(self, group):
+        """Return the topic prefixes of an actuator group (`thrusters` or
+        `fins`), e.g. `/rexrov/thrusters`.
+        """
+        return sorted(self._actuators[group].keys())
+
+    def get_actuator_topics(self, group, name, prefix=None):
+        """Return a list of `(index, topic)` sorted by actuator index of the
+        recorded topics `<prefix>/<index>/<name>`. If `prefix` is not given,
+        the first prefix of the group is used.
+        """
+        if prefix is None:
+            prefixes = self.get_actuator_prefixes(group)
+            if len(prefixes) == 0:
+                return list()
+            prefix = prefixes[0]
+        actuators = self._actuators[group].get(prefix, dict())
+        return [(i, actuators[i][name]) for i in sorted(actuators.keys())
+                if name in actuators[i]]
+
+
+def get_topic_index(bag):
+    """Return the topic index of the bag, built by `Recording` once per
+    recording, or create it if the bag has no index.
+    """
+    index = getattr(bag, 'topic_index', None)
+    if index is None:
+        index = TopicIndex(bag)
+    return index
@@ -16,34 +16,37 @@ from __future__ import print_function
 import rospy
 import numpy as np
 import os
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
-from simulation_data import SimulationData, COLOR_RED, COLOR_GREEN, COLOR_BLUE
+from simulation_data import SimulationData, get_pyplot, COLOR_RED, COLOR_GREEN, COLOR_BLUE
+from topic_index import get_topic_index
 from uuv_trajectory_generator import TrajectoryGenerator, TrajectoryPoint
 
-try:
-    plt.rc('text', usetex=True)
-    plt.rc('font', family='sans-serif')
-except Exception as e:
-    print('Cannot use Latex configuration with matplotlib, message=', str(e))
-
 
 class TrajectoryData(SimulationData):
     LABEL = 'trajectory'
+    PLOT_JOBS = ['plot_paths',
+                 'plot_pose',
+                 'plot_quaternion',
+                 'plot_velocities']
 
     def __init__(self, bag):
         super(TrajectoryData, self).__init__(message_type='nav_msgs/Odometry')
 
         self._topic_name = dict()
-        for x in bag.get_type_and_topic_info():
-            for k in x:
-                if 'nav_msgs/Odometry' in x[k][0]:
-                    self._topic_name['odometry'] = k
-                    self._logger.info('Odometry topic found <%s>' % k)
-                    
-                if 'reference' in k and 'uuv_control_msgs/TrajectoryPoint' in x[k][0]:
-                    self._topic_name['reference'] = k
-                    self._logger.info('Trajectory topic found <%s>' % k)
+        topic_index = get_topic_index(bag)
+        topic = topic_index.find_odometry_topic()
+        if topic is not None:
+            self._topic_name['odometry'] = topic
+            self._logger.info('Odometry topic found <%s>' % topic)
+            odometry_topics = topic_index.get_topics(msg_type='nav_msgs/Odometry')
+            if len(odometry_topics) > 1:
+                self._logger.warning('Multiple odometry topics found=%s, using <%s>' % (
+                    str(odometry_topics), topic))
+
+        topic = topic_index.find_topic(
+            msg_type='uuv_control_msgs/TrajectoryPoint', contains='reference')
+        if topic is not None:
+            self._topic_name['reference'] = topic
+            self._logger.info('Trajectory topic found <%s>' % topic)
 
         try:
             self._recorded_data['desired'] = TrajectoryGenerator()
@@ -78,63 +81,36 @@ class TrajectoryData(SimulationData):
             self._logger.error('Error retrieving odometry data from rosbag, message=' + str(e))
             self._recorded_data['actual'] = None
 
+    @staticmethod
+    def get_points_array(trajectory):
+        # One row per trajectory point with the time stamp, position, linear
+        # and angular velocity, Euler angles and quaternion, built in a
+        # single pass over the points
+        return np.array([np.hstack((e.t, e.p, e.vel, e.rot, e.rotq))
+                         for e in trajectory.points]).reshape(-1, 17)
+
     def get_as_dataframe(self, add_group_name=None):
         try:
-            import pandas
+            output = dict()
+            for key, tag in [('desired', 'ref'), ('actual', 'actual')]:
+                points = self.get_points_array(self._recorded_data[key])
 
-            data = dict()
+                data = dict()
+                data[self.LABEL + '_%s_time' % tag] = points[:, 0]
+                for i, axis in enumerate(['x', 'y', 'z']):
+                    data[self.LABEL + '_pos_%s_%s' % (tag, axis)] = points[:, 1 + i]
+                    data[self.LABEL + '_lin_vel_%s_%s' % (tag, axis)] = points[:, 4 + i]
+                    data[self.LABEL + '_ang_vel_%s_%s' % (tag, axis)] = points[:, 7 + i]
 
-            data[self.LABEL + '_ref_time'] = self._recorded_data['desired'].time            
+                for i, angle in enumerate(['roll', 'pitch', 'yaw']):
+                    data[self.LABEL + '_rot_%s_%s' % (tag, angle)] = points[:, 10 + i]
 
-            for i, tag in zip(range(3), ['x', 'y', 'z']):                
-                data[self.LABEL + '_pos_ref_' + tag] = \
-                    [e.p[i] for e in self._recorded_data['desired'].points]
+                for i, axis in enumerate(['x', 'y', 'z', 'w']):
+                    data[self.LABEL + '_rotq_%s_%s' % (tag, axis)] = points[:, 13 + i]
 
-                data[self.LABEL + '_lin_vel_ref_' + tag] = \
-                    [e.vel[i] for e in self._recorded_data['desired'].points]
+                output[tag] = self.build_dataframe(data, add_group_name)
 
-                data[self.LABEL + '_ang_vel_ref_' + tag] = \
-                    [e.vel[i + 3] for e in self._recorded_data['desired'].points]
-            
-            for i, tag in zip(range(3), ['roll', 'pitch', 'yaw']):
-                data[self.LABEL + '_rot_ref_' + tag] = \
-                    [e.rot[i] for e in self._recorded_data['desired'].points]            
-            
-            for i, tag in zip(range(4), ['x', 'y', 'z', 'w']):
-                data[self.LABEL + '_rotq_ref_' + tag] = \
-                    [e.rotq[i] for e in self._recorded_data['desired'].points]            
-            
-            if add_group_name is not None:
-                data['group'] = [add_group_name for _ in range(len(self._recorded_data['desired'].points))]
-
-            df_ref = pandas.DataFrame(data)
-
-            data = dict()
-
-            data[self.LABEL + '_actual_time'] = self._recorded_data['actual'].time
-            
-            for i, tag in zip(range(3), ['x', 'y', 'z']):                
-                data[self.LABEL + '_pos_actual_' + tag] = \
-                    [e.p[i] for e in self._recorded_data['actual'].points]
-                data[self.LABEL + '_lin_vel_actual_' + tag] = \
-                    [e.vel[i] for e in self._recorded_data['actual'].points]
-                data[self.LABEL + '_ang_vel_actual_' + tag] = \
-                    [e.vel[i + 3] for e in self._recorded_data['actual'].points]
-            
-            for i, tag in zip(range(3), ['roll', 'pitch', 'yaw']):
-                data[self.LABEL + '_rot_actual_' + tag] = \
-                    [e.rot[i] for e in self._recorded_data['actual'].points]
-            
-            for i, tag in zip(range(4), ['x', 'y', 'z', 'w']):
-                data[self.LABEL + '_rotq_actual_' + tag] = \
-                    [e.rotq[i] for e in self._recorded_data['actual'].points]
-            
-            if add_group_name is not None:
-                data['group'] = [add_group_name for _ in range(len(self._recorded_data['actual'].points))]
-
-            df_actual = pandas.DataFrame(data)
-
-            return dict(ref=df_ref, actual=df_actual)
+            return output
         except Exception as ex:
             print('Error while exporting as pandas.DataFrame, message=' + str(ex))
             return None
@@ -165,22 +141,30 @@ class TrajectoryData(SimulationData):
         if not os.path.isdir(output_dir):
             self._logger.error('Invalid output directory, dir=' + str(output_dir))
             raise Exception('Invalid output directory')
+        self.run_plot_jobs(output_dir)
 
+    def plot_paths(self, output_dir):
+        plt = get_pyplot()
         try:            
             fig = self.get_figure(n_rows=2)
             ax = fig.gca(projection='3d')
 
-            ax.plot([e.p[0] for e in self._recorded_data['desired'].points],
-                    [e.p[1] for e in self._recorded_data['desired'].points],
-                    [e.p[2] for e in self._recorded_data['desired'].points],
+            desired_path = self.decimate_path(
+                [e.p for e in self._recorded_data['desired'].points])
+            actual_path = self.decimate_path(
+                [e.p for e in self._recorded_data['actual'].points])
+
+            ax.plot(desired_path[:, 0],
+                    desired_path[:, 1],
+                    desired_path[:, 2],
                     color=COLOR_BLUE, 
                     linestyle='dashed',
                     label='Reference path',
                     linewidth=self._plot_configs['linewidth'])
 
-            ax.plot([e.p[0] for e in self._recorded_data['actual'].points],
-                    [e.p[1] for e in self._recorded_data['actual'].points],
-                    [e.p[2] for e in self._recorded_data['actual'].points],
+            ax.plot(actual_path[:, 0],
+                    actual_path[:, 1],
+                    actual_path[:, 2],
                     color=COLOR_GREEN, 
                     label='Actual path',
                     linewidth=self._plot_configs['linewidth'])
@@ -275,7 +259,9 @@ class TrajectoryData(SimulationData):
             self._logger.error('Error while plotting 3D path plot, message=' + str(e))
             plt.close(fig)
             del fig
-        
+
+    def plot_pose(self, output_dir):
+        plt = get_pyplot()
         try:
             output_path = (self._output_dir if output_dir is None else output_dir)
                         
@@ -298,40 +284,40 @@ class TrajectoryData(SimulationData):
 
         #     self.add_disturbance_activation_spans(ax, min_value, max_value)
 
-            ax.plot(self._recorded_data['desired'].time, 
-                    [e.pos[0] for e in self._recorded_data['desired'].points], 
-                    color=COLOR_RED,
-                    linestyle='dashed',
-                    linewidth=self._plot_configs['linewidth'],
-                    label=r'$X_d$')
-            ax.plot(self._recorded_data['desired'].time, 
-                    [e.pos[1] for e in self._recorded_data['desired'].points], 
-                    color=COLOR_GREEN,
-                    linestyle='dashed',
-                    linewidth=self._plot_configs['linewidth'],
-                    label=r'$Y_d$')
-            ax.plot(self._recorded_data['desired'].time, 
-                    [e.pos[2] for e in self._recorded_data['desired'].points], 
-                    color=COLOR_BLUE,
-                    linestyle='dashed',
-                    linewidth=self._plot_configs['linewidth'],
-                    label=r'$Z_d$')
-
-            ax.plot(self._recorded_data['actual'].time, 
-                    [e.pos[0] for e in self._recorded_data['actual'].points], 
-                    color=COLOR_RED,
-                    linewidth=self._plot_configs['linewidth'],
-                    label=r'$X$')
-            ax.plot(self._recorded_data['actual'].time, 
-                    [e.pos[1] for e in self._recorded_data['actual'].points], 
-                    color=COLOR_GREEN,
-                    linewidth=self._plot_configs['linewidth'],
-                    label=r'$Y$')
-            ax.plot(self._recorded_data['actual'].time, 
-                    [e.pos[2] for e in self._recorded_data['actual'].points], 
-                    color=COLOR_BLUE,
-                    linewidth=self._plot_configs['linewidth'],
-                    label=r'$Z$')
+            self.plot_series(ax, self._recorded_data['desired'].time, 
+                                 [e.pos[0] for e in self._recorded_data['desired'].points], 
+                                 color=COLOR_RED,
+                                 linestyle='dashed',
+                                 linewidth=self._plot_configs['linewidth'],
+                                 label=r'$X_d$')
+            self.plot_series(ax, self._recorded_data['desired'].time, 
+                                 [e.pos[1] for e in self._recorded_data['desired'].points], 
+                                 color=COLOR_GREEN,
+                                 linestyle='dashed',
+                                 linewidth=self._plot_configs['linewidth'],
+                                 label=r'$Y_d$')
+            self.plot_series(ax, self._recorded_data['desired'].time, 
+                                 [e.pos[2] for e in self._recorded_data['desired'].points], 
+                                 color=COLOR_BLUE,
+                                 linestyle='dashed',
+                                 linewidth=self._plot_configs['linewidth'],
+                                 label=r'$Z_d$')
+
+            self.plot_series(ax, self._recorded_data['actual'].time, 
+                                 [e.pos[0] for e in self._recorded_data['actual'].points], 
+                                 color=COLOR_RED,
+                                 linewidth=self._plot_configs['linewidth'],
+                                 label=r'$X$')
+            self.plot_series(ax, self._recorded_data['actual'].time, 
+                                 [e.pos[1] for e in self._recorded_data['actual'].points], 
+                                 color=COLOR_GREEN,
+                                 linewidth=self._plot_configs['linewidth'],
+                                 label=r'$Y$')
+            self.plot_series(ax, self._recorded_data['actual'].time, 
+                                 [e.pos[2] for e in self._recorded_data['actual'].points], 
+                                 color=COLOR_BLUE,
+                                 linewidth=self._plot_configs['linewidth'],
+                                 label=r'$Z$')
 
             ax.set_xlim(
                 np.min(self._recorded_data['desired'].time), 
@@ -369,40 +355,40 @@ class TrajectoryData(SimulationData):
 
         #     self.add_disturbance_activation_spans(ax, min_value, max_value)
             
-            ax.plot(self._recorded_data['desired'].time, 
-                    [e.rot[0] for e in self._recorded_data['desired'].points],                     
-                    color=COLOR_RED,
-                    linestyle='dashed',
-                    linewidth=self._plot_configs['linewidth'], 
-                    label=r'$\phi_d$')
-            ax.plot(self._recorded_data['desired'].time, 
-                    [e.rot[1] for e in self._recorded_data['desired'].points],                     
-                    color=COLOR_GREEN,
-                    linestyle='dashed',
-                    linewidth=self._plot_configs['linewidth'], 
-                    label=r'$\theta_d$')
-            ax.plot(self._recorded_data['desired'].time, 
-                    [e.rot[2] for e in self._recorded_data['desired'].points], 
-                    color=COLOR_BLUE,
-                    linestyle='dashed',
-                    linewidth=self._plot_configs['linewidth'], 
-                    label=r'$\psi_d$')
-
-            ax.plot(self._recorded_data['actual'].time, 
-                    [e.rot[0] for e in self._recorded_data['actual'].points], 
-                    color=COLOR_RED,
-                    linewidth=self._plot_configs['linewidth'], 
-                    label=r'$\phi$')
-            ax.plot(self._recorded_data['actual'].time, 
-                    [e.rot[1] for e in self._recorded_data['actual'].points], 
-                    color=COLOR_GREEN,
-                    linewidth=self._plot_configs['linewidth'], 
-                    label=r'$\theta$')
-            ax.plot(self._recorded_data['actual'].time, 
-                    [e.rot[2] for e in self._recorded_data['actual'].points], 
-                    color=COLOR_BLUE,
-                    linewidth=self._plot_configs['linewidth'], 
-                    label=r'$\psi$')
+            self.plot_series(ax, self._recorded_data['desired'].time, 
+                                 [e.rot[0] for e in self._recorded_data['desired'].points],                     
+                                 color=COLOR_RED,
+                                 linestyle='dashed',
+                                 linewidth=self._plot_configs['linewidth'], 
+                                 label=r'$\phi_d$')
+            self.plot_series(ax, self._recorded_data['desired'].time, 
+                                 [e.rot[1] for e in self._recorded_data['desired'].points],                     
+                                 color=COLOR_GREEN,
+                                 linestyle='dashed',
+                                 linewidth=self._plot_configs['linewidth'], 
+                                 label=r'$\theta_d$')
+            self.plot_series(ax, self._recorded_data['desired'].time, 
+                                 [e.rot[2] for e in self._recorded_data['desired'].points], 
+                                 color=COLOR_BLUE,
+                                 linestyle='dashed',
+                                 linewidth=self._plot_configs['linewidth'], 
+                                 label=r'$\psi_d$')
+
+            self.plot_series(ax, self._recorded_data['actual'].time, 
+                                 [e.rot[0] for e in self._recorded_data['actual'].points], 
+                                 color=COLOR_RED,
+                                 linewidth=self._plot_configs['linewidth'], 
+                                 label=r'$\phi$')
+            self.plot_series(ax, self._recorded_data['actual'].time, 
+                                 [e.rot[1] for e in self._recorded_data['actual'].points], 
+                                 color=COLOR_GREEN,
+                                 linewidth=self._plot_configs['linewidth'], 
+                                 label=r'$\theta$')
+            self.plot_series(ax, self._recorded_data['actual'].time, 
+                                 [e.rot[2] for e in self._recorded_data['actual'].points], 
+                                 color=COLOR_BLUE,
+                                 linewidth=self._plot_configs['linewidth'], 
+                                 label=r'$\psi$')
 
             ax.set_xlim(
                 np.min(self._recorded_data['desired'].time), 
@@ -425,47 +411,50 @@ class TrajectoryData(SimulationData):
             plt.close(fig)
             del fig
 
+    def plot_quaternion(self, output_dir):
+        plt = get_pyplot()
         try:
             ###################################################################
             # Plot quaternion trajectories
             ###################################################################            
+            output_path = (self._output_dir if output_dir is None else output_dir)
             fig = self.get_figure()        
             ax = fig.gca()
 
-            ax.plot(self._recorded_data['desired'].time, 
-                    [e.rotq[0] for e in self._recorded_data['desired'].points], 
-                    color=COLOR_RED,
-                    linestyle='dashed',
-                    linewidth=self._plot_configs['linewidth'],
-                    label=r'$\epsilon_{x_d}$')
-            ax.plot(self._recorded_data['desired'].time, 
-                    [e.rotq[1] for e in self._recorded_data['desired'].points], 
-                    color=COLOR_GREEN,
-                    linestyle='dashed',
-                    linewidth=self._plot_configs['linewidth'],
-                    label=r'$\epsilon_{y_d}$')
-            ax.plot(self._recorded_data['desired'].time, 
-                    [e.rotq[2] for e in self._recorded_data['desired'].points], 
-                    color=COLOR_BLUE,
-                    linestyle='dashed',
-                    linewidth=self._plot_configs['linewidth'],
-                    label=r'$\epsilon_{z_d}$')
-
-            ax.plot(self._recorded_data['actual'].time, 
-                    [e.rotq[0] for e in self._recorded_data['actual'].points], 
-                    color=COLOR_RED,
-                    linewidth=self._plot_configs['linewidth'],
-                    label=r'$\epsilon_{x}$')
-            ax.plot(self._recorded_data['actual'].time, 
-                    [e.rotq[1] for e in self._recorded_data['actual'].points], 
-                    color=COLOR_GREEN,
-                    linewidth=self._plot_configs['linewidth'],
-                    label=r'$\epsilon_{y}$')
-            ax.plot(self._recorded_data['actual'].time, 
-                    [e.rotq[2] for e in self._recorded_data['actual'].points], 
-                    color=COLOR_BLUE,
-                    linewidth=self._plot_configs['linewidth'],
-                    label=r'$\epsilon_{z}$')
+            self.plot_series(ax, self._recorded_data['desired'].time, 
+                                 [e.rotq[0] for e in self._recorded_data['desired'].points], 
+                                 color=COLOR_RED,
+                                 linestyle='dashed',
+                                 linewidth=self._plot_configs['linewidth'],
+                                 label=r'$\epsilon_{x_d}$')
+            self.plot_series(ax, self._recorded_data['desired'].time, 
+                                 [e.rotq[1] for e in self._recorded_data['desired'].points], 
+                                 color=COLOR_GREEN,
+                                 linestyle='dashed',
+                                 linewidth=self._plot_configs['linewidth'],
+                                 label=r'$\epsilon_{y_d}$')
+            self.plot_series(ax, self._recorded_data['desired'].time, 
+                                 [e.rotq[2] for e in self._recorded_data['desired'].points], 
+                                 color=COLOR_BLUE,
+                                 linestyle='dashed',
+                                 linewidth=self._plot_configs['linewidth'],
+                                 label=r'$\epsilon_{z_d}$')
+
+            self.plot_series(ax, self._recorded_data['actual'].time, 
+                                 [e.rotq[0] for e in self._recorded_data['actual'].points], 
+                                 color=COLOR_RED,
+                                 linewidth=self._plot_configs['linewidth'],
+                                 label=r'$\epsilon_{x}$')
+            self.plot_series(ax, self._recorded_data['actual'].time, 
+                                 [e.rotq[1] for e in self._recorded_data['actual'].points], 
+                                 color=COLOR_GREEN,
+                                 linewidth=self._plot_configs['linewidth'],
+                                 label=r'$\epsilon_{y}$')
+            self.plot_series(ax, self._recorded_data['actual'].time, 
+                                 [e.rotq[2] for e in self._recorded_data['actual'].points], 
+                                 color=COLOR_BLUE,
+                                 linewidth=self._plot_configs['linewidth'],
+                                 label=r'$\epsilon_{z}$')
 
             min_value = np.min([np.min([e.rotq[0] for e in self._recorded_data['actual'].points]),
                                 np.min([e.rotq[0] for e in self._recorded_data['desired'].points]),
@@ -500,47 +489,50 @@ class TrajectoryData(SimulationData):
             plt.close(fig)
             del fig
 
+    def plot_velocities(self, output_dir):
+        plt = get_pyplot()
         try:
             ###################################################################
             # Plot velocities
             ###################################################################    
+            output_path = (self._output_dir if output_dir is None else output_dir)
 
             fig = self.get_figure()        
             ax = fig.gca()
-            ax.plot(self._recorded_data['desired'].time, 
-                    [e.vel[0] for e in self._recorded_data['desired'].points],                     
-                    color=COLOR_RED,
-                    linestyle='dashed',
-                    linewidth=self._plot_configs['linewidth'], 
-                    label=r'$\dot{X}_d$')
-            ax.plot(self._recorded_data['desired'].time, 
-                    [e.vel[1] for e in self._recorded_data['desired'].points], 
-                    color=COLOR_GREEN,
-                    linestyle='dashed',
-                    linewidth=self._plot_configs['linewidth'], 
-                    label=r'$\dot{Y}_d$')
-            ax.plot(self._recorded_data['desired'].time, 
-                    [e.vel[2] for e in self._recorded_data['desired'].points], 
-                    color=COLOR_BLUE,
-                    linestyle='dashed',
-                    linewidth=self._plot_configs['linewidth'], 
-                    label=r'$\dot{Z}_d$')
-
-            ax.plot(self._recorded_data['actual'].time, 
-                    [e.vel[0] for e in self._recorded_data['actual'].points], 
-                    color=COLOR_RED,
-                    linewidth=self._plot_configs['linewidth'], 
-                    label=r'$\dot{X}$')
-            ax.plot(self._recorded_data['actual'].time, 
-                    [e.vel[1] for e in self._recorded_data['actual'].points], 
-                    color=COLOR_GREEN,
-                    linewidth=self._plot_configs['linewidth'], 
-                    label=r'$\dot{Y}$')
-            ax.plot(self._recorded_data['actual'].time, 
-                    [e.vel[2] for e in self._recorded_data['actual'].points], 
-                    color=COLOR_BLUE,
-                    linewidth=self._plot_configs['linewidth'], 
-                    label=r'$\dot{Z}$')
+            self.plot_series(ax, self._recorded_data['desired'].time, 
+                                 [e.vel[0] for e in self._recorded_data['desired'].points],                     
+                                 color=COLOR_RED,
+                                 linestyle='dashed',
+                                 linewidth=self._plot_configs['linewidth'], 
+                                 label=r'$\dot{X}_d$')
+            self.plot_series(ax, self._recorded_data['desired'].time, 
+                                 [e.vel[1] for e in self._recorded_data['desired'].points], 
+                                 color=COLOR_GREEN,
+                                 linestyle='dashed',
+                                 linewidth=self._plot_configs['linewidth'], 
+                                 label=r'$\dot{Y}_d$')
+            self.plot_series(ax, self._recorded_data['desired'].time, 
+                                 [e.vel[2] for e in self._recorded_data['desired'].points], 
+                                 color=COLOR_BLUE,
+                                 linestyle='dashed',
+                                 linewidth=self._plot_configs['linewidth'], 
+                                 label=r'$\dot{Z}_d$')
+
+            self.plot_series(ax, self._recorded_data['actual'].time, 
+                                 [e.vel[0] for e in self._recorded_data['actual'].points], 
+                                 color=COLOR_RED,
+                                 linewidth=self._plot_configs['linewidth'], 
+                                 label=r'$\dot{X}$')
+            self.plot_series(ax, self._recorded_data['actual'].time, 
+                                 [e.vel[1] for e in self._recorded_data['actual'].points], 
+                                 color=COLOR_GREEN,
+                                 linewidth=self._plot_configs['linewidth'], 
+                                 label=r'$\dot{Y}$')
+            self.plot_series(ax, self._recorded_data['actual'].time, 
+                                 [e.vel[2] for e in self._recorded_data['actual'].points], 
+                                 color=COLOR_BLUE,
+                                 linewidth=self._plot_configs['linewidth'], 
+                                 label=r'$\dot{Z}$')
 
             ax.set_xlim(
                 np.min(self._recorded_data['desired'].time), 
@@ -561,40 +553,40 @@ class TrajectoryData(SimulationData):
             fig = self.get_figure()        
             ax = fig.gca()
             
-            ax.plot(self._recorded_data['desired'].time, 
-                    [e.vel[3] for e in self._recorded_data['desired'].points],                     
-                    color=COLOR_RED,
-                    linestyle='dashed',
-                    linewidth=self._plot_configs['linewidth'], 
-                    label=r'$\omega_{x_d}$')
-            ax.plot(self._recorded_data['desired'].time, 
-                    [e.vel[4] for e in self._recorded_data['desired'].points], 
-                    color=COLOR_GREEN,
-                    linestyle='dashed',
-                    linewidth=self._plot_configs['linewidth'], 
-                    label=r'$\omega_{y_d}$')
-            ax.plot(self._recorded_data['desired'].time, 
-                    [e.vel[5] for e in self._recorded_data['desired'].points], 
-                    color=COLOR_BLUE,
-                    linestyle='dashed',
-                    linewidth=self._plot_configs['linewidth'], 
-                    label=r'$\omega_{z_d}$')
-
-            ax.plot(self._recorded_data['actual'].time, 
-                    [e.vel[3] for e in self._recorded_data['actual'].points], 
-                    color=COLOR_RED,
-                    linewidth=self._plot_configs['linewidth'], 
-                    label=r'$\omega_x$')
-            ax.plot(self._recorded_data['actual'].time, 
-                    [e.vel[4] for e in self._recorded_data['actual'].points], 
-                    color=COLOR_GREEN,
-                    linewidth=self._plot_configs['linewidth'], 
-                    label=r'$\omega_y$')
-            ax.plot(self._recorded_data['actual'].time, 
-                    [e.vel[5] for e in self._recorded_data['actual'].points], 
-                    color=COLOR_BLUE,
-                    linewidth=self._plot_configs['linewidth'], 
-                    label=r'$\omega_z$')
+            self.plot_series(ax, self._recorded_data['desired'].time, 
+                                 [e.vel[3] for e in self._recorded_data['desired'].points],                     
+                                 color=COLOR_RED,
+                                 linestyle='dashed',
+                                 linewidth=self._plot_configs['linewidth'], 
+                                 label=r'$\omega_{x_d}$')
+            self.plot_series(ax, self._recorded_data['desired'].time, 
+                                 [e.vel[4] for e in self._recorded_data['desired'].points], 
+                                 color=COLOR_GREEN,
+                                 linestyle='dashed',
+                                 linewidth=self._plot_configs['linewidth'], 
+                                 label=r'$\omega_{y_d}$')
+            self.plot_series(ax, self._recorded_data['desired'].time, 
+                                 [e.vel[5] for e in self._recorded_data['desired'].points], 
+                                 color=COLOR_BLUE,
+                                 linestyle='dashed',
+                                 linewidth=self._plot_configs['linewidth'], 
+                                 label=r'$\omega_{z_d}$')
+
+            self.plot_series(ax, self._recorded_data['actual'].time, 
+                                 [e.vel[3] for e in self._recorded_data['actual'].points], 
+                                 color=COLOR_RED,
+                                 linewidth=self._plot_configs['linewidth'], 
+                                 label=r'$\omega_x$')
+            self.plot_series(ax, self._recorded_data['actual'].time, 
+                                 [e.vel[4] for e in self._recorded_data['actual'].points], 
+                                 color=COLOR_GREEN,
+                                 linewidth=self._plot_configs['linewidth'], 
+                                 label=r'$\omega_y$')
+            self.plot_series(ax, self._recorded_data['actual'].time, 
+                                 [e.vel[5] for e in self._recorded_data['actual'].points], 
+                                 color=COLOR_BLUE,
+                                 linewidth=self._plot_configs['linewidth'], 
+                                 label=r'$\omega_z$')
             
             ax.set_xlim(
                 np.min(self._recorded_data['desired'].time), 
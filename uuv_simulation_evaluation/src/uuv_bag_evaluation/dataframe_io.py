@@ -0,0 +1,164 @@
+# Copyright (c) 2016 The UUV Simulator Authors.
+# All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Storage of the parsers' data frames in columnar formats.
+
+* `npz`: compressed numpy archive with one array per column
+* `npy`: directory with one `.npy` file per column, can be loaded with
+  memory mapping
+* `feather` and `parquet`: Apache Arrow formats, require `pyarrow`
+* `yaml`: dictionary dump of the data frame, kept for compatibility
+
+The `npz` and `npy` formats store the column names and data types in a
+schema, so that the data frame is restored with the same column order and
+data types.
+"""
+import os
+import glob
+import numpy as np
+import yaml
+
+DATAFRAME_FORMATS = ['npz', 'npy', 'feather', 'parquet', 'yaml']
+
+# Extension of the files (or directories) for each format
+DATAFRAME_EXTENSIONS = dict(npz='.npz',
+                            npy='.npy.d',
+                            feather='.feather',
+                            parquet='.parquet',
+                            yaml='.yaml')
+
+SCHEMA_FILENAME = 'schema.yaml'
+
+
+def get_format(filename):
+    for file_format in DATAFRAME_FORMATS:
+        if filename.endswith(DATAFRAME_EXTENSIONS[file_format]):
+            return file_format
+    return None
+
+
+def get_schema(df):
+    return dict(columns=[str(c) for c in df.columns],
+                dtypes=[str(df[c].dtype) for c in df.columns])
+
+
+def _get_column_array(df, column):
+    values = df[column].values
+    if values.dtype == object:
+        # Strings, e.g. the group names, stored as fixed width unicode
+        values = values.astype('U')
+    return values
+
+
+def _get_dataframe(schema, columns_data, columns=None):
+    import pandas
+    names = schema['columns'] if columns is None else \
+        [c for c in schema['columns'] if c in columns]
+    dtypes = dict(zip(schema['columns'], schema['dtypes']))
+    data = dict()
+    for name in names:
+        values = columns_data[name]
+        if dtypes[name] == 'object':
+            values = values.astype(object)
+        data[name] = values
+    return pandas.DataFrame(data, columns=names)
+
+
+def save_dataframe(df, filename, file_format='npz'):
+    """Store the data frame in `filename`, the extension of the format is
+    appended to the filename. Returns the name of the file created.
+    """
+    if file_format not in DATAFRAME_FORMATS:
+        raise ValueError('Invalid data frame format, options=%s' % str(DATAFRAME_FORMATS))
+    filename += DATAFRAME_EXTENSIONS[file_format]
+    if file_format == 'npz':
+        data = dict()
+        for i, column in enumerate(df.columns):
+            # Column names are not always valid archive keys
+            data['c%d' % i] = _get_column_array(df, column)
+        data['schema'] = np.array(yaml.safe_dump(get_schema(df)))
+        np.savez_compressed(filename, **data)
+    elif file_format == 'npy':
+        if not os.path.isdir(filename):
+            os.makedirs(filename)
+        for i, column in enumerate(df.columns):
+            np.save(os.path.join(filename, 'c%d.npy' % i),
+                    _get_column_array(df, column))
+        with open(os.path.join(filename, SCHEMA_FILENAME), 'w') as schema_file:
+            yaml.safe_dump(get_schema(df), schema_file, default_flow_style=False)
+    elif file_format == 'feather':
+        df.reset_index(drop=True).to_feather(filename)
+    elif file_format == 'parquet':
+        df.to_parquet(filename)
+    else:
+        with open(filename, 'w') as data_file:
+            yaml.dump(df.to_dict(), data_file, default_flow_style=False)
+    return filename
+
+
+def load_dataframe(filename, columns=None, mmap=False):
+    """Load a data frame stored with `save_dataframe`. If `columns` is
+    given, only these columns are read. With `mmap` set, the columns of
+    the `npy` and `feather` formats are memory mapped.
+    """
+    import pandas
+    file_format = get_format(filename)
+    if file_format is None:
+        raise ValueError('Unknown data frame format, filename=%s' % filename)
+
+    if file_format == 'npz':
+        with np.load(filename) as data:
+            schema = yaml.safe_load(str(data['schema']))
+            names = schema['columns'] if columns is None else columns
+            columns_data = dict()
+            for i, name in enumerate(schema['columns']):
+                if name in names:
+                    columns_data[name] = data['c%d' % i]
+        return _get_dataframe(schema, columns_data, columns)
+    elif file_format == 'npy':
+        with open(os.path.join(filename, SCHEMA_FILENAME), 'r') as schema_file:
+            schema = yaml.safe_load(schema_file)
+        names = schema['columns'] if columns is None else columns
+        columns_data = dict()
+        for i, name in enumerate(schema['columns']):
+            if name in names:
+                columns_data[name] = np.load(
+                    os.path.join(filename, 'c%d.npy' % i),
+                    mmap_mode='r' if mmap else None)
+        return _get_dataframe(schema, columns_data, columns)
+    elif file_format == 'feather':
+        import pyarrow.feather
+        return pyarrow.feather.read_table(
+            filename, columns=columns, memory_map=mmap).to_pandas()
+    elif file_format == 'parquet':
+        return pandas.read_parquet(filename, columns=columns)
+    else:
+        with open(filename, 'r') as data_file:
+            df = pandas.DataFrame(yaml.load(data_file))
+        return df if columns is None else df[columns]
+
+
+def load_dataframes(data_dir, mmap=False):
+    """Load all data frames stored in a directory, returns a dictionary
+    with the file names, without extension, as keys.
+    """
+    output = dict()
+    for filename in sorted(glob.glob(os.path.join(data_dir, '*'))):
+        file_format = get_format(filename)
+        if file_format is None:
+            continue
+        tag = os.path.basename(filename)[:-len(DATAFRAME_EXTENSIONS[file_format])]
+        output[tag] = load_dataframe(filename, mmap=mmap)
+    return output
@@ -88,7 +88,10 @@ class ErrorSet(object):
             'yaw',
             'quaternion']
 
-    def __init__(self):
+    def __init__(self, context=None):
+        # The recording is taken from the evaluation context, if given,
+        # otherwise the last recording created is used
+        self._context = context
         self._bag = None
         self._errors = list()
         self.compute_errors()
@@ -101,7 +104,10 @@ class ErrorSet(object):
         return cls.__instance
 
     def compute_errors(self):
-        self._bag = Recording.get_instance()
+        if self._context is not None:
+            self._bag = self._context.recording
+        else:
+            self._bag = Recording.get_instance()
         assert self._bag is not None, 'Recording has not been created'
         # assert self._bag.is_init, 'Topics have not been sorted from the rosbag'
 
@@ -20,20 +20,51 @@ import yaml
 import tf.transformations as trans
 from copy import deepcopy
 from .recording import Recording
+from .time_window import get_time_window
 from .error import ErrorSet
+from .context import EvaluationContext
 from .metrics import KPI
-import matplotlib.pyplot as plt
 import logging
-from mpl_toolkits.mplot3d import Axes3D
+import time
+import multiprocessing
+from .profiling import StageProfiler
+from .dataframe_io import save_dataframe, DATAFRAME_FORMATS
+
+# Parsers of each evaluation available to the plotting processes, by
+# evaluation ID. The processes are forked after the entry is set and
+# therefore do not need to receive the parsed data
+_PLOT_PARSERS = dict()
+
+
+def _run_plot(parsers, tag, name, output_dir):
+    start_time = time.time()
+    error = None
+    try:
+        getattr(parsers[tag], name)(output_dir)
+    except Exception as e:
+        error = str(e)
+    return tag, name, time.time() - start_time, error
+
+
+def _run_plot_job(job):
+    evaluation_id, tag, name, output_dir = job
+    return _run_plot(_PLOT_PARSERS[evaluation_id], tag, name, output_dir)
+
+
+def _get_fork_pool(num_processes):
+    try:
+        context = multiprocessing.get_context('fork')
+    except AttributeError:
+        # Python 2, child processes are always forked
+        context = multiprocessing
+    return context.Pool(processes=num_processes)
 
-try:
-    plt.rc('text', usetex=True)
-    plt.rc('font', family='sans-serif')
-except Exception as e:
-    print('Cannot use Latex configuration with matplotlib, message=' + str(e))
 
 class Evaluation(object):
-    def __init__(self, filename, output_dir='.', time_offset=0.0):
+    def __init__(self, filename, output_dir='.', time_offset=0.0,
+                 full_profile=False, store_profile=False,
+                 num_decompression_processes=None, end_time=None,
+                 time_margin=1.0):
         # Setting up the log
         self._logger = logging.getLogger('run_evaluation')
         if len(self._logger.handlers) == 0:
@@ -43,23 +74,11 @@ class Evaluation(object):
             self._logger.addHandler(out_hdlr)
             self._logger.setLevel(logging.INFO)
 
-        self._logger.info('Opening bag: %s' % filename)
-        self.recording = Recording(filename)
-        
-        self.recording.init_parsers()
-
-        # Create error set object
-        self._error_set = ErrorSet.get_instance()
-        if self._error_set is None:
-            self._logger.error('Error set has not been correctly initialized')
-            raise Exception('Error set has not been correctly initialized')
-
-        self._error_set.compute_errors()        
-
-        # Assigning the output directory for the results
-        if not os.path.isdir(output_dir):
-            self._logger.error('Invalid output directory, dir=%s' % str(output_dir) )
-            raise Exception('Invalid output directory')
+        # Timers for each evaluation stage, if full_profile is set each stage
+        # is also run with cProfile and tracemalloc
+        self._profiler = StageProfiler(full_profile)
+        # Flag to store the profile with the computed KPIs
+        self._store_profile = store_profile
 
         # Simulation time offset to start the computation of each KPI
         if time_offset >= 0.0:
@@ -70,24 +89,73 @@ class Evaluation(object):
 
         self._logger.info('Time offset for KPI evaluation [s]=' + str(self._time_offset))
 
+        # The evaluation window, extended by the time margin, is used to
+        # skip the messages outside of it while reading the bag
+        window_start, window_end = get_time_window(self._time_offset, end_time,
+                                                   time_margin)
+
+        self._logger.info('Opening bag: %s' % filename)
+        with self._profiler.stage('open_bag'):
+            self.recording = Recording(filename, num_decompression_processes,
+                                       window_start, window_end)
+
+        # Recording and error set of this evaluation, passed explicitly to
+        # the parsers, error set and KPIs
+        self._context = EvaluationContext(self.recording)
+
+        with self._profiler.stage('init_parsers') as profile:
+            profile['parsers'] = dict()
+            self.recording.init_parsers(profile['parsers'], self._context)
+
+        # Create error set object
+        with self._profiler.stage('compute_errors') as profile:
+            self._error_set = ErrorSet(self._context)
+            profile['n_errors'] = len(self._error_set.errors)
+        self._context.error_set = self._error_set
+
+        # Assigning the output directory for the results
+        if not os.path.isdir(output_dir):
+            self._logger.error('Invalid output directory, dir=%s' % str(output_dir) )
+            raise Exception('Invalid output directory')
+
         self._output_dir = output_dir
         # Table of configuration parameters (set per default all KPIs)
         self._kpis = list()
-        for kpi in KPI.get_all_kpi_tags():
-            if KPI.get_kpi_target(kpi) == 'error':
-                for error_tag in self._error_set.get_tags():
-                    self._kpis.append(dict(func=KPI.get_kpi(kpi, error_tag),
+        with self._profiler.stage('build_kpis') as profile:
+            profile['kpis'] = dict()
+            for kpi in KPI.get_all_kpi_tags():
+                if KPI.get_kpi_target(kpi) == 'error':
+                    for error_tag in self._error_set.get_tags():
+                        start_time = time.time()
+                        self._kpis.append(dict(func=KPI.get_kpi(kpi, error_tag,
+                                                                time_offset=self._time_offset,
+                                                                context=self._context),
+                                               value=0.0))
+                        profile['kpis'][self._kpis[-1]['func'].full_tag] = \
+                            time.time() - start_time
+                else:
+                    start_time = time.time()
+                    self._kpis.append(dict(func=KPI.get_kpi(kpi, time_offset=self._time_offset,
+                                                       context=self._context),
                                            value=0.0))
-            else:
-                self._kpis.append(dict(func=KPI.get_kpi(kpi),
-                                       value=0.0))
+                    profile['kpis'][self._kpis[-1]['func'].full_tag] = \
+                        time.time() - start_time
 
         self._cost_fcn_terms = dict()
 
+        # Process pool rendering the figures, if save_evaluation is not
+        # waiting for the plots to be finished
+        self._plot_pool = None
+        self._plot_results = None
+
         # Calculating the KPIs for this bag
         self.compute_kpis()
 
     def __del__(self):
+      try:
+        self.wait_plots()
+      except Exception:
+        pass
       if self.recording is not None:
         del self.recording
 
@@ -95,6 +163,30 @@ class Evaluation(object):
     def error_set(self):
         return self._error_set
 
+    @property
+    def context(self):
+        return self._context
+
+    def get_profile(self):
+        return self._profiler.to_dict()
+
+    def save_profile(self, output_dir=None):
+        output_path = (self._output_dir if output_dir is None else output_dir)
+        filename = os.path.join(output_path, 'evaluation_profile.yaml')
+        try:
+            with open(filename, 'w') as profile_file:
+                yaml.safe_dump(self.get_profile(), profile_file,
+                               default_flow_style=False)
+            self._logger.info('Evaluation profile stored in <%s>' % filename)
+        except Exception as e:
+            self._logger.error('Error storing evaluation profile, message=' + str(e))
+
+    def set_plot_decimation(self, method='minmax', max_points=2000):
+        # Decimation of the time series in the figures, set method to None
+        # to plot all samples
+        for tag in self.recording.parsers:
+            self.recording.parsers[tag].set_decimation(method, max_points)
+
     def calc_cost_fcn(self):
         cost = 0.0
         for tag in self._cost_fcn_terms:
@@ -165,11 +257,15 @@ class Evaluation(object):
             else:
                 self._logger.info('KPI created=' + item['func'])
                 if 'args' in item:
-                    self._kpis.append(dict(func=KPI.get_kpi(item['func'], item['args']),
+                    self._kpis.append(dict(func=KPI.get_kpi(item['func'], item['args'],
+                                                            time_offset=self._time_offset,
+                                                            context=self._context),
                                            value=0.0))
                     self._logger.info('\tArguments: ' + str(item['args']))
                 else:
-                    self._kpis.append(dict(func=KPI.get_kpi(item['func']),
+                    self._kpis.append(dict(func=KPI.get_kpi(item['func'],
+                                                            time_offset=self._time_offset,
+                                                            context=self._context),
                                            value=0.0))
 
     def get_kpis(self):
@@ -189,12 +285,16 @@ class Evaluation(object):
         return None
 
     def compute_kpis(self):
-        if len(self._kpis):
+        with self._profiler.stage('compute_kpis') as profile:
+            profile['kpis'] = dict()
             for i in range(len(self._kpis)):
+                start_time = time.time()
                 try:
                     self._kpis[i]['value'] = self._kpis[i]['func'].compute()
                 except Exception as e:
                     self._logger.error('Error calculating KPI %s, message=%s' % (self._kpis[i]['func'].full_tag, str(e)))
+                profile['kpis'][self._kpis[i]['func'].full_tag] = \
+                    time.time() - start_time
 
     def print_kpis(self):
         for item in self._kpis:
@@ -206,69 +306,151 @@ class Evaluation(object):
     def export_to_txt(self, tag, output_dir):
         pass
 
-    def save_dataframes(self, output_dir=None):
+    def save_dataframes(self, output_dir=None, file_format='npz'):
         if output_dir is not None:
             if not os.path.isdir(output_dir):
                 self._logger.error('Invalid output directory, dir=' + str(output_dir))
                 raise Exception('Invalid output directory')
+        if file_format not in DATAFRAME_FORMATS:
+            self._logger.error('Invalid data frame format, options=' + str(DATAFRAME_FORMATS))
+            raise Exception('Invalid data frame format')
         output_path = (self._output_dir if output_dir is None else output_dir)
-        try:        
-            for tag in self.recording.parsers:
-                self._logger.info('Reading data frame for ' + tag)
-                df = self.recording.parsers[tag].get_as_dataframe()
+        with self._profiler.stage('save_dataframes') as profile:
+            profile['dataframes'] = dict()
+            profile['format'] = file_format
+            try:
+                for tag in self.recording.parsers:
+                    start_time = time.time()
+                    self._logger.info('Reading data frame for ' + tag)
+                    df = self.recording.parsers[tag].get_as_dataframe()
 
-                if df is None:
-                    continue
+                    if df is None:
+                        continue
                 
-                if not os.path.isdir(os.path.join(output_path, 'data')):
-                    os.makedirs(os.path.join(output_path, 'data'))
-
-                if isinstance(df, dict):
-                    for k in df:
-                        with open(os.path.join(output_path, 'data', '%s_%s.yaml' % (tag, k)), 'w') as data_file:
-                            yaml.dump(df[k].to_dict(), data_file, default_flow_style=False)        
-                else:
-                    with open(os.path.join(output_path, 'data', '%s.yaml' % tag), 'w') as data_file:
-                        yaml.dump(df.to_dict(), data_file, default_flow_style=False)
-                self._logger.info('Data frame <%s> stored=%s' % (tag, os.path.join(output_path, 'data', '%s.yaml' % tag)))
-        except Exception as e:
-            self._logger.error('Error storing dataframes file, message=' + str(e))
-
-    def save_evaluation(self, output_dir=None):
+                    if not os.path.isdir(os.path.join(output_path, 'data')):
+                        os.makedirs(os.path.join(output_path, 'data'))
+
+                    if isinstance(df, dict):
+                        for k in df:
+                            filename = save_dataframe(
+                                df[k],
+                                os.path.join(output_path, 'data', '%s_%s' % (tag, k)),
+                                file_format)
+                            self._logger.info('Data frame <%s_%s> stored=%s' % (tag, k, filename))
+                    else:
+                        filename = save_dataframe(
+                            df, os.path.join(output_path, 'data', tag), file_format)
+                        self._logger.info('Data frame <%s> stored=%s' % (tag, filename))
+                    profile['dataframes'][tag] = time.time() - start_time
+            except Exception as e:
+                self._logger.error('Error storing dataframes file, message=' + str(e))
+
+    def save_evaluation(self, output_dir=None, max_num_processes=None, wait=True):
+        """Store the KPIs and the figures of the evaluation. If `wait` is
+        False, the figures are rendered in the background (see
+        `wait_plots`) and the stored profile does not include the plot
+        timings.
+        """
         if output_dir is not None:
             if not os.path.isdir(output_dir):
                 self._logger.error('Invalid output directory, dir=' + str(output_dir))
                 raise Exception('Invalid output directory')
-        self.save_kpis(output_dir)
+        # Wait for the figures of a previous call
+        self.wait_plots()
 
-        for tag in self.recording.parsers:
-            self.recording.parsers[tag].plot(self._output_dir)
+        output_path = (self._output_dir if output_dir is None else output_dir)
+
+        with self._profiler.stage('save_evaluation') as profile:
+            self._save_kpis(output_dir)
+
+            # One job per figure
+            jobs = list()
+            for tag in self.recording.parsers:
+                for name in self.recording.parsers[tag].get_plot_jobs():
+                    jobs.append((id(self), tag, name, output_path))
+
+            if max_num_processes is None:
+                max_num_processes = multiprocessing.cpu_count()
+            num_processes = max(1, min(max_num_processes, len(jobs)))
+
+            profile['plots'] = dict()
+            # Daemonic processes, e.g. the workers of the simulation pool,
+            # are not allowed to create child processes
+            if num_processes == 1 or multiprocessing.current_process().daemon:
+                profile['num_processes'] = 1
+                for _, tag, name, _ in jobs:
+                    self._add_plot_result(_run_plot(self.recording.parsers, tag,
+                                                    name, output_path))
+            else:
+                profile['num_processes'] = num_processes
+                self._logger.info('Rendering %d figures, # processes=%d' % (len(jobs), num_processes))
+                # Removed once the pool is joined in wait_plots
+                _PLOT_PARSERS[id(self)] = self.recording.parsers
+                self._plot_pool = _get_fork_pool(num_processes)
+                self._plot_results = self._plot_pool.map_async(_run_plot_job, jobs)
+                self._plot_pool.close()
+
+        if wait:
+            self.wait_plots()
         self._logger.info('Evaluation stored!')
 
+        # Stored once, after the figures are rendered if waiting for them
+        if self._store_profile:
+            self.save_profile(output_dir)
+
+    def wait_plots(self):
+        if self._plot_pool is None:
+            return
+        try:
+            with self._profiler.stage('wait_plots'):
+                results = self._plot_results.get()
+                self._plot_pool.join()
+        finally:
+            _PLOT_PARSERS.pop(id(self), None)
+            self._plot_pool = None
+            self._plot_results = None
+        for result in results:
+            self._add_plot_result(result)
+        self._logger.info('Figures stored')
+
+    def _add_plot_result(self, result):
+        tag, name, elapsed_time, error = result
+        if error is not None:
+            self._logger.error('Error plotting %s.%s, message=%s' % (tag, name, error))
+        profile = self._profiler.get_stage('save_evaluation')
+        if profile is not None:
+            profile['plots']['%s.%s' % (tag, name)] = elapsed_time
+
     def save_kpis(self, output_dir=None):
+        self._save_kpis(output_dir)
+        if self._store_profile:
+            self.save_profile(output_dir)
+
+    def _save_kpis(self, output_dir=None):
         if output_dir is not None:
             if not os.path.isdir(output_dir):
                 self._logger.error('Invalid output directory, dir=' + str(output_dir))
                 raise Exception('Invalid output directory')
-        try:
-            output_path = (self._output_dir if output_dir is None else output_dir)
-
-            kpis = dict()
-            kpi_labels = dict()
-            for kpi in self._kpis:
-                item = kpi['func']
-                try:
-                    value = float(item.kpi_value)
-                except Exception as e:
-                    value = 0.0
-                kpis[item.full_tag] = value
-                kpi_labels[item.full_tag] = kpi['func'].label
-            with open(os.path.join(output_path, 'computed_kpis.yaml'), 'w') as kpi_file:
-                yaml.dump(kpis, kpi_file, default_flow_style=False)
-            self._logger.info('Calculated KPIs stored in <%s>' % os.path.join(output_path, 'computed_kpis.yaml'))
-
-            with open(os.path.join(output_path, 'kpi_labels.yaml'), 'w') as kpi_file:
-                yaml.dump(kpi_labels, kpi_file, default_flow_style=False)
-            self._logger.info('KPI labels stored in <%s>' % os.path.join(output_path, 'kpi_labels.yaml'))
-        except Exception as e:
-            self._logger.error('Error storing KPIs file, message=' + str(e))
+        with self._profiler.stage('save_kpis'):
+            try:
+                output_path = (self._output_dir if output_dir is None else output_dir)
+
+                kpis = dict()
+                kpi_labels = dict()
+                for kpi in self._kpis:
+                    item = kpi['func']
+                    try:
+                        value = float(item.kpi_value)
+                    except Exception as e:
+                        value = 0.0
+                    kpis[item.full_tag] = value
+                    kpi_labels[item.full_tag] = kpi['func'].label
+                with open(os.path.join(output_path, 'computed_kpis.yaml'), 'w') as kpi_file:
+                    yaml.dump(kpis, kpi_file, default_flow_style=False)
+                self._logger.info('Calculated KPIs stored in <%s>' % os.path.join(output_path, 'computed_kpis.yaml'))
+
+                with open(os.path.join(output_path, 'kpi_labels.yaml'), 'w') as kpi_file:
+                    yaml.dump(kpi_labels, kpi_file, default_flow_style=False)
+                self._logger.info('KPI labels stored in <%s>' % os.path.join(output_path, 'kpi_labels.yaml'))
+            except Exception as e:
+                self._logger.error('Error storing KPIs file, message=' + str(e))
@@ -23,7 +23,7 @@ class KPI(object):
     UNIT = ''
     TARGET = ''
 
-    def __init__(self, use_bag=True, time_offset=0.0):
+    def __init__(self, use_bag=True, time_offset=0.0, context=None):
         assert time_offset >= 0.0, 'Time offset cannot be negative'
         self._input_values = dict()
 
@@ -32,9 +32,13 @@ class KPI(object):
         self._time_offset = time_offset
 
         if use_bag:
-            self._bag = Recording.get_instance()
+            if context is not None:
+                self._bag = context.recording
+                self._error_set = context.error_set
+            else:
+                self._bag = Recording.get_instance()
+                self._error_set = ErrorSet.get_instance()
             assert self._bag is not None, 'No recording found, data has not been parsed'
-            self._error_set = ErrorSet.get_instance()
             assert self._error_set is not None, 'Error set has not been initialized'
 
         self._kpi_value = None
@@ -90,11 +94,11 @@ class KPI(object):
         return KPI.__subclasses__()
 
     @staticmethod
-    def get_kpi(tag, *args):
+    def get_kpi(tag, *args, **kwargs):
         assert tag in KPI.get_all_kpi_tags(), 'Invalid KPI tag, value=' + str(tag)
         for kpi in KPI.get_all_kpis():
             if kpi.TAG == tag:
-                return kpi(*args)
+                return kpi(*args, **kwargs)
         return None
 
     @staticmethod
@@ -23,25 +23,30 @@ class MaxAbsThrust(KPI):
     UNIT = 'N'
     TARGET = 'thruster'
 
-    def __init__(self, use_bag=True, time_offset=0.0):
-        KPI.__init__(self, use_bag, time_offset)
+    def __init__(self, use_bag=True, time_offset=0.0, context=None):
+        KPI.__init__(self, use_bag, time_offset, context)
 
-        t = None
         if self._bag is not None:
-            # Initialize the data structure for this KPI
-            self._input_values = dict()
-            for i in range(self._bag.parsers['thrusters'].n_thrusters):
-                t, thrusts = self._bag.parsers['thrusters'].get_thrust_data(i)
-                t = np.array(t)
+            thrusters = self._bag.parsers['thrusters']
+            if thrusters.get_thrust_matrix() is not None:
+                # All thrusters share the same time stamps, the KPI is
+                # computed over the n_thrusters x n_samples array at once
+                t, thrusts = thrusters.get_thrust_matrix()
                 assert time_offset < np.max(t), 'Time offset out of range'
-                self._input_values[i] = np.array(thrusts)
-                try:
-                    filt = np.nonzero(t >= self._time_offset)[0]
-                    if filt.shape == self._input_values[i].shape:
-                        self._input_values[i] = self._input_values[i][filt]
-                except Exception as e:
-                    print('Error occurred while parsing vectors, msg=' + str(e))
-                    self._input_values = None
+                self._input_values = thrusts[:, t >= self._time_offset]
+            else:
+                # Initialize the data structure for this KPI
+                self._input_values = dict()
+                for i in range(thrusters.n_thrusters):
+                    t, thrusts = thrusters.get_thrust_data(i)
+                    assert time_offset < np.max(t), 'Time offset out of range'
+                    self._input_values[i] = np.asarray(thrusts)
+                    try:
+                        if t.shape == self._input_values[i].shape:
+                            self._input_values[i] = self._input_values[i][t >= self._time_offset]
+                    except Exception as e:
+                        print('Error occurred while parsing vectors, msg=' + str(e))
+                        self._input_values = None
         else:
             self._input_values = None
 
@@ -51,13 +56,20 @@ class MaxAbsThrust(KPI):
             return -1
 
         if self._input_values is None:
-            assert type(input_values) is dict, 'Input dict is not a dictionary'
-            assert len(input_values.keys()) > 0, 'Dictionary is empty'
-            self._input_values = dict()
-            for i, tag in enumerate(input_values.keys()):
-                assert i == tag, 'Thruster indexes must be the keys of the dictionary'
-                assert self.is_iterable(input_values[tag]), 'No valid thrust force data'
-                self._input_values[tag] = np.array(input_values)
+            if isinstance(input_values, np.ndarray):
+                assert input_values.ndim == 2, 'Thrust forces must be a n_thrusters x n_samples array'
+                self._input_values = input_values
+            else:
+                assert type(input_values) is dict, 'Input dict is not a dictionary'
+                assert len(input_values.keys()) > 0, 'Dictionary is empty'
+                self._input_values = dict()
+                for i, tag in enumerate(input_values.keys()):
+                    assert i == tag, 'Thruster indexes must be the keys of the dictionary'
+                    assert self.is_iterable(input_values[tag]), 'No valid thrust force data'
+                    self._input_values[tag] = np.array(input_values[tag])
 
-        self._kpi_value = np.max([np.max(np.abs(self._input_values[i])) for i in self._input_values])
+        if isinstance(self._input_values, np.ndarray):
+            self._kpi_value = np.max(np.abs(self._input_values))
+        else:
+            self._kpi_value = np.max([np.max(np.abs(self._input_values[i])) for i in self._input_values])
         return self._kpi_value
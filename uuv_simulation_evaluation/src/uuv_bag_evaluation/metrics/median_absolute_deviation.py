@@ -23,8 +23,9 @@ class MedianAbsoluteDeviation(KPI):
     UNIT = 'm'
     TARGET = 'error'
 
-    def __init__(self, error_elem='position', use_bag=True, time_offset=0.0):
-        KPI.__init__(self, use_bag, time_offset)
+    def __init__(self, error_elem='position', use_bag=True, time_offset=0.0,
+                 context=None):
+        KPI.__init__(self, use_bag, time_offset, context)
         self._kpi_arg = error_elem
 
         if self._error_set is not None:
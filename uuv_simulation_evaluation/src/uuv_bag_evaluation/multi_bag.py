@@ -0,0 +1,116 @@
+# Copyright (c) 2016 The UUV Simulator Authors.
+# All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Several ROS bags, e.g. the files of a recording split with
+`rosbag record --split`, read as one time-ordered recording.
+"""
+import os
+import re
+import glob
+import heapq
+
+GLOB_CHARS = '*?['
+
+
+def _natural_keys(text):
+    return [int(c) if c.isdigit() else c for c in re.split(r'(\d+)', text)]
+
+
+def get_bag_filenames(filename):
+    """Return the list of bag files of a recording. `filename` can be a
+    list of files, a glob pattern or a bag filename. If the bag file does
+    not exist, the files of the split recording (`<name>_<index>.bag`) are
+    returned instead.
+    """
+    if isinstance(filename, (list, tuple)):
+        filenames = list()
+        for f in filename:
+            filenames += get_bag_filenames(f)
+        return filenames
+    if any(c in filename for c in GLOB_CHARS):
+        return sorted(glob.glob(filename), key=_natural_keys)
+    if os.path.isfile(filename):
+        return [filename]
+    root, ext = os.path.splitext(filename)
+    pattern = re.compile(re.escape(root) + r'_\d+' + re.escape(ext) + '$')
+    return sorted([f for f in glob.glob(root + '_*' + ext) if pattern.match(f)],
+                  key=_natural_keys)
+
+
+class MultiBag(object):
+    """
+    Read a list of bags as one bag. The messages of each bag are read in
+    timestamp order from the bag's index and merged with a k-way merge, so
+    that the parsers read the recording in a single pass as for a single
+    bag.
+    """
+
+    def __init__(self, bags):
+        assert len(bags) > 0, 'No bags provided'
+        self._bags = list(bags)
+
+    @property
+    def bags(self):
+        return self._bags
+
+    def get_type_and_topic_info(self, topic_filters=None):
+        from rosbag.bag import TypesAndTopicsTuple, TopicTuple
+        msg_types = dict()
+        topics = dict()
+        for bag in self._bags:
+            info = bag.get_type_and_topic_info(topic_filters)
+            msg_types.update(info.msg_types)
+            for topic in info.topics:
+                t = info.topics[topic]
+                if topic not in topics:
+                    topics[topic] = t
+                else:
+                    topics[topic] = TopicTuple(
+                        msg_type=t.msg_type,
+                        message_count=topics[topic].message_count + t.message_count,
+                        connections=topics[topic].connections + t.connections,
+                        frequency=topics[topic].frequency)
+        return TypesAndTopicsTuple(msg_types=msg_types, topics=topics)
+
+    def get_message_count(self, topic_filters=None):
+        return sum([bag.get_message_count(topic_filters) for bag in self._bags])
+
+    def get_start_time(self):
+        return min([bag.get_start_time() for bag in self._bags])
+
+    def get_end_time(self):
+        return max([bag.get_end_time() for bag in self._bags])
+
+    @staticmethod
+    def _get_items(bag_index, messages):
+        # The bag index and the message counter avoid comparing the
+        # messages of equal timestamps
+        for i, item in enumerate(messages):
+            yield item[2], bag_index, i, item
+
+    def read_messages(self, *args, **kwargs):
+        streams = [self._get_items(i, bag.read_messages(*args, **kwargs))
+                   for i, bag in enumerate(self._bags)]
+        for item in heapq.merge(*streams):
+            yield item[3]
+
+    def close_pool(self):
+        for bag in self._bags:
+            if hasattr(bag, 'close_pool'):
+                bag.close_pool()
+
+    def close(self):
+        for bag in self._bags:
+            bag.close()
@@ -0,0 +1,126 @@
+# Copyright (c) 2016 The UUV Simulator Authors.
+# All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import time
+import cProfile
+import pstats
+from contextlib import contextmanager
+from copy import deepcopy
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+class BagMessageCounter(object):
+    """
+    Proxy for a ROS bag counting the messages read per topic. All other
+    attributes are forwarded to the bag.
+    """
+
+    def __init__(self, bag):
+        self._bag = bag
+        self.counts = dict()
+
+    def __getattr__(self, name):
+        return getattr(self._bag, name)
+
+    def reset(self):
+        self.counts = dict()
+
+    def read_messages(self, *args, **kwargs):
+        for item in self._bag.read_messages(*args, **kwargs):
+            if item[0] in self.counts:
+                self.counts[item[0]] += 1
+            else:
+                self.counts[item[0]] = 1
+            yield item
+
+
+class StageProfiler(object):
+    """
+    Stores the wall clock time of each evaluation stage. If `full_profile`
+    is set, each top level stage is also run with cProfile and tracemalloc
+    (if available), storing the peak memory and the functions with the
+    highest cumulative time.
+    """
+
+    def __init__(self, full_profile=False, n_functions=20):
+        self._full_profile = full_profile
+        self._n_functions = n_functions
+        self._stages = dict()
+        self._depth = 0
+
+    @property
+    def full_profile(self):
+        return self._full_profile
+
+    @staticmethod
+    def get_function_stats(profiler, n_functions):
+        stats = pstats.Stats(profiler)
+        items = sorted(stats.stats.items(), key=lambda x: x[1][3], reverse=True)
+        output = list()
+        for func, (cc, nc, tt, ct, callers) in items[:n_functions]:
+            output.append(dict(function='%s:%d(%s)' % func,
+                               ncalls=int(nc),
+                               tottime=float(tt),
+                               cumtime=float(ct)))
+        return output
+
+    @contextmanager
+    def stage(self, name):
+        # Each call of the stage overwrites its previous entry
+        entry = dict(depth=self._depth)
+        self._stages[name] = entry
+
+        # Only the top level stages are profiled in full mode
+        use_full_profile = self._full_profile and self._depth == 0
+        profiler = None
+        started_tracemalloc = False
+        if use_full_profile:
+            profiler = cProfile.Profile()
+            if tracemalloc is not None and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracemalloc = True
+            profiler.enable()
+
+        self._depth += 1
+        start_time = time.time()
+        entry['start_time'] = start_time
+        try:
+            yield entry
+        finally:
+            entry['time'] = time.time() - start_time
+            self._depth -= 1
+            if profiler is not None:
+                profiler.disable()
+                entry['functions'] = self.get_function_stats(
+                    profiler, self._n_functions)
+            if started_tracemalloc:
+                entry['peak_memory'] = int(tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+
+    def get_stage(self, name):
+        if name not in self._stages:
+            return None
+        return self._stages[name]
+
+    def to_dict(self):
+        return dict(full_profile=self._full_profile,
+                    total_time=float(sum([self._stages[s]['time']
+                                          for s in self._stages
+                                          if 'time' in self._stages[s] and
+                                          self._stages[s]['depth'] == 0])),
+                    stages=deepcopy(self._stages))
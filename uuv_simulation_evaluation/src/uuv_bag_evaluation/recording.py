@@ -17,15 +17,22 @@ import rospy
 import logging
 import sys
 import rosbag
+import time
 import numpy as np
 from data_parsers import SimulationData
+from data_parsers.topic_index import TopicIndex
+from profiling import BagMessageCounter
+from chunked_bag import ParallelChunkReader, get_decompression_pool, is_compressed
+from multi_bag import MultiBag, get_bag_filenames
+from time_window import TimeWindowReader
 from uuv_trajectory_generator import TrajectoryGenerator, TrajectoryPoint
 
 
 class Recording:
     __instance = None
 
-    def __init__(self, filename):
+    def __init__(self, filename, num_processes=None, start_time=None,
+                 end_time=None):
         # Setting up the log
         self._logger = logging.getLogger('read_rosbag')
         if len(self._logger.handlers) == 0:
@@ -35,9 +42,45 @@ class Recording:
             self._logger.addHandler(out_hdlr)
             self._logger.setLevel(logging.INFO)
 
-        # Bag filename
+        # Bag filename, a list of files or a glob pattern are read as one
+        # recording
         self._filename = filename
-        self._bag = rosbag.Bag(filename)
+        self._filenames = get_bag_filenames(filename)
+        if len(self._filenames) == 0:
+            self._logger.error('No bag files found, filename=%s' % str(filename))
+            raise Exception('No bag files found')
+
+        bags = [rosbag.Bag(f) for f in self._filenames]
+        # Compressed chunks are decompressed with num_processes workers,
+        # shared by all files of a split recording
+        pool = None
+        if num_processes is None or num_processes > 1:
+            if len(bags) > 1 and any(is_compressed(bag) for bag in bags):
+                pool = get_decompression_pool(num_processes)
+        readers = [ParallelChunkReader(bag, num_processes, pool) for bag in bags]
+        for f, reader in zip(self._filenames, readers):
+            if reader.is_parallel:
+                self._logger.info('Compressed bag <%s>, # decompression processes=%d' % (f, reader.num_processes))
+        self._pool = pool
+
+        if len(readers) == 1:
+            self._bag = readers[0]
+        else:
+            self._logger.info('Reading %d bag files as one recording' % len(readers))
+            self._bag = MultiBag(readers)
+
+        # Only the messages recorded in the time window [start_time,
+        # end_time] are read by the parsers
+        if start_time is not None or end_time is not None:
+            self._logger.info('Reading messages in time window, start_time=%s, end_time=%s' % (str(start_time), str(end_time)))
+            self._bag = TimeWindowReader(self._bag, start_time, end_time)
+
+        # Topic index shared by all parsers, retrieved from the bag with
+        # get_topic_index
+        self._bag.topic_index = TopicIndex(self._bag)
+        self._logger.info('# topics=%d, vehicle namespaces=%s' % (
+            len(self._bag.topic_index.topics),
+            str(self._bag.topic_index.namespaces)))
         
         self.parsers = dict()
 
@@ -47,19 +90,46 @@ class Recording:
 
     @classmethod
     def get_instance(cls):
-        if cls.__instance is None:
-            cls.__instance = Recording()
+        # Last recording created, None if no recording was created
         return cls.__instance
 
+    @property
+    def filenames(self):
+        return self._filenames
+
+    @property
+    def topic_index(self):
+        return self._bag.topic_index
+
     @property
     def is_init(self):
         return self._is_init
 
-    def init_parsers(self):        
+    def init_parsers(self, profile=None, context=None):
+        # If a profile dict is given, the reading time and number of messages
+        # read per topic are stored for each parser. The evaluation context
+        # is passed to the parsers that need the error set of the recording
         self._logger.info('Initializing parsers')
+        bag = self._bag
+        if profile is not None:
+            bag = BagMessageCounter(self._bag)
         for parser in SimulationData.get_all_parsers():
-            self._logger.info('Initializing parser=%s', parser.LABEL)               
-            self.parsers[parser.LABEL] = parser(self._bag)
+            self._logger.info('Initializing parser=%s', parser.LABEL)
+            if profile is not None:
+                bag.reset()
+                start_time = time.time()
+            self.parsers[parser.LABEL] = parser(bag)
+            self.parsers[parser.LABEL].set_context(context)
+            if profile is not None:
+                profile[parser.LABEL] = dict(
+                    time=time.time() - start_time,
+                    messages=bag.counts)
         self._is_init = True
+        # The decompression workers are not needed after parsing
+        self._bag.close_pool()
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
 
   
\ No newline at end of file
@@ -0,0 +1,209 @@
+# Copyright (c) 2016 The UUV Simulator Authors.
+# All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import print_function
+import logging
+import sys
+import time
+import numpy as np
+import rospy
+import rosbag
+import tf.transformations as trans
+from nav_msgs.msg import Odometry
+from geometry_msgs.msg import WrenchStamped
+from uuv_control_msgs.msg import TrajectoryPoint
+from uuv_gazebo_ros_plugins_msgs.msg import FloatStamped
+
+
+class SyntheticRecording(object):
+    """
+    Generates a ROS bag with the topics parsed by the evaluation package
+    (odometry, reference trajectory, thrusters, fins, thruster manager and
+    wrench perturbation) from a synthetic helical trajectory, without the
+    need of running a simulation.
+    """
+
+    def __init__(self, namespace='rexrov', duration=10.0, rate=50.0,
+                 n_thrusters=8, n_fins=0, start_time=0.0, noise=0.05,
+                 seed=None):
+        # Setting up the log
+        self._logger = logging.getLogger('synthetic_recording')
+        if len(self._logger.handlers) == 0:
+            out_hdlr = logging.StreamHandler(sys.stdout)
+            out_hdlr.setFormatter(logging.Formatter('%(asctime)s | %(levelname)s | %(module)s | %(message)s'))
+            out_hdlr.setLevel(logging.INFO)
+            self._logger.addHandler(out_hdlr)
+            self._logger.setLevel(logging.INFO)
+
+        assert duration > 0, 'Duration must be greater than zero'
+        assert rate > 0, 'Sampling rate must be greater than zero'
+        assert n_thrusters >= 0, 'Number of thrusters must be non-negative'
+        assert n_fins >= 0, 'Number of fins must be non-negative'
+
+        self._namespace = namespace.strip('/')
+        self._duration = float(duration)
+        self._rate = float(rate)
+        self._n_thrusters = int(n_thrusters)
+        self._n_fins = int(n_fins)
+        self._start_time = float(start_time)
+        self._noise = float(noise)
+
+        self._random = np.random.RandomState(seed)
+
+        # Parameters of the helical reference trajectory
+        self._radius = 10.0
+        self._omega = 2 * np.pi / 60.0
+        self._z_rate = -0.05
+        self._z_init = -20.0
+
+    @staticmethod
+    def get_num_samples(duration, rate):
+        return int(np.floor(duration * rate + 1e-6)) + 1
+
+    @property
+    def num_samples(self):
+        return self.get_num_samples(self._duration, self._rate)
+
+    @property
+    def num_messages(self):
+        # Odometry and reference, thruster manager and wrench perturbation
+        n = 4
+        # Thrust and input per thruster
+        n += 2 * self._n_thrusters
+        # Input, output and wrench per fin
+        n += 3 * self._n_fins
+        return n * self.num_samples
+
+    def _topic(self, name):
+        return '/%s/%s' % (self._namespace, name)
+
+    def _get_reference(self, t):
+        wt = self._omega * t
+        pos = np.array([self._radius * np.cos(wt),
+                        self._radius * np.sin(wt),
+                        self._z_init + self._z_rate * t])
+        vel = np.array([-self._radius * self._omega * np.sin(wt),
+                        self._radius * self._omega * np.cos(wt),
+                        self._z_rate])
+        acc = np.array([-self._radius * self._omega**2 * np.cos(wt),
+                        -self._radius * self._omega**2 * np.sin(wt),
+                        0.0])
+        heading = np.arctan2(vel[1], vel[0])
+        quat = trans.quaternion_from_euler(0, 0, heading)
+        return pos, quat, vel, acc
+
+    def _get_trajectory_point_msg(self, stamp, t):
+        pos, quat, vel, acc = self._get_reference(t)
+        msg = TrajectoryPoint()
+        msg.header.stamp = stamp
+        msg.header.frame_id = 'world'
+        msg.pose.position.x, msg.pose.position.y, msg.pose.position.z = pos
+        msg.pose.orientation.x, msg.pose.orientation.y, \
+            msg.pose.orientation.z, msg.pose.orientation.w = quat
+        msg.velocity.linear.x, msg.velocity.linear.y, msg.velocity.linear.z = vel
+        msg.velocity.angular.z = self._omega
+        msg.acceleration.linear.x, msg.acceleration.linear.y, \
+            msg.acceleration.linear.z = acc
+        return msg
+
+    def _get_odometry_msg(self, stamp, t):
+        pos, quat, vel, _ = self._get_reference(t)
+        # Tracking error decaying from the initial condition plus noise
+        decay = np.exp(-t / 10.0)
+        pos = pos + decay * np.array([1.0, -1.0, 0.5]) + \
+            self._noise * self._random.randn(3)
+        vel = vel + self._noise * self._random.randn(3)
+        quat = trans.quaternion_multiply(
+            quat, trans.quaternion_from_euler(
+                *(self._noise * self._random.randn(3))))
+
+        msg = Odometry()
+        msg.header.stamp = stamp
+        msg.header.frame_id = 'world'
+        msg.child_frame_id = '%s/base_link' % self._namespace
+        msg.pose.pose.position.x, msg.pose.pose.position.y, \
+            msg.pose.pose.position.z = pos
+        msg.pose.pose.orientation.x, msg.pose.pose.orientation.y, \
+            msg.pose.pose.orientation.z, msg.pose.pose.orientation.w = quat
+        msg.twist.twist.linear.x, msg.twist.twist.linear.y, \
+            msg.twist.twist.linear.z = vel
+        msg.twist.twist.angular.z = self._omega + \
+            self._noise * self._random.randn()
+        return msg
+
+    def _get_wrench_msg(self, stamp, force, torque):
+        msg = WrenchStamped()
+        msg.header.stamp = stamp
+        msg.wrench.force.x, msg.wrench.force.y, msg.wrench.force.z = force
+        msg.wrench.torque.x, msg.wrench.torque.y, msg.wrench.torque.z = torque
+        return msg
+
+    def _get_float_msg(self, stamp, value):
+        msg = FloatStamped()
+        msg.header.stamp = stamp
+        msg.data = float(value)
+        return msg
+
+    def write(self, filename, compression='none', time_limit=None):
+        # Returns the number of messages written. If a wall clock time limit
+        # is given, the generation is interrupted once it is reached
+        n_msgs = 0
+        dt = 1.0 / self._rate
+        with rosbag.Bag(filename, 'w', compression=compression) as bag:
+            for k in range(self.num_samples):
+                if time_limit is not None and k % 100 == 0:
+                    if time.time() > time_limit:
+                        self._logger.warning('Time limit reached, stopping '
+                                             'recording at t=%.2f s' % (k * dt))
+                        break
+                t = k * dt
+                stamp = rospy.Time.from_sec(self._start_time + t)
+
+                bag.write(self._topic('dp_controller/reference'),
+                          self._get_trajectory_point_msg(stamp, t), stamp)
+                bag.write(self._topic('pose_gt'),
+                          self._get_odometry_msg(stamp, t), stamp)
+
+                force = 100 * np.sin(self._omega * t + np.arange(3)) + \
+                    10 * self._random.randn(3)
+                torque = 50 * np.cos(self._omega * t + np.arange(3)) + \
+                    5 * self._random.randn(3)
+                bag.write(self._topic('thruster_manager/input_stamped'),
+                          self._get_wrench_msg(stamp, force, torque), stamp)
+                bag.write(self._topic('wrench_perturbation'),
+                          self._get_wrench_msg(stamp, 0.1 * force, 0.1 * torque),
+                          stamp)
+
+                for i in range(self._n_thrusters):
+                    value = 200 * np.sin(self._omega * t + i) + \
+                        10 * self._random.randn()
+                    bag.write(self._topic('thrusters/%d/input' % i),
+                              self._get_float_msg(stamp, value), stamp)
+                    bag.write(self._topic('thrusters/%d/thrust' % i),
+                              self._get_float_msg(stamp, 0.95 * value), stamp)
+
+                for i in range(self._n_fins):
+                    value = 0.2 * np.sin(self._omega * t + i)
+                    bag.write(self._topic('fins/%d/input' % i),
+                              self._get_float_msg(stamp, value), stamp)
+                    bag.write(self._topic('fins/%d/output' % i),
+                              self._get_float_msg(stamp, 0.9 * value), stamp)
+                    bag.write(self._topic('fins/%d/wrench_topic' % i),
+                              self._get_wrench_msg(
+                                  stamp, [0, 10 * value, 0], [0, 0, value]),
+                              stamp)
+                n_msgs += 2 + 2 + 2 * self._n_thrusters + 3 * self._n_fins
+        self._logger.info('Synthetic recording stored, filename=%s, '
+                          'messages=%d' % (filename, n_msgs))
+        return n_msgs
@@ -0,0 +1,69 @@
+# Copyright (c) 2016 The UUV Simulator Authors.
+# All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+def get_time_window(time_offset=0.0, end_time=None, time_margin=1.0):
+    """Return the start and end times, in seconds, of the messages read
+    for an evaluation window starting at `time_offset`. The window is
+    extended by `time_margin` on both sides, e.g. for the interpolation of
+    the reference trajectory. None means the window is not limited.
+    """
+    time_margin = max(0.0, time_margin)
+    start_time = None
+    if time_offset is not None and time_offset - time_margin > 0:
+        start_time = time_offset - time_margin
+    if end_time is not None:
+        end_time = end_time + time_margin
+    return start_time, end_time
+
+
+class TimeWindowReader(object):
+    """
+    Proxy for a ROS bag restricting `read_messages` to the messages
+    recorded between `start_time` and `end_time` (in seconds), so that
+    the bag index skips the chunks outside of the window. All other
+    attributes are forwarded to the bag.
+    """
+
+    def __init__(self, bag, start_time=None, end_time=None):
+        self._bag = bag
+        self._start_time = start_time
+        self._end_time = end_time
+
+    def __getattr__(self, name):
+        return getattr(self._bag, name)
+
+    @property
+    def start_time(self):
+        return self._start_time
+
+    @property
+    def end_time(self):
+        return self._end_time
+
+    def read_messages(self, topics=None, start_time=None, end_time=None,
+                      *args, **kwargs):
+        import rospy
+        # Intersection of the requested interval with the window
+        if self._start_time is not None:
+            t = rospy.Time.from_sec(self._start_time)
+            if start_time is None or start_time < t:
+                start_time = t
+        if self._end_time is not None:
+            t = rospy.Time.from_sec(self._end_time)
+            if end_time is None or end_time > t:
+                end_time = t
+        return self._bag.read_messages(topics, start_time, end_time,
+                                       *args, **kwargs)
@@ -62,32 +62,57 @@ class Constraint(object):
             return False
 
     def compute(self, x=None):
+        """Return the penalty for the input `x`, a KPI value. The input is
+        stored in `x` (the last input is used if `x` is None).
+        """
+        if x is not None:
+            self.x = x
+        return self._evaluate(self.x)
+
+    def evaluate(self, x):
+        """Return the penalty for `x`, a KPI value or an array of KPI values
+        (an array of penalties is returned), without storing the input.
+        """
+        return self._evaluate(x)
+
+    def _evaluate(self, x):
         raise NotImplementedError()
 
+    def is_non_negative(self):
+        """Return True if the penalty is never negative."""
+        return False
+
+    @staticmethod
+    def _get_output(value, x):
+        # Scalar inputs return a scalar penalty
+        if np.ndim(x) == 0:
+            return float(value)
+        return value
+
 
 class LogBarrierMethod(Constraint):
     def __init__(self, tag='', input_tag=''):
         Constraint.__init__(self, tag, input_tag)
 
-    def compute(self, x=None):
-        if x is not None:
-            self.x = x
-        if self.x - self.params['offset'] > 0:
-            return 0.0
-        return -1 * self.params['c'] * np.log(-1 * self.params['gain'] * (self.x - self.params['offset']))
+    def _evaluate(self, x):
+        d = np.asarray(x, dtype=float) - self.params['offset']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            value = np.where(
+                d > 0, 0.0,
+                -1 * self.params['c'] * np.log(-1 * self.params['gain'] * d))
+        return self._get_output(value, x)
 
 
 class InverseBarrierMethod(Constraint):
     def __init__(self, tag='', input_tag=''):
         Constraint.__init__(self, tag, input_tag)
 
-    def compute(self, x=None):
-        if x is not None:
-            self.x = x
-        d = self.params['gain'] * (self.x - self.params['offset'])
-        if abs(d) < 1e-5:
-            d = 1e-5 * np.sign(d)
-        return -1 * self.params['c'] * 1 / d
+    def _evaluate(self, x):
+        d = self.params['gain'] * (np.asarray(x, dtype=float) - self.params['offset'])
+        d = np.where(np.abs(d) < 1e-5, 1e-5 * np.sign(d), d)
+        with np.errstate(divide='ignore'):
+            value = -1 * self.params['c'] / d
+        return self._get_output(value, x)
 
 
 class PenaltyFunction(Constraint):
@@ -95,12 +120,16 @@ class PenaltyFunction(Constraint):
         Constraint.__init__(self, tag, input_tag)
         self.params['n'] = 0.0
 
-    def compute(self, x=None):
-        if x is not None:
-            self.x = x
-        if self.x - self.params['offset'] < 0:
-            return 0
-        return self.params['c'] * np.power(max(0, self.params['gain'] * (self.x - self.params['offset'])), self.params['n'])
+    def is_non_negative(self):
+        return self.params['c'] >= 0
+
+    def _evaluate(self, x):
+        d = np.asarray(x, dtype=float) - self.params['offset']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            value = np.where(
+                d < 0, 0.0,
+                self.params['c'] * np.power(np.maximum(0, self.params['gain'] * d), self.params['n']))
+        return self._get_output(value, x)
 
 
 class DistancePenaltyFunction(Constraint):
@@ -108,14 +137,22 @@ class DistancePenaltyFunction(Constraint):
         Constraint.__init__(self, tag, input_tag)
         self.params['n'] = 0.0
 
+    def is_non_negative(self):
+        return self.params['c'] >= 0 and self.params['gain'] >= 0
+
     def compute(self, x=None):
         if x is not None:
             self.x = x
         else:
             return 0
-
-        if isinstance(self.params['offset'], list):
-            return np.min([self.params['c'] * np.power(self.params['gain'] * np.abs(x - i), self.params['n']) for i in self.params['offset']])
-        else:
-            return self.params['c'] * np.power(self.params['gain'] * np.abs(x - self.params['offset']), self.params['n'])
-
+        return self._evaluate(x)
+
+    def _evaluate(self, x):
+        x_array = np.asarray(x, dtype=float)
+        # With a list of offsets, the distance to the closest offset is used
+        offset = np.asarray(self.params['offset'], dtype=float)
+        with np.errstate(divide='ignore'):
+            value = self.params['c'] * np.power(
+                self.params['gain'] * np.abs(x_array[..., np.newaxis] - offset.reshape(-1)),
+                self.params['n'])
+        return self._get_output(np.min(value, axis=-1), x)
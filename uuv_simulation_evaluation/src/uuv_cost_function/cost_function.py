@@ -19,18 +19,24 @@ import sys
 import logging
 import numpy as np
 from .constraint import Constraint
+from .log_handler import AsyncLogHandler
+
+
+# Logging modes of the cost function computation
+# * full: one log entry per cost term and constraint
+# * summary: one log entry with the cost per computation
+# * off: no log entries, the cost terms are only available in get_data()
+LOG_MODES = ['full', 'summary', 'off']
 
 
 class CostFunction(object):
-    def __init__(self, norm=1):
+    def __init__(self, norm=1, log_mode='full'):
         self.logger = logging.getLogger('cost_function')
         if len(self.logger.handlers) == 0:
             out_hdlr = logging.StreamHandler(sys.stdout)
             out_hdlr.setFormatter(logging.Formatter('%(asctime)s | %(levelname)s | %(module)s | %(message)s'))
             out_hdlr.setLevel(logging.INFO)
-            self.logger.addHandler(out_hdlr)
-            self.logger.setLevel(logging.INFO)
-            
+
             if not os.path.isdir('logs'):
                 os.makedirs('logs')
             log_filename = os.path.join('logs', 'cost_function.log')
@@ -39,9 +45,15 @@ class CostFunction(object):
             file_hdlr.setFormatter(logging.Formatter(
                 '%(asctime)s | %(levelname)s | %(module)s | %(message)s'))
             file_hdlr.setLevel(logging.INFO)
-            self.logger.addHandler(file_hdlr)
+
+            # The log entries are written in a background thread, the cost
+            # function computation does not wait on the stream and file
+            self.logger.addHandler(AsyncLogHandler([out_hdlr, file_hdlr]))
             self.logger.setLevel(logging.INFO)
 
+        self.log_mode = None
+        self.set_log_mode(log_mode)
+
         # Load default KPIs
         if norm == 'inf':
             self.norm = np.inf
@@ -52,6 +64,10 @@ class CostFunction(object):
         self.constraints = list()
         self.export_data = dict(norm=self.norm)
 
+    def set_log_mode(self, log_mode):
+        assert log_mode in LOG_MODES, 'Invalid log mode, options=%s' % str(LOG_MODES)
+        self.log_mode = log_mode
+
     def set_norm(self, norm):
         if norm == 'inf':
             self.norm = np.inf
@@ -84,6 +100,12 @@ class CostFunction(object):
             return list()
         return [c.tag for c in self.constraints]
 
+    def is_non_negative(self):
+        """Return True if the cost can never be negative. The norm of the
+        cost vector is non-negative, only the constraints can be negative.
+        """
+        return all([c.is_non_negative() for c in self.constraints])
+
     def from_dict(self, params):
         for tag in params:
             self.kpis[tag] = 0.0
@@ -146,41 +168,129 @@ class CostFunction(object):
             self.kpis[tag] = kpis[tag]
         self.logger.debug('end set_kpis')        
 
-    def compute(self):        
-        costs = list()
-        self.logger.info('Calculating cost function=')    
-        w = 1. / len(self.weights.keys())    
-        for tag in sorted(self.weights.keys()):
-            if self.kpis[tag] < 0:
-                raise Exception('KPI <%s> has an invalid value=%.2f' % (tag, self.kpis[tag]))
-            costs += [w * self.weights[tag] * self.kpis[tag]]
+    def get_batch_kpis(self, kpis, tags=None):
+        """Return the KPIs as a dictionary of arrays. `kpis` is either a
+        dictionary (or data frame) of KPI arrays, or a matrix with one row
+        per run and one column for each tag in `tags`.
+        """
+        # Only the KPIs of the cost function and constraints are converted,
+        # the input can have other (e.g. non numeric) columns
+        needed = set(self.weights.keys()) | set(c.input_tag for c in self.constraints)
+        if tags is None:
+            return dict((tag, np.asarray(kpis[tag], dtype=float).reshape(-1))
+                        for tag in needed if tag in kpis)
+        kpis = np.asarray(kpis, dtype=float)
+        if kpis.ndim == 1:
+            kpis = kpis.reshape(1, -1)
+        assert kpis.shape[1] == len(tags), 'Number of KPI tags and columns is different'
+        return dict((tag, kpis[:, i]) for i, tag in enumerate(tags) if tag in needed)
 
-            self.logger.info('\t {} - Weight: {} * {} - KPI: {}'.format(tag, w, self.weights[tag], self.kpis[tag]))
-            self.logger.info('\t\t Result: {}'.format(costs[-1]))
+    def compute_batch(self, kpis, tags=None, raise_invalid=True):
+        """Compute the cost function for a batch of runs. `kpis` is either
+        a dictionary (or data frame) of KPI arrays, or a matrix with one
+        row per run and one column for each tag in `tags`. Returns a
+        dictionary with the total cost per run (`total_cost`), the cost
+        before constraints (`cost`), the weighted cost terms per KPI tag
+        (`terms`), their weights (`weights`) and the constraint penalties
+        per constraint tag (`constraints`).
 
-            self.export_data['weight_' + tag] = float(w * self.weights[tag])
-            self.export_data[tag] = float(self.kpis[tag])
-            self.export_data['cost_' + tag] = float(w * self.weights[tag] * self.kpis[tag])
-            
-        self.logger.info('Computing cost function from cost vector norm=%s' % str(self.norm))
-        total_cost = np.linalg.norm(costs, ord=self.norm)
-        
-        self.logger.info('Cost (before constraints)=' + str(total_cost))        
-        total_cost += self.compute_constraints()        
+        If `raise_invalid` is False, runs with negative KPIs have a NaN
+        cost instead of raising an exception.
+        """
+        kpis = self.get_batch_kpis(kpis, tags)
+        if len(kpis) == 0:
+            raise Exception('No KPIs provided')
+        n_runs = len(next(iter(kpis.values())))
+
+        cost_tags = sorted(self.weights.keys())
+        w = 1. / len(cost_tags)
+        weights = dict()
+        terms = dict()
+        invalid = np.zeros(n_runs, dtype=bool)
+        for tag in cost_tags:
+            if tag not in kpis:
+                raise Exception('KPI <%s> is not in the KPIs list' % tag)
+            values = kpis[tag]
+            if np.any(values < 0):
+                if raise_invalid:
+                    raise Exception('KPI <%s> has an invalid value=%.2f' % (tag, values[values < 0][0]))
+                invalid |= values < 0
+            weights[tag] = w * self.weights[tag]
+            terms[tag] = weights[tag] * values
+
+        cost = np.linalg.norm(
+            np.vstack([terms[tag] for tag in cost_tags]).T, ord=self.norm, axis=1)
+
+        constraints = self.compute_constraints_batch(kpis)
+        total_cost = cost.copy()
+        for tag in constraints:
+            total_cost += constraints[tag]
+
+        if np.any(invalid):
+            cost[invalid] = np.nan
+            total_cost[invalid] = np.nan
 
+        return dict(total_cost=total_cost, cost=cost, terms=terms,
+                    weights=weights, constraints=constraints)
+
+    def compute_constraints_batch(self, kpis):
+        """Return the penalty of each constraint for a dictionary of KPI
+        arrays, as a dictionary of arrays per constraint tag.
+        """
+        output = dict()
+        for c in self.constraints:
+            if c.input_tag not in kpis:
+                self.logger.error('Error computing constraint <%s>: '
+                                  '%s tag not in KPIs list' % (c.tag, c.input_tag))
+                raise Exception('%s tag not in KPIs list' % c.input_tag)
+            output[c.tag] = np.asarray(c.evaluate(kpis[c.input_tag]), dtype=float)
+        return output
+
+    def compute(self):
+        result = self.compute_batch(
+            dict((tag, [self.kpis[tag]]) for tag in self.kpis))
+        total_cost = result['total_cost'][0]
+
+        # Cost terms and constraint penalties of this computation
+        for tag in sorted(result['terms'].keys()):
+            self.export_data['weight_' + tag] = float(result['weights'][tag])
+            self.export_data[tag] = float(self.kpis[tag])
+            self.export_data['cost_' + tag] = float(result['terms'][tag][0])
+        for c in self.constraints:
+            # Keep the scalar input of the constraint, stored by save()
+            c.x = self.kpis[c.input_tag]
+            self.export_data[c.tag] = float(result['constraints'][c.tag][0])
+        self.export_data['cost_before_constraints'] = float(result['cost'][0])
         self.export_data['total_cost'] = float(total_cost)
-        self.logger.info('Cost (after constraints)=' + str(total_cost))
         self.export_data['norm'] = str(self.norm)
+
+        if self.log_mode == 'full':
+            self.logger.info('Calculating cost function=')
+            for tag in sorted(result['terms'].keys()):
+                self.logger.info('\t {} - Weight: {} - KPI: {}'.format(tag, result['weights'][tag], self.kpis[tag]))
+                self.logger.info('\t\t Result: {}'.format(result['terms'][tag][0]))
+            self.logger.info('Computing cost function from cost vector norm=%s' % str(self.norm))
+            self.logger.info('Cost (before constraints)=' + str(result['cost'][0]))
+            for c in self.constraints:
+                self.logger.info('\tConstraint=' + c.__class__.__name__)
+                self.logger.info('\t\tTag=' + c.tag)
+                self.logger.info('\t\tInput tag=' + c.input_tag)
+                self.logger.info('\t\tValue=' + str(result['constraints'][c.tag][0]))
+            self.logger.info('Cost (after constraints)=' + str(total_cost))
+        elif self.log_mode == 'summary':
+            self.logger.info('Cost=%s, before constraints=%s, norm=%s' % (
+                str(total_cost), str(result['cost'][0]), str(self.norm)))
         return total_cost
 
     def compute_constraints(self):
         value = 0.0
         if len(self.constraints) > 0:
             for c in self.constraints:
-                self.logger.info('\tConstraint=' + c.__class__.__name__)
-                self.logger.info('\t\tTag=' + c.tag)
-                self.logger.info('\t\tInput tag=' + c.input_tag)
-                
+                if self.log_mode == 'full':
+                    self.logger.info('\tConstraint=' + c.__class__.__name__)
+                    self.logger.info('\t\tTag=' + c.tag)
+                    self.logger.info('\t\tInput tag=' + c.input_tag)
+
                 if c.input_tag not in self.kpis:
                     self.logger.error('Error computing constraint <%s>: '
                                       '%s tag not in KPIs list' % (c.tag, c.input_tag))
@@ -189,8 +299,9 @@ class CostFunction(object):
                 c_fcn = c.compute(self.kpis[c.input_tag])
 
                 self.export_data[c.tag] = float(c_fcn)
-                
-                self.logger.info('\t\tValue=' + str(c_fcn))                                
+
+                if self.log_mode == 'full':
+                    self.logger.info('\t\tValue=' + str(c_fcn))
                 value += c_fcn
         return value
 
@@ -0,0 +1,105 @@
+# Copyright (c) 2016 The UUV Simulator Authors.
+# All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import time
+import logging
+import threading
+from multiprocessing import util
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+
+class AsyncLogHandler(logging.Handler):
+    """
+    Log handler passing the records through a queue to the wrapped
+    `handlers`, which write them in a background thread so that the caller
+    never waits on the stream or file. The thread is started again in
+    forked processes, since threads do not survive a fork. The queued
+    records are written before the process exits, waiting at most
+    `flush_timeout` seconds.
+    """
+
+    def __init__(self, handlers, flush_timeout=5.0):
+        logging.Handler.__init__(self)
+        self._handlers = handlers
+        self._flush_timeout = flush_timeout
+        self._pid = None
+        self._queue = None
+        self._thread = None
+
+    def _start(self):
+        if self._pid is not None and self._pid != os.getpid():
+            # The writer thread of the parent process may have been holding
+            # the lock of a handler when the process was forked, and Python 2
+            # does not reinitialize the handler locks after a fork
+            for handler in self._handlers:
+                handler.createLock()
+        self._pid = os.getpid()
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, args=(self._queue,))
+        self._thread.daemon = True
+        self._thread.start()
+        # Child processes of multiprocessing end with os._exit, which skips
+        # the atexit handlers but runs the multiprocessing finalizers
+        util.Finalize(self, self.flush, exitpriority=10)
+
+    def _is_running(self):
+        return self._pid == os.getpid() and self._thread is not None
+
+    def _run(self, records):
+        while True:
+            record = records.get()
+            try:
+                if record is None:
+                    break
+                for handler in self._handlers:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+            finally:
+                records.task_done()
+
+    def emit(self, record):
+        try:
+            if not self._is_running():
+                self._start()
+            # The message is formatted here, since the arguments can change
+            # before the record is written
+            record.msg = record.getMessage()
+            record.args = None
+            if record.exc_info:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+                record.exc_info = None
+            self._queue.put(record)
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        if self._is_running():
+            end_time = time.time() + self._flush_timeout
+            while self._queue.unfinished_tasks > 0 and time.time() < end_time:
+                time.sleep(0.01)
+            for handler in self._handlers:
+                handler.flush()
+
+    def close(self):
+        if self._is_running():
+            self._queue.put(None)
+            self._thread.join(self._flush_timeout)
+            self._thread = None
+        for handler in self._handlers:
+            handler.close()
+        logging.Handler.close(self)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# Copyright (c) 2016 The UUV Simulator Authors.
+# All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import matplotlib
+matplotlib.use('Agg')
+
+PKG = 'uuv_simulation_evaluation'
+NAME = 'test_batch'
+
+import rospy
+import rostest
+from rospkg import RosPack
+import unittest
+import os
+import shutil
+import tempfile
+from uuv_bag_evaluation import Evaluation
+from uuv_bag_evaluation.batch import evaluate_many, get_kpi_dicts
+
+import roslib; roslib.load_manifest(PKG)
+
+ROSPACK_INST = RosPack()
+ROOT_PATH = os.path.join(ROSPACK_INST.get_path(PKG), 'test')
+ROSBAG = os.path.join(ROOT_PATH, 'recording.bag')
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def test_evaluate_many(self):
+        output_dirs = [os.path.join(self.output_dir, str(i)) for i in range(2)]
+        df, summary = evaluate_many([ROSBAG, ROSBAG], workers=2,
+                                    output_dirs=output_dirs, save_kpis=True,
+                                    summaries=True)
+
+        self.assertEqual(list(df.columns), ['bag', 'kpi', 'value'])
+        self.assertTrue(summary['success'].all())
+        for d in output_dirs:
+            self.assertIn('computed_kpis.yaml', os.listdir(d))
+
+        sim_eval = Evaluation(ROSBAG, self.output_dir)
+        kpis = sim_eval.get_kpis()
+        self.assertEqual(len(df), 2 * len(kpis))
+        self.assertEqual(get_kpi_dicts(df)[ROSBAG], kpis)
+
+    def test_evaluate_many_kpi_tags(self):
+        tags = ['rmse_position', 'rmse_yaw', 'invalid_tag']
+        df, summary = evaluate_many([ROSBAG, 'invalid.bag'], kpis=tags,
+                                    workers=1, output_dirs=[self.output_dir] * 2,
+                                    summaries=True)
+
+        self.assertEqual(sorted(df['kpi'].unique()), tags[:2])
+        self.assertEqual(list(summary['success']), [True, False])
+        self.assertEqual(list(df['bag'].unique()), [ROSBAG])
+
+
+if __name__ == '__main__':
+    import rosunit
+    rosunit.unitrun(PKG, NAME, TestBatch)
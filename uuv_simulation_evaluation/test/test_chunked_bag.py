@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# Copyright (c) 2016 The UUV Simulator Authors.
+# All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+PKG = 'uuv_simulation_evaluation'
+NAME = 'test_chunked_bag'
+
+import rospy
+import rostest
+import unittest
+import os
+import shutil
+import tempfile
+import rosbag
+from std_msgs.msg import Float64
+from uuv_bag_evaluation.chunked_bag import ParallelChunkReader
+
+import roslib; roslib.load_manifest(PKG)
+
+
+class TestChunkedBag(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def write_bag(self, compression):
+        filename = os.path.join(self.output_dir, 'test_%s.bag' % compression)
+        # Small chunks, so that the messages are split into several chunks
+        bag = rosbag.Bag(filename, 'w', compression=compression, chunk_threshold=1024)
+        for i in range(2000):
+            t = rospy.Time.from_sec(1 + 0.01 * i)
+            bag.write('/test/%d/thrust' % (i % 3), Float64(data=float(i)), t)
+        bag.close()
+        return filename
+
+    def test_compressed_bag(self):
+        filename = self.write_bag('bz2')
+        bag = ParallelChunkReader(rosbag.Bag(filename), num_processes=2)
+        self.assertTrue(bag.is_parallel)
+
+        for topics in [None, ['/test/1/thrust'], ['/test/0/thrust', '/test/2/thrust']]:
+            expected = [(topic, msg.data, t) for topic, msg, t in
+                        rosbag.Bag(filename).read_messages(topics)]
+            output = [(topic, msg.data, t) for topic, msg, t in
+                      bag.read_messages(topics)]
+            self.assertEqual(output, expected)
+
+        # Raw messages
+        expected = [msg[1] for _, msg, _ in
+                    rosbag.Bag(filename).read_messages(['/test/1/thrust'], raw=True)]
+        output = [msg[1] for _, msg, _ in
+                  bag.read_messages(['/test/1/thrust'], raw=True)]
+        self.assertEqual(output, expected)
+        bag.close_pool()
+
+    def test_uncompressed_bag(self):
+        filename = self.write_bag('none')
+        bag = ParallelChunkReader(rosbag.Bag(filename), num_processes=2)
+        self.assertFalse(bag.is_parallel)
+        self.assertEqual(len(list(bag.read_messages(['/test/0/thrust']))), 667)
+
+if __name__ == '__main__':
+    import rosunit
+    rosunit.unitrun(PKG, NAME, TestChunkedBag)
@@ -20,6 +20,7 @@ NAME = 'test_constraint'
 import rospy
 import rostest
 import unittest
+import numpy as np
 from uuv_cost_function import Constraint, PenaltyFunction, LogBarrierMethod, InverseBarrierMethod, DistancePenaltyFunction
 
 import roslib; roslib.load_manifest(PKG)
@@ -94,7 +95,23 @@ class TestConstraint(unittest.TestCase):
                           'Invalid output for value in the feasible set')
         self.assertEquals(p_fcn.compute(3), 0,
                           'Invalid output for value in the feasible set')
-                          
+
+    def test_array_input(self):
+        x = np.array([0.0, 1.0, 2.5, 9.0, 10.0, 11.0, 20.0])
+        params = dict(LogBarrierMethod=self.log_barrier_params,
+                      InverseBarrierMethod=self.inverse_barrier_params,
+                      PenaltyFunction=self.penalty_params_valid,
+                      DistancePenaltyFunction=self.dist_penalty_params_list)
+        for name in params:
+            c_fcn = Constraint.create(name, 'test', 'x')
+            c_fcn.from_dict(params[name])
+            output = c_fcn.evaluate(x)
+            self.assertEqual(output.shape, x.shape,
+                             'Invalid output shape for constraint %s' % name)
+            for i in range(x.size):
+                self.assertEqual(output[i], c_fcn.compute(float(x[i])),
+                                 'Array and scalar outputs differ for constraint %s' % name)
+
 
 if __name__ == '__main__':
     import rosunit
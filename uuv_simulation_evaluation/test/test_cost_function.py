@@ -20,6 +20,9 @@ NAME = 'test_cost_function'
 import rospy
 import rostest
 import unittest
+import tempfile
+import shutil
+import numpy as np
 from uuv_cost_function import CostFunction
 
 import roslib; roslib.load_manifest(PKG)
@@ -36,6 +39,48 @@ class TestCostFunction(unittest.TestCase):
         for tag in self.cost_fcn_params:
             self.assertEqual(self.cost_fcn.get_weight(tag), self.cost_fcn_params[tag], 'Weights have not been correctly initialized')
 
+    def test_compute_batch(self):
+        kpis = np.array([[1.0, 2.0, 3.0],
+                         [0.5, 0.0, 4.0]])
+        for norm in [1, 2, 'inf']:
+            self.cost_fcn.set_norm(norm)
+            result = self.cost_fcn.compute_batch(kpis, tags=['a', 'b', 'c'])
+            self.assertEqual(result['total_cost'].shape, (2,))
+            for i in range(kpis.shape[0]):
+                self.cost_fcn.set_kpis(dict(a=kpis[i, 0], b=kpis[i, 1], c=kpis[i, 2]))
+                self.assertAlmostEqual(result['total_cost'][i], self.cost_fcn.compute())
+                self.assertAlmostEqual(result['terms']['c'][i], kpis[i, 2])
+
+    def test_compute_batch_constraints(self):
+        self.cost_fcn.add_constraint('PenaltyFunction', 'penalty_a', 'a',
+                                     dict(c=10.0, gain=1.0, offset=1.0, n=1))
+        result = self.cost_fcn.compute_batch(dict(a=[0.5, 2.0], b=[1.0, 1.0], c=[1.0, 1.0]))
+        self.assertEqual(list(result['constraints']['penalty_a']), [0.0, 10.0])
+        self.assertEqual(list(result['total_cost'] - result['cost']), [0.0, 10.0])
+
+    def test_compute_batch_constraint_state(self):
+        self.cost_fcn.add_constraint('PenaltyFunction', 'penalty_a', 'a',
+                                     dict(c=10.0, gain=1.0, offset=1.0, n=1))
+        self.cost_fcn.set_kpis(dict(a=2.0, b=1.0, c=1.0))
+        self.cost_fcn.compute()
+        self.cost_fcn.compute_batch(dict(a=[0.5, 2.0, 3.0], b=[1.0, 1.0, 1.0], c=[1.0, 1.0, 1.0]))
+        # The batch computation does not change the input stored by compute()
+        params = self.cost_fcn.constraints[0].get_params()
+        self.assertEqual(params['x'], 2.0)
+        self.assertEqual(params['result'], 10.0)
+        output_dir = tempfile.mkdtemp()
+        try:
+            self.assertTrue(self.cost_fcn.constraints[0].save(output_dir))
+        finally:
+            shutil.rmtree(output_dir)
+
+    def test_compute_batch_invalid_kpis(self):
+        kpis = dict(a=[1.0, -1000.0], b=[1.0, 1.0], c=[1.0, 1.0])
+        self.assertRaises(Exception, self.cost_fcn.compute_batch, kpis)
+        result = self.cost_fcn.compute_batch(kpis, raise_invalid=False)
+        self.assertFalse(np.isnan(result['total_cost'][0]))
+        self.assertTrue(np.isnan(result['total_cost'][1]))
+
 if __name__ == '__main__':
     import rosunit
     rosunit.unitrun(PKG, NAME, TestCostFunction)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# Copyright (c) 2016 The UUV Simulator Authors.
+# All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+PKG = 'uuv_simulation_evaluation'
+NAME = 'test_dataframe_io'
+
+import rospy
+import rostest
+import unittest
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas
+from uuv_bag_evaluation.dataframe_io import save_dataframe, load_dataframe, load_dataframes
+
+import roslib; roslib.load_manifest(PKG)
+
+
+class TestDataFrameIO(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        n = 1000
+        self.df = pandas.DataFrame(dict(
+            trajectory_actual_time=np.linspace(0, 10, n),
+            trajectory_pos_actual_x=np.random.randn(n).astype(np.float32),
+            n_samples=np.arange(n, dtype=np.int64),
+            group=['test' for _ in range(n)]),
+            columns=['trajectory_actual_time', 'trajectory_pos_actual_x', 'n_samples', 'group'])
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def assert_dataframe_equal(self, df):
+        self.assertEqual(list(df.columns), list(self.df.columns), 'Columns were not restored')
+        for c in self.df.columns:
+            self.assertEqual(df[c].dtype, self.df[c].dtype, 'Data type of <%s> was not restored' % c)
+            self.assertTrue(np.all(df[c].values == self.df[c].values), 'Values of <%s> were not restored' % c)
+
+    def test_npz(self):
+        filename = save_dataframe(self.df, os.path.join(self.output_dir, 'trajectory'), 'npz')
+        self.assertTrue(os.path.isfile(filename), 'File was not created')
+        self.assert_dataframe_equal(load_dataframe(filename))
+
+    def test_npy_mmap(self):
+        filename = save_dataframe(self.df, os.path.join(self.output_dir, 'trajectory'), 'npy')
+        self.assertTrue(os.path.isdir(filename), 'Directory was not created')
+        self.assert_dataframe_equal(load_dataframe(filename, mmap=True))
+
+    def test_select_columns(self):
+        filename = save_dataframe(self.df, os.path.join(self.output_dir, 'trajectory'), 'npz')
+        df = load_dataframe(filename, columns=['n_samples'])
+        self.assertEqual(list(df.columns), ['n_samples'], 'Invalid columns loaded')
+
+    def test_load_dir(self):
+        save_dataframe(self.df, os.path.join(self.output_dir, 'trajectory'), 'npz')
+        save_dataframe(self.df, os.path.join(self.output_dir, 'error'), 'npy')
+        dfs = load_dataframes(self.output_dir)
+        self.assertEqual(sorted(dfs.keys()), ['error', 'trajectory'], 'Data frames were not found')
+
+    def test_invalid_format(self):
+        with self.assertRaises(ValueError):
+            save_dataframe(self.df, os.path.join(self.output_dir, 'trajectory'), 'test')
+
+if __name__ == '__main__':
+    import rosunit
+    rosunit.unitrun(PKG, NAME, TestDataFrameIO)
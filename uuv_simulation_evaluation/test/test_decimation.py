@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# Copyright (c) 2016 The UUV Simulator Authors.
+# All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+PKG = 'uuv_simulation_evaluation'
+NAME = 'test_decimation'
+
+import rospy
+import rostest
+import unittest
+import numpy as np
+from uuv_bag_evaluation.data_parsers.decimation import decimate, get_path_indices
+
+import roslib; roslib.load_manifest(PKG)
+
+
+class TestDecimation(unittest.TestCase):
+    def setUp(self):
+        # One hour of data at 50 Hz with a single spike
+        self.t = np.arange(0, 3600, 0.02)
+        self.y = np.sin(0.1 * self.t) + 0.01 * np.random.randn(self.t.size)
+        self.y[12345] = 10.0
+        self.y[54321] = -10.0
+
+    def test_short_series_unchanged(self):
+        t, y = decimate(self.t[:100], self.y[:100], 2000)
+        self.assertEqual(t.size, 100, 'Short time series should not be decimated')
+        self.assertTrue(np.all(y == self.y[:100]), 'Values of short time series were changed')
+
+    def test_minmax(self):
+        t, y = decimate(self.t, self.y, 2000, method='minmax')
+        self.assertLessEqual(y.size, 2004, 'Too many samples after decimation')
+        self.assertEqual(np.max(y), 10.0, 'Maximum value was not preserved')
+        self.assertEqual(np.min(y), -10.0, 'Minimum value was not preserved')
+        self.assertEqual(t[0], self.t[0], 'First sample was not preserved')
+        self.assertEqual(t[-1], self.t[-1], 'Last sample was not preserved')
+        self.assertTrue(np.all(np.diff(t) > 0), 'Decimated time vector is not sorted')
+
+    def test_lttb(self):
+        t, y = decimate(self.t, self.y, 2000, method='lttb')
+        self.assertEqual(y.size, 2000, 'Invalid number of samples after decimation')
+        self.assertEqual(np.max(y), 10.0, 'Spike was not preserved')
+        self.assertEqual(np.min(y), -10.0, 'Spike was not preserved')
+        self.assertTrue(np.all(np.diff(t) > 0), 'Decimated time vector is not sorted')
+
+    def test_path(self):
+        path = np.vstack((np.cos(self.t), np.sin(self.t), self.y)).T
+        idx = get_path_indices(path, 3000)
+        self.assertLessEqual(idx.size, 3000 + 12, 'Too many samples after decimation')
+        self.assertIn(12345, idx, 'Path extreme was not preserved')
+
+    def test_invalid_method(self):
+        with self.assertRaises(ValueError):
+            decimate(self.t, self.y, 2000, method='test')
+
+if __name__ == '__main__':
+    import rosunit
+    rosunit.unitrun(PKG, NAME, TestDecimation)
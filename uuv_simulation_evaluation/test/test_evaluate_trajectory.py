@@ -69,6 +69,18 @@ class TestEvaluateTrajectory(unittest.TestCase):
         self.assertIn('computed_kpis.yaml', os.listdir(RESULTS_DIR), 'KPIs were not stored in file computed_kpis.yaml')
         self.assertIn('kpi_labels.yaml', os.listdir(RESULTS_DIR), 'KPIs labels were not stored in file kpis_labels.yaml')
 
+    def test_time_margin(self):
+        self.assertIn('recording.bag', os.listdir(ROOT_PATH), 'recording.bag cannot be found')
+
+        # The messages read before the time offset are only used as a
+        # margin and must not change the KPIs
+        kpis = Evaluation(ROSBAG, RESULTS_DIR, time_offset=2.0, time_margin=0.0).get_kpis()
+        margin_kpis = Evaluation(ROSBAG, RESULTS_DIR, time_offset=2.0, time_margin=1.5).get_kpis()
+
+        self.assertEqual(sorted(kpis.keys()), sorted(margin_kpis.keys()))
+        for tag in kpis:
+            self.assertAlmostEqual(kpis[tag], margin_kpis[tag], places=6, msg='KPI changed, tag=' + tag)
+
     def test_store_images(self):
         self.assertIn('recording.bag', os.listdir(ROOT_PATH), 'recording.bag cannot be found')
 
@@ -22,9 +22,23 @@ import rostest
 import unittest
 import numpy as np
 from uuv_bag_evaluation.metrics import KPI
+from uuv_bag_evaluation.context import EvaluationContext
 import roslib; roslib.load_manifest(PKG)
 
 
+class ConstantErrorSet(object):
+    # Error set with a constant error for all tags, used to test the
+    # evaluation context without a recording
+    def __init__(self, value):
+        self._value = value
+
+    def get_tags(self):
+        return ['x']
+
+    def get_data(self, tag, time_offset=0.0):
+        return [self._value for _ in range(10)]
+
+
 class TestKPIS(unittest.TestCase):
     def test_max_error_without_bag(self):
         error = [1.0 for _ in range(10)]
@@ -50,6 +64,33 @@ class TestKPIS(unittest.TestCase):
         self.assertIsNotNone(kpi, 'The KPI instance was not created properly')
         self.assertIsNotNone(kpi.compute(error), 'RMS error was not calculated properly')
 
+    def test_max_abs_thrust_without_bag(self):
+        thrusts = np.random.rand(4, 100) - 0.5
+        thrusts[2, 50] = -20.0
+        kpi = KPI.get_kpi('max_abs_thrust', False)
+        self.assertIsNotNone(kpi, 'The KPI instance was not created properly')
+        self.assertEqual(kpi.compute(thrusts), 20.0, 'Max. absolute thrust was not calculated properly')
+
+        # Thrust forces of each thruster with different number of samples
+        kpi = KPI.get_kpi('max_abs_thrust', False)
+        self.assertEqual(kpi.compute({0: thrusts[0, :10], 1: thrusts[2]}), 20.0,
+                         'Max. absolute thrust was not calculated properly')
+
+    def test_mean_abs_thrust_without_bag(self):
+        thrusts = np.ones((4, 100))
+        thrusts[1, :] = -3.0
+        kpi = KPI.get_kpi('mean_abs_thrust', False)
+        self.assertIsNotNone(kpi, 'The KPI instance was not created properly')
+        self.assertEqual(kpi.compute(thrusts), 3.0, 'Mean absolute thrust was not calculated properly')
+
+    def test_kpis_with_context(self):
+        # Each KPI uses the error set of its own evaluation context
+        contexts = [EvaluationContext(recording=object(), error_set=ConstantErrorSet(v))
+                    for v in [1.0, 2.0]]
+        kpis = [KPI.get_kpi('max_error', 'x', context=c) for c in contexts]
+        self.assertEqual([kpi.compute() for kpi in kpis], [1.0, 2.0],
+                         'KPIs were not computed with the data of their context')
+
 if __name__ == '__main__':
     import rosunit
     rosunit.unitrun(PKG, NAME, TestKPIS)
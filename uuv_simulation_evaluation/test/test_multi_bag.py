@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# Copyright (c) 2016 The UUV Simulator Authors.
+# All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+PKG = 'uuv_simulation_evaluation'
+NAME = 'test_multi_bag'
+
+import rospy
+import rostest
+import unittest
+import os
+import shutil
+import tempfile
+import rosbag
+from std_msgs.msg import Float64
+from uuv_bag_evaluation.multi_bag import MultiBag, get_bag_filenames
+from uuv_bag_evaluation.time_window import TimeWindowReader, get_time_window
+
+import roslib; roslib.load_manifest(PKG)
+
+
+class TestMultiBag(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        # Split recording with 12 files, the second topic is only recorded
+        # in the even files
+        self.n_files = 12
+        for i in range(self.n_files):
+            bag = rosbag.Bag(os.path.join(self.output_dir, 'recording_%d.bag' % i), 'w')
+            for j in range(10):
+                t = rospy.Time.from_sec(1 + i + 0.1 * j)
+                bag.write('/test/0/thrust', Float64(data=float(10 * i + j)), t)
+                if i % 2 == 0:
+                    bag.write('/test/1/thrust', Float64(data=float(10 * i + j)), t)
+            bag.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def test_bag_filenames(self):
+        filenames = ['recording_%d.bag' % i for i in range(self.n_files)]
+        # Split recording, files sorted by index
+        output = get_bag_filenames(os.path.join(self.output_dir, 'recording.bag'))
+        self.assertEqual([os.path.basename(f) for f in output], filenames)
+        # Glob pattern
+        output = get_bag_filenames(os.path.join(self.output_dir, '*.bag'))
+        self.assertEqual([os.path.basename(f) for f in output], filenames)
+        # List of files
+        output = get_bag_filenames([os.path.join(self.output_dir, f) for f in filenames[:2]])
+        self.assertEqual([os.path.basename(f) for f in output], filenames[:2])
+        self.assertEqual(get_bag_filenames(os.path.join(self.output_dir, 'none.bag')), [])
+
+    def test_read_messages(self):
+        bag = MultiBag([rosbag.Bag(f) for f in get_bag_filenames(
+            os.path.join(self.output_dir, 'recording.bag'))])
+
+        info = bag.get_type_and_topic_info()
+        self.assertEqual(info.topics['/test/0/thrust'].message_count, 10 * self.n_files)
+        self.assertEqual(info.topics['/test/1/thrust'].message_count, 5 * self.n_files)
+
+        t = [msg[2].to_sec() for msg in bag.read_messages()]
+        self.assertEqual(len(t), 15 * self.n_files)
+        self.assertEqual(t, sorted(t))
+
+        values = [msg.data for _, msg, _ in bag.read_messages('/test/0/thrust')]
+        self.assertEqual(values, [float(10 * i + j) for i in range(self.n_files) for j in range(10)])
+        bag.close()
+
+    def test_time_window(self):
+        self.assertEqual(get_time_window(0.0), (None, None))
+        self.assertEqual(get_time_window(5.0, 8.0, 1.0), (4.0, 9.0))
+
+        bag = TimeWindowReader(MultiBag([rosbag.Bag(f) for f in get_bag_filenames(
+            os.path.join(self.output_dir, 'recording.bag'))]), 4.0, 9.0)
+        t = [msg[2].to_sec() for msg in bag.read_messages('/test/0/thrust')]
+        self.assertEqual(len(t), 51)
+        self.assertGreaterEqual(min(t), 4.0)
+        self.assertLessEqual(max(t), 9.0)
+
+        # Requested interval inside the window
+        t = [msg[2].to_sec() for msg in bag.read_messages(
+            '/test/0/thrust', rospy.Time.from_sec(5.0), rospy.Time.from_sec(20.0))]
+        self.assertEqual(len(t), 41)
+        bag.close()
+
+if __name__ == '__main__':
+    import rosunit
+    rosunit.unitrun(PKG, NAME, TestMultiBag)
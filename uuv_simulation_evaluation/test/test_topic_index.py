@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# Copyright (c) 2016 The UUV Simulator Authors.
+# All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+PKG = 'uuv_simulation_evaluation'
+NAME = 'test_topic_index'
+
+import rospy
+import rostest
+import unittest
+import os
+import shutil
+import tempfile
+import rosbag
+from std_msgs.msg import Float64
+from geometry_msgs.msg import WrenchStamped
+from nav_msgs.msg import Odometry
+from uuv_bag_evaluation.data_parsers.topic_index import TopicIndex, get_topic_index
+
+import roslib; roslib.load_manifest(PKG)
+
+N_THRUSTERS = 20
+
+
+class TestTopicIndex(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.output_dir, 'recording.bag')
+        bag = rosbag.Bag(self.filename, 'w')
+        t = rospy.Time.from_sec(1)
+        for i in range(N_THRUSTERS):
+            bag.write('/rexrov/thrusters/%d/thrust' % i, Float64(data=1.0), t)
+            # Only the even thrusters have their input recorded
+            if i % 2 == 0:
+                bag.write('/rexrov/thrusters/%d/input' % i, Float64(data=1.0), t)
+        for i in range(4):
+            bag.write('/eca_a9/fins/%d/output' % i, Float64(data=1.0), t)
+        bag.write('/rexrov/thruster_manager/input_stamped', WrenchStamped(), t)
+        bag.write('/rexrov/pose_gt', Odometry(), t)
+        bag.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def test_topic_index(self):
+        bag = rosbag.Bag(self.filename)
+        index = TopicIndex(bag)
+
+        self.assertEqual(index.namespaces, ['eca_a9', 'rexrov'])
+        self.assertEqual(index.get_type('/rexrov/pose_gt'), 'nav_msgs/Odometry')
+        self.assertEqual(index.find_topic(msg_type='nav_msgs/Odometry'), '/rexrov/pose_gt')
+        self.assertEqual(index.find_topic(msg_type='geometry_msgs/WrenchStamped',
+                                          contains='thruster_manager'),
+                         '/rexrov/thruster_manager/input_stamped')
+        self.assertIsNone(index.find_topic(msg_type='geometry_msgs/WrenchStamped',
+                                           contains='wrench_perturbation'))
+        self.assertEqual(len(index.get_topics(namespace='eca_a9')), 4)
+
+        self.assertEqual(index.get_actuator_prefixes('thrusters'), ['/rexrov/thrusters'])
+        self.assertEqual(index.get_actuator_prefixes('fins'), ['/eca_a9/fins'])
+
+        thrust = index.get_actuator_topics('thrusters', 'thrust')
+        self.assertEqual([i for i, _ in thrust], list(range(N_THRUSTERS)))
+        self.assertEqual(thrust[17], (17, '/rexrov/thrusters/17/thrust'))
+        inputs = index.get_actuator_topics('thrusters', 'input')
+        self.assertEqual([i for i, _ in inputs], list(range(0, N_THRUSTERS, 2)))
+        self.assertEqual(index.get_actuator_topics('fins', 'input'), [])
+
+        # The index stored in the bag is reused
+        bag.topic_index = index
+        self.assertIs(get_topic_index(bag), index)
+        bag.close()
+
+    def test_odometry_topic(self):
+        filename = os.path.join(self.output_dir, 'odometry.bag')
+        bag = rosbag.Bag(filename, 'w')
+        t = rospy.Time.from_sec(1)
+        for topic in ['/rexrov/pose_gt', '/rexrov/pose_gt_ned', '/rexrov/odom']:
+            bag.write(topic, Odometry(), t)
+        bag.close()
+
+        bag = rosbag.Bag(filename)
+        self.assertEqual(TopicIndex(bag).find_odometry_topic(), '/rexrov/pose_gt')
+        bag.close()
+
+        bag = rosbag.Bag(self.filename)
+        self.assertEqual(TopicIndex(bag).find_odometry_topic(), '/rexrov/pose_gt')
+        self.assertIsNone(TopicIndex(bag).find_odometry_topic(namespace='eca_a9'))
+        bag.close()
+
+
+if __name__ == '__main__':
+    import rosunit
+    rosunit.unitrun(PKG, NAME, TestTopicIndex)
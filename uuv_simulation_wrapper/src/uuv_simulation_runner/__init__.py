@@ -14,3 +14,4 @@
 # limitations under the License.
 
 from .simulation_runner import SimulationRunner
+from . import trace_events
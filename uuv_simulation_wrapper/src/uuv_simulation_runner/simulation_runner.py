@@ -27,6 +27,7 @@ import socket
 import signal
 from threading import Timer
 from time import gmtime, strftime, sleep
+from . import trace_events
 
 ROS_DEFAULT_HOST = 'localhost'
 ROS_DEFAULT_PORT = 11311
@@ -46,7 +47,7 @@ class SimulationRunner(object):
 
     def __init__(self, params, task_filename, results_folder='./results',
                  record_all_results=False, add_folder_timestamp=True,
-                 log_filename=None, log_dir='logs'):
+                 log_filename=None, log_dir='logs', cpu_affinity=None):
         # Setting up the logging
         self._task_name = task_filename.split('/')[-1]
         self._task_name = self._task_name.split('.')[0]
@@ -142,6 +143,13 @@ class SimulationRunner(object):
         self._process = None
         self._process_children = list()
 
+        # Set of CPUs the simulation processes will be pinned to, if given
+        self._cpu_affinity = None
+        if cpu_affinity is not None:
+            assert len(cpu_affinity) > 0, 'CPU affinity list is empty'
+            self._cpu_affinity = sorted([int(cpu) for cpu in cpu_affinity])
+            self._logger.info('CPU affinity=%s' % str(self._cpu_affinity))
+
         signal.signal(signal.SIGTERM, self.signal_handler)
         signal.signal(signal.SIGINT, self.signal_handler)
 
@@ -172,6 +180,14 @@ class SimulationRunner(object):
     def timeout(self):
         return self._simulation_timeout
 
+    @property
+    def process_timeout(self):
+        return self._timeout
+
+    @property
+    def cpu_affinity(self):
+        return self._cpu_affinity
+
     def signal_handler(self, signal, handler):
         self._logger.warning('SIGNAL RECEIVED=%d', int(signal))
         self.processes_interrupted = True
@@ -276,6 +292,22 @@ class SimulationRunner(object):
         except Exception as e:
             self._logger.error('Error in on_terminate function, message=' + str(e))
 
+    def _set_child_cpu_affinity(self):
+        # Called in the child process before the command is executed, all
+        # processes spawned by roslaunch will inherit the CPU affinity
+        psutil.Process().cpu_affinity(self._cpu_affinity)
+
+    def _set_cpu_affinity(self, processes):
+        if self._cpu_affinity is None:
+            return
+        for p in processes:
+            try:
+                if p.cpu_affinity() != self._cpu_affinity:
+                    p.cpu_affinity(self._cpu_affinity)
+            except Exception as e:
+                self._logger.warning('Error setting CPU affinity of process '
+                                     '(PID=%d), message=%s' % (p.pid, str(e)))
+
     def _create_script_file(self, output_dir, cmd):
         try:
             filename = os.path.join(output_dir, 'run_simulation.sh')
@@ -296,7 +328,34 @@ class SimulationRunner(object):
             else:
                 self._logger.info('Recording directory has already been deleted, path=' + rec_path)
 
-    def run(self, params=dict(), timeout=None):
+    def _wait_process(self, is_cancelled):
+        # Wait for the simulation process, polling the cancellation function
+        start_time = time.time()
+        while True:
+            try:
+                return self._process.wait(timeout=1)
+            except psutil.TimeoutExpired:
+                if is_cancelled():
+                    self._logger.warning('Simulation cancelled, killing process tree...')
+                    self.processes_interrupted = True
+                    self._kill_process()
+                    return self._process.wait(timeout=10)
+                if time.time() - start_time > self._timeout:
+                    raise
+
+    def run(self, params=dict(), timeout=None, budget=None, is_cancelled=None):
+        """Run the simulation with the parameters `params`. `timeout` is the
+        process timeout, given in seconds. `budget` is the fraction of the
+        simulation horizon (the `timeout` parameter of the task) to be
+        simulated, used for low fidelity evaluations of the parameters. The
+        process timeout is scaled by the budget as well. `is_cancelled` is
+        an optional function polled while the simulation runs, the
+        simulation is interrupted once it returns True.
+        """
+        assert budget is None or 0 < budget <= 1, 'Budget must be in the interval (0, 1]'
+        trace_events.add_event('simulation_runner.run', 'B', 'runner',
+                               args=dict(task=self._task_name,
+                                         params_hash=trace_events.get_params_hash(params)))
         if len(params.keys()) > 0:
             for tag in self._params:
                 if tag not in params:
@@ -340,6 +399,14 @@ class SimulationRunner(object):
             with open(task_filename, 'r') as task_file:
                 task = yaml.load(task_file)
                 self._logger.info('Running task: ' + task['id'])
+                if budget is not None and budget < 1:
+                    # Shorten the simulation horizon of the task, other
+                    # timeouts (e.g. unpause_timeout) are not scaled
+                    if 'timeout' in task['execute']['params'] and 'timeout' not in self._params:
+                        task['execute']['params']['timeout'] *= budget
+                    if timeout is not None:
+                        timeout *= budget
+                    self._logger.info('Simulation budget=%.2f' % budget)
                 # Setting the filename to the resulting rosbag
                 self._recording_filename = os.path.join(self._sim_results_dir, 'recording.bag')
                 self._logger.info('ROS bag: ' + self._recording_filename)
@@ -358,7 +425,7 @@ class SimulationRunner(object):
                         if task['execute']['params'][param] > 0 and timeout is None:
                             # Set the process timeout to 5 times the given simulation timeout
                             self._simulation_timeout = task['execute']['params'][param]
-                            self._timeout = 5 * int(self._simulation_timeout)
+                            self._timeout = 5 * self._simulation_timeout
                             self._logger.info('Simulation timeout t=%.f s' % self._simulation_timeout)
                         else:
                             self._logger.error('Invalid timeout = %.f' % task['execute']['params'][param])
@@ -377,7 +444,7 @@ class SimulationRunner(object):
                         if task['execute']['params'][param] > 0 and timeout is None:
                             # Set the process timeout to 5 times the given simulation timeout
                             self._simulation_timeout = task['execute']['params'][param]
-                            self._timeout = 5 * int(self._simulation_timeout)
+                            self._timeout = 5 * self._simulation_timeout
                             self._logger.info('Simulation timeout t=%.f s' % self._simulation_timeout)
                         else:
                             self._logger.error('Invalid timeout = %.f' % task['execute']['params'][param])
@@ -401,7 +468,14 @@ class SimulationRunner(object):
                 # Create script with the command being run for eventual manual rerun
                 self._create_script_file(self._sim_results_dir, cmd)
                 # Start process
-                self._process = psutil.Popen(cmd, shell=True, stdout=logfile, stderr=logfile, env=os.environ.copy())
+                if self._cpu_affinity is not None:
+                    self._process = psutil.Popen(cmd, shell=True, stdout=logfile, stderr=logfile, env=os.environ.copy(),
+                                                 preexec_fn=self._set_child_cpu_affinity)
+                else:
+                    self._process = psutil.Popen(cmd, shell=True, stdout=logfile, stderr=logfile, env=os.environ.copy())
+                trace_events.add_event('simulation_process', 'B', 'runner',
+                                       args=dict(task=self._task_name,
+                                                 pid=self._process.pid))
 
                 proc = psutil.Process(self._process.pid)
                 self._logger.info('Process created (Name=%s, PID=%d)' % (proc.name(), proc.pid))
@@ -410,13 +484,21 @@ class SimulationRunner(object):
                 sleep(1)
                 self._process_children = proc.children(recursive=True)
                 self._process_children.append(proc)
+                # Make sure that processes that might have reset their CPU
+                # affinity are kept in the assigned CPU set
+                self._set_cpu_affinity(self._process_children)
 
                 # Start process timeout, which is a security measure in case something happens, e.g. roscore not responding
                 # If the process timeout is reached before the simulation process is finished, this function
                 # will return false
                 timer = Timer(self._timeout, self._kill_process)
                 timer.start()
-                success = self._process.wait(timeout=self._timeout)
+                if is_cancelled is None:
+                    success = self._process.wait(timeout=self._timeout)
+                else:
+                    success = self._wait_process(is_cancelled)
+                trace_events.add_event('simulation_process', 'E', 'runner',
+                                       args=dict(return_code=success))
 
                 if success == 0:
                     self._logger.info('Simulation finished successfully')
@@ -427,6 +509,9 @@ class SimulationRunner(object):
         except Exception as e:
             self._logger.error('Error while running the simulation, message=' + str(e))
             result_ok = False
+            if self._process is not None:
+                trace_events.add_event('simulation_process', 'E', 'runner',
+                                       args=dict(message=str(e)))
             self._kill_process()
 
         self._unlock_port(self._ros_port)
@@ -437,4 +522,6 @@ class SimulationRunner(object):
 
         self._sim_counter += 1
         self._process = None
+        trace_events.add_event('simulation_runner.run', 'E', 'runner',
+                               args=dict(success=result_ok))
         return result_ok
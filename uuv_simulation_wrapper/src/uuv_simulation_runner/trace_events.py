@@ -0,0 +1,139 @@
+# Copyright (c) 2016 The UUV Simulator Authors.
+# All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Trace events in the JSON array format of the Chrome trace viewer, which can
+be opened in chrome://tracing or Perfetto. The trace file is set through the
+environment variable UUV_TRACE_FILE, so that all processes started by
+an optimization campaign append their events to the same file. Each event
+is written as one line with a single append operation, the closing bracket
+of the array is optional for the trace viewers.
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+
+TRACE_FILE_ENV = 'UUV_TRACE_FILE'
+
+
+def set_trace_file(filename):
+    # Stored as environment variable to be inherited by child processes
+    if filename is None:
+        if TRACE_FILE_ENV in os.environ:
+            del os.environ[TRACE_FILE_ENV]
+        return
+    filename = os.path.abspath(filename)
+    trace_dir = os.path.dirname(filename)
+    if not os.path.isdir(trace_dir):
+        os.makedirs(trace_dir)
+    os.environ[TRACE_FILE_ENV] = filename
+
+
+def get_trace_file():
+    return os.environ.get(TRACE_FILE_ENV, None)
+
+
+def is_enabled():
+    return get_trace_file() is not None
+
+
+def get_timestamp(t=None):
+    # Timestamps in microseconds, wall clock time is used to align the
+    # events of different processes
+    if t is None:
+        t = time.time()
+    return int(t * 1e6)
+
+
+def get_params_hash(params):
+    if params is None:
+        return None
+    text = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.md5(text.encode('utf-8')).hexdigest()[:8]
+
+
+def _write(line):
+    filename = get_trace_file()
+    if filename is None:
+        return
+    try:
+        # The first process to create the file writes the opening bracket
+        fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        os.write(fd, b'[\n')
+        os.close(fd)
+    except OSError:
+        pass
+    fd = os.open(filename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line.encode('utf-8'))
+    finally:
+        os.close(fd)
+
+
+def add_event(name, ph, cat='uuv', ts=None, dur=None, args=None, pid=None,
+              tid=None):
+    if not is_enabled():
+        return
+    event = dict(name=name,
+                 ph=ph,
+                 cat=cat,
+                 ts=get_timestamp() if ts is None else ts,
+                 pid=os.getpid() if pid is None else pid,
+                 tid=threading.current_thread().ident if tid is None else tid)
+    if dur is not None:
+        event['dur'] = dur
+    if args is not None:
+        event['args'] = args
+    try:
+        _write(json.dumps(event, default=str) + ',\n')
+    except Exception as e:
+        # Tracing must never interrupt the optimization
+        print('Error writing trace event, message=' + str(e))
+
+
+def add_instant_event(name, cat='uuv', args=None):
+    add_event(name, 'i', cat, args=args)
+
+
+def add_complete_event(name, start_time, duration, cat='uuv', args=None):
+    # Start time and duration in seconds
+    add_event(name, 'X', cat, ts=get_timestamp(start_time),
+              dur=int(duration * 1e6), args=args)
+
+
+def add_counter_event(name, values, cat='uuv'):
+    add_event(name, 'C', cat, args=values)
+
+
+def set_process_name(name):
+    add_event('process_name', 'M', args=dict(name=name))
+
+
+def set_thread_name(name):
+    add_event('thread_name', 'M', args=dict(name=name))
+
+
+@contextmanager
+def trace_span(name, cat='uuv', args=None):
+    if not is_enabled():
+        yield
+        return
+    add_event(name, 'B', cat, args=args)
+    try:
+        yield
+    finally:
+        add_event(name, 'E', cat)
@@ -39,6 +39,7 @@ PARAMS = dict(Kp=[11993.888, 11993.888, 11993.888, 19460.069, 19460.069, 19460.0
 ROSPACK_INST = RosPack()
 ROOT_PATH = os.path.join(ROSPACK_INST.get_path(PKG), 'test')
 OCEAN_WORLD_TASK = os.path.join(ROOT_PATH, 'example_start_ocean_world.yaml')
+FAKE_SIMULATION_TASK = os.path.join(ROOT_PATH, 'example_fake_simulation.yaml')
 OUTPUT_DIR = '/tmp'
 RESULTS_DIR = os.path.join(OUTPUT_DIR, 'results')
 
@@ -83,6 +84,26 @@ class TestRunTask(unittest.TestCase):
             self.assertTrue(success, 'Simulation returned with error, flag=%s, timeout=%s' % (str(success), str(runner.process_timeout_triggered)))
             del runner
 
+    def test_fake_simulation(self):
+        runner = SimulationRunner(PARAMS, FAKE_SIMULATION_TASK, RESULTS_DIR, True)
+        success = runner.run(PARAMS)
+        self.assertTrue(success, 'Fake simulation returned with error')
+        self.assertIn('recording.bag', os.listdir(runner.current_sim_results_dir), 'recording.bag cannot be found')
+        del runner
+
+    def test_budget(self):
+        runner = SimulationRunner(PARAMS, FAKE_SIMULATION_TASK, RESULTS_DIR, True)
+        success = runner.run(PARAMS, budget=0.5)
+        self.assertTrue(success, 'Fake simulation returned with error')
+        # The timeout parameter of the task is 2 s
+        self.assertEqual(runner.timeout, 1.0, 'Simulation timeout was not scaled by the budget')
+        del runner
+
+        runner = SimulationRunner(PARAMS, FAKE_SIMULATION_TASK, RESULTS_DIR, True)
+        runner.run(PARAMS, timeout=30, budget=0.5)
+        self.assertEqual(runner.process_timeout, 15.0, 'Process timeout was not scaled by the budget')
+        del runner
+
 
 if __name__ == '__main__':
     import rosunit
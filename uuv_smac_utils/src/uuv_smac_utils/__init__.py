@@ -17,4 +17,7 @@ from opt_configuration import OptConfiguration
 from simulation_pool import N_SIMULATION_RUNS, N_CRASHES, N_SUCCESS, \
     run_simulation, start_simulation_pool, stop_simulation_pool
 from utils import SIMULATION_LOGGER, init_logger, parse_param_input, \
-    SIM_SUCCESS, SIM_CRASHED
+    SIM_SUCCESS, SIM_CRASHED, SIM_CANCELLED, get_cpu_sets
+from task_aggregator import TaskAggregator
+from multi_fidelity import MultiFidelitySchedule
+from campaign import index_campaign, save_index, load_index, recost
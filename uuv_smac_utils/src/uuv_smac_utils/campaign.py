@@ -0,0 +1,221 @@
+# Copyright (c) 2016 The UUV Simulator Authors.
+# All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Index of the KPIs stored by an optimization or batch campaign and offline
+re-costing of the indexed runs with a new cost function.
+
+The index is a table with one row per simulation run, the columns
+`configuration` (parameters of the run), `task`, `budget` (fraction of the
+simulation horizon), `results_dir` and `source`, and one column per KPI. It is built from the `computed_kpis.yaml`
+files of the results directories or, if no results directories were
+stored, from the `smac_iteration_data.json` files of SMAC.
+"""
+import os
+import glob
+import re
+import json
+import yaml
+import numpy
+from uuv_bag_evaluation.dataframe_io import save_dataframe, load_dataframe
+from .task_aggregator import TaskAggregator
+
+KPIS_FILENAME = 'computed_kpis.yaml'
+SMAC_RESULT_FILENAME = 'smac_result.yaml'
+SMAC_ITERATION_FILENAME = 'smac_iteration_data.json'
+
+INDEX_COLUMNS = ['configuration', 'task', 'budget', 'results_dir', 'source']
+
+# Columns of the SMAC iteration data that are not KPIs
+ITERATION_COLUMNS = ['tasks', 'iteration', 'norm', 'total_cost', 'budget',
+                     'fidelity_level']
+
+
+def _natural_keys(text):
+    return [int(c) if c.isdigit() else c for c in re.split(r'(\d+)', text)]
+
+
+def get_configuration_label(params):
+    """Return the label of a configuration from its parameters."""
+    if params is None or len(params) == 0:
+        return ''
+    return ', '.join('%s=%s' % (tag, str(params[tag])) for tag in sorted(params))
+
+
+def _read_results_dir(results_dir):
+    with open(os.path.join(results_dir, KPIS_FILENAME), 'r') as kpi_file:
+        kpis = yaml.safe_load(kpi_file)
+    if not isinstance(kpis, dict):
+        return None
+
+    task = None
+    params = None
+    budget = 1.0
+    if os.path.isfile(os.path.join(results_dir, SMAC_RESULT_FILENAME)):
+        with open(os.path.join(results_dir, SMAC_RESULT_FILENAME), 'r') as smac_file:
+            smac_result = yaml.load(smac_file)
+        if isinstance(smac_result, dict) and 'task' in smac_result:
+            task = os.path.basename(str(smac_result['task']))
+        if isinstance(smac_result, dict) and smac_result.get('budget', None) is not None:
+            budget = float(smac_result['budget'])
+
+    if os.path.isfile(os.path.join(results_dir, 'task.yml')):
+        with open(os.path.join(results_dir, 'task.yml'), 'r') as task_file:
+            task_data = yaml.load(task_file)
+        if isinstance(task_data, dict):
+            if task is None and 'id' in task_data:
+                task = str(task_data['id'])
+            if 'execute' in task_data and 'params' in task_data['execute']:
+                params = task_data['execute']['params']
+
+    # Parameters set by the simulation runner take precedence over the
+    # parameters of the task
+    param_files = sorted(glob.glob(os.path.join(results_dir, 'params_*.yml')),
+                         key=_natural_keys)
+    if len(param_files):
+        with open(param_files[-1], 'r') as param_file:
+            params = yaml.safe_load(param_file)
+
+    row = dict(configuration=get_configuration_label(params),
+               task=os.path.basename(results_dir) if task is None else task,
+               budget=budget,
+               results_dir=results_dir,
+               source=KPIS_FILENAME)
+    for tag in kpis:
+        row[tag] = float(kpis[tag])
+    return row
+
+
+def _read_iteration_data(filename, parameters=None):
+    with open(filename, 'r') as data_file:
+        data = json.load(data_file)
+    # Data frame stored by pandas as {column: {row: value}}
+    rows = sorted(data['tasks'].keys(), key=_natural_keys)
+    kpi_tags = [tag for tag in data if tag not in ITERATION_COLUMNS and
+                not tag.startswith('weight_') and not tag.startswith('cost_') and
+                (parameters is None or tag not in parameters)]
+
+    output = list()
+    for r in rows:
+        if parameters is not None:
+            configuration = get_configuration_label(
+                dict((tag, data[tag][r]) for tag in parameters if tag in data))
+        else:
+            configuration = 'iteration_%d' % int(data['iteration'][r])
+        row = dict(configuration=configuration,
+                   task=str(data['tasks'][r]),
+                   budget=float(data['budget'][r]) if 'budget' in data else 1.0,
+                   results_dir=os.path.dirname(os.path.abspath(filename)),
+                   source=SMAC_ITERATION_FILENAME)
+        for tag in kpi_tags:
+            try:
+                row[tag] = float(data[tag][r])
+            except (TypeError, ValueError):
+                continue
+        output.append(row)
+    return output
+
+
+def index_campaign(root_dir, parameters=None):
+    """Build the KPI index of all runs stored under `root_dir`. The
+    `parameters` are the names of the optimization parameters, used to
+    label the configurations read from the SMAC iteration data (the
+    configurations are labeled by iteration otherwise).
+    """
+    import pandas
+    assert os.path.isdir(root_dir), 'Invalid campaign directory, dir=%s' % root_dir
+    rows = list()
+    iteration_files = list()
+    for path, dirs, files in os.walk(root_dir):
+        dirs.sort(key=_natural_keys)
+        if KPIS_FILENAME in files:
+            row = _read_results_dir(path)
+            if row is not None:
+                rows.append(row)
+        if SMAC_ITERATION_FILENAME in files:
+            iteration_files.append(os.path.join(path, SMAC_ITERATION_FILENAME))
+
+    # The iteration data repeats the KPIs of the cost function stored in
+    # the results directories, it is only used if these were not stored
+    if len(rows) == 0:
+        for filename in iteration_files:
+            rows += _read_iteration_data(filename, parameters)
+
+    kpi_tags = sorted(set(tag for row in rows for tag in row
+                          if tag not in INDEX_COLUMNS))
+    data = dict((c, [row[c] for row in rows]) for c in INDEX_COLUMNS)
+    for tag in kpi_tags:
+        data[tag] = numpy.array([row.get(tag, numpy.nan) for row in rows],
+                                dtype=float)
+    return pandas.DataFrame(data, columns=INDEX_COLUMNS + kpi_tags)
+
+
+def save_index(index, filename, file_format='npz'):
+    """Store the campaign index in a columnar format, see
+    `uuv_bag_evaluation.dataframe_io`. Returns the name of the file.
+    """
+    return save_dataframe(index, filename, file_format)
+
+
+def load_index(filename, columns=None):
+    """Load a campaign index. If `columns` is given, only the index columns
+    and these KPI columns are loaded.
+    """
+    if columns is not None:
+        columns = INDEX_COLUMNS + [c for c in columns if c not in INDEX_COLUMNS]
+    return load_dataframe(filename, columns=columns)
+
+
+def recost(index, cost_fcn, tasks_eval_fcn='numpy.mean(costs)', task_weights=None):
+    """Compute the cost of all runs of the campaign index with the cost
+    function `cost_fcn` (a `CostFunction` with its constraints) and rank
+    the configurations by the aggregated cost of their tasks, computed with
+    the task evaluation function `tasks_eval_fcn` and the `task_weights`
+    (see `TaskAggregator`).
+
+    Returns the runs with their cost, cost terms and constraint penalties,
+    and the configurations sorted by cost (columns `rank`,
+    `configuration`, `cost` and `n_tasks`). Runs with invalid KPIs have a
+    NaN cost and their configurations are ranked last.
+    """
+    import pandas
+    aggregator = TaskAggregator(tasks_eval_fcn, task_weights)
+    result = cost_fcn.compute_batch(index, raise_invalid=False)
+
+    runs = index[INDEX_COLUMNS].copy()
+    runs['cost'] = result['total_cost']
+    for tag in sorted(result['terms']):
+        runs['cost_' + tag] = result['terms'][tag]
+    for tag in sorted(result['constraints']):
+        runs[tag] = result['constraints'][tag]
+
+    configurations = list()
+    costs = list()
+    n_tasks = list()
+    for configuration, group in runs.groupby('configuration', sort=False):
+        configurations.append(configuration)
+        n_tasks.append(len(group))
+        if group['cost'].isnull().any():
+            costs.append(numpy.nan)
+        else:
+            costs.append(aggregator(group['cost'].values,
+                                    aggregator.get_weights(group['task'].values)))
+
+    ranking = pandas.DataFrame(dict(configuration=configurations,
+                                    cost=costs,
+                                    n_tasks=n_tasks),
+                               columns=['configuration', 'cost', 'n_tasks'])
+    ranking = ranking.sort_values('cost', na_position='last').reset_index(drop=True)
+    ranking.insert(0, 'rank', numpy.arange(1, len(ranking) + 1))
+    return runs, ranking
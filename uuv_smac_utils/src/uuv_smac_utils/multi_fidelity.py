@@ -0,0 +1,145 @@
+# Copyright (c) 2016 The UUV Simulator Authors.
+# All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Multi-fidelity evaluation of the parameters proposed by SMAC, following an
+asynchronous successive halving scheme. Each configuration is first
+evaluated with a low budget (a fraction of the simulation horizon and of
+the tasks) and only promoted to the next budget level if its cost is among
+the best `1 / eta` of the costs of the previous configurations at that
+level. The configuration is set in the optimization configuration file as
+
+    multi_fidelity:
+      budgets: [0.25, 0.5, 1.0]         # Fraction of the simulation horizon
+      task_fractions: [0.5, 1.0, 1.0]   # Fraction of the tasks (optional)
+      eta: 3
+      min_results: 3                    # Results needed before pruning (optional)
+      history_file: multi_fidelity_history.json
+
+The `timeout` parameter of the tasks, the process timeout and the
+`evaluation_end_time` are scaled by the budget of the level.
+
+The costs of all levels are stored in the history file, so that the
+promotion thresholds persist between the calls of the SMAC wrapper.
+"""
+import os
+import json
+import yaml
+import numpy
+from .utils import SIM_SUCCESS
+
+HISTORY_FILENAME = 'multi_fidelity_history.json'
+
+
+class MultiFidelitySchedule(object):
+    def __init__(self, config=None):
+        if config is None:
+            config = dict()
+        self._budgets = [float(b) for b in config.get('budgets', [1.0])]
+        assert len(self._budgets) > 0, 'No budgets given'
+        assert all(0 < b <= 1 for b in self._budgets), 'Budgets must be in the interval (0, 1]'
+        assert sorted(self._budgets) == self._budgets, 'Budgets must be given in increasing order'
+        assert self._budgets[-1] == 1, 'The last budget must be the full simulation horizon'
+
+        self._task_fractions = [float(f) for f in config.get(
+            'task_fractions', [1.0 for _ in self._budgets])]
+        assert len(self._task_fractions) == len(self._budgets), \
+            'Number of task fractions and budgets is different'
+        assert all(0 < f <= 1 for f in self._task_fractions), \
+            'Task fractions must be in the interval (0, 1]'
+        assert self._task_fractions[-1] == 1, 'The last level must include all tasks'
+
+        self._eta = float(config.get('eta', 3))
+        assert self._eta > 1, 'eta must be greater than one'
+        self._min_results = int(config.get('min_results', self._eta))
+        self._history_file = config.get('history_file', HISTORY_FILENAME)
+
+    @property
+    def n_levels(self):
+        return len(self._budgets)
+
+    def get_budget(self, level):
+        return self._budgets[level]
+
+    def get_tasks(self, level, tasks):
+        """Return the first tasks of the list evaluated at this level."""
+        n_tasks = int(numpy.ceil(self._task_fractions[level] * len(tasks)))
+        return tasks[:max(1, n_tasks)]
+
+    def check_horizon(self, tasks, time_offset=0.0, end_time=None):
+        """Check that the evaluation window of each task, starting at
+        `time_offset`, is not empty for the shortened simulation horizon
+        of every level.
+        """
+        for task in tasks:
+            with open(task, 'r') as task_file:
+                task_data = yaml.safe_load(task_file)
+            try:
+                horizon = float(task_data['execute']['params']['timeout'])
+            except (KeyError, TypeError, ValueError):
+                # The horizon is not set in the task file
+                continue
+            if end_time is not None:
+                horizon = min(horizon, float(end_time))
+            for level in range(self.n_levels):
+                if task not in self.get_tasks(level, tasks):
+                    continue
+                assert self._budgets[level] * horizon > time_offset, \
+                    'Evaluation window is empty for budget=%.2f, task=%s, ' \
+                    'horizon=%.2f s, time offset=%.2f s' % (
+                        self._budgets[level], task, self._budgets[level] * horizon,
+                        time_offset)
+
+    def load_history(self):
+        if not os.path.isfile(self._history_file):
+            return list()
+        with open(self._history_file, 'r') as history_file:
+            return json.load(history_file)
+
+    def get_costs(self, level):
+        return [item['cost'] for item in self.load_history()
+                if item['level'] == level and item['status'] == SIM_SUCCESS]
+
+    def add_result(self, level, cost, status, params=None):
+        history = self.load_history()
+        history.append(dict(level=level,
+                            budget=self._budgets[level],
+                            cost=float(cost),
+                            status=status,
+                            params=params))
+        with open(self._history_file, 'w') as history_file:
+            json.dump(history, history_file)
+
+    def promote(self, level, cost):
+        """Return True if a configuration with the cost `cost` at this
+        level is evaluated at the next level. Must be called before the
+        result is added to the history.
+        """
+        if level >= self.n_levels - 1:
+            return False
+        costs = self.get_costs(level)
+        if len(costs) < self._min_results:
+            return True
+        return cost <= numpy.percentile(costs, 100. / self._eta)
+
+    def get_pruned_cost(self, cost):
+        """Return the cost reported to the optimizer for a configuration that
+        was not promoted to the full budget. The low budget cost is not
+        comparable to the full budget costs, so it is bounded below by the
+        worst full budget cost.
+        """
+        costs = self.get_costs(self.n_levels - 1)
+        if len(costs) == 0:
+            return cost
+        return max(cost, max(costs))
@@ -15,9 +15,11 @@
 import os
 import yaml
 import re
-import numpy
 from uuv_cost_function import CostFunction
+from uuv_simulation_runner import trace_events
 from .utils import init_logger, parse_param_input, SIMULATION_LOGGER
+from .task_aggregator import TaskAggregator
+from .multi_fidelity import MultiFidelitySchedule
 
 
 class OptConfiguration(object):
@@ -51,6 +53,27 @@ class OptConfiguration(object):
 
         SIMULATION_LOGGER.info('Max. number of processes=%d' % self.max_num_processes)
 
+        # Pin each simulation worker slot to a disjoint set of CPUs
+        self.cpu_affinity = False
+        if 'cpu_affinity' in self._opt_config:
+            self.cpu_affinity = bool(self._opt_config['cpu_affinity'])
+
+        self.cpus_per_process = None
+        if 'cpus_per_process' in self._opt_config:
+            self.cpus_per_process = self._opt_config['cpus_per_process']
+            assert self.cpus_per_process > 0, \
+                'Number of CPUs per simulation process must be greater than zero'
+
+        SIMULATION_LOGGER.info('Use CPU affinity? ' + str(self.cpu_affinity))
+
+        # Trace file for the events of the optimization campaign, a trace
+        # file already set in the environment takes precedence
+        if 'trace_file' in self._opt_config and not trace_events.is_enabled():
+            trace_events.set_trace_file(self._opt_config['trace_file'])
+        self.trace_file = trace_events.get_trace_file()
+
+        SIMULATION_LOGGER.info('Trace file=' + str(self.trace_file))
+
         if 'log_filename' not in self._opt_config:
             self._log_filename = None
         else:
@@ -108,16 +131,62 @@ class OptConfiguration(object):
 
         assert self.evaluation_time_offset >= 0
 
+        # Optional end of the evaluation window and margin of the window
+        # used when reading the recording
+        self.evaluation_end_time = None
+        if 'evaluation_end_time' in self._opt_config:
+            self.evaluation_end_time = self._opt_config['evaluation_end_time']
+
+        self.evaluation_time_margin = 1.0
+        if 'evaluation_time_margin' in self._opt_config:
+            self.evaluation_time_margin = self._opt_config['evaluation_time_margin']
+
+        assert self.evaluation_time_margin >= 0
+
+        # Multi-fidelity optimization, the parameters are evaluated with
+        # increasing simulation budgets
+        self.multi_fidelity = None
+        if 'multi_fidelity' in self._opt_config:
+            self.multi_fidelity = self._opt_config['multi_fidelity']
+            # The evaluation must start before the shortest horizon ends
+            MultiFidelitySchedule(self.multi_fidelity).check_horizon(
+                self.tasks, self.evaluation_time_offset, self.evaluation_end_time)
+
+        # Fraction of the simulation horizon of the current simulations
+        self.simulation_budget = None
+
         self.constraints = None
         self.cost_fcn = None
 
         self.params = None
 
-        self.tasks_eval_fcn = 'numpy.mean(%s)'
+        self.tasks_eval_fcn = 'numpy.mean(costs)'
 
         if 'task_eval_fcn' in self._opt_config:
             self.tasks_eval_fcn = self._opt_config['task_eval_fcn']
 
+        # Weights of each task, by task filename or basename
+        self.task_weights = None
+        if 'task_weights' in self._opt_config:
+            self.task_weights = self._opt_config['task_weights']
+
+        # The task evaluation function is parsed and compiled only once
+        self.task_aggregator = TaskAggregator(self.tasks_eval_fcn, self.task_weights)
+        SIMULATION_LOGGER.info('Task evaluation function=' + self.task_aggregator.expression)
+
+        # Adaptive capping, the remaining tasks of a configuration are
+        # cancelled once its cost cannot be lower than the incumbent cost
+        # multiplied by the capping factor
+        self.adaptive_capping = False
+        if 'adaptive_capping' in self._opt_config:
+            self.adaptive_capping = bool(self._opt_config['adaptive_capping'])
+
+        self.capping_factor = 1.0
+        if 'capping_factor' in self._opt_config:
+            self.capping_factor = float(self._opt_config['capping_factor'])
+
+        assert self.capping_factor >= 1, 'Capping factor must be greater or equal to one'
+
         if 'cost_fcn' in self._opt_config:
             SIMULATION_LOGGER.info('Initializing cost function')
             self.cost_fcn = CostFunction()
@@ -146,6 +215,12 @@ class OptConfiguration(object):
             
         SIMULATION_LOGGER.info('Cost function norm=' + str(self.cost_fcn.norm))
 
+        # Logging of the cost function terms (full, summary or off)
+        if 'cost_fcn_log_mode' in self._opt_config:
+            self.cost_fcn.set_log_mode(self._opt_config['cost_fcn_log_mode'])
+
+        SIMULATION_LOGGER.info('Cost function log mode=' + self.cost_fcn.log_mode)
+
         if 'constraints' in self._opt_config:
             self.constraints = self._opt_config['constraints']
             if isinstance(self.constraints, list):                
@@ -163,6 +238,21 @@ class OptConfiguration(object):
             else:
                 SIMULATION_LOGGER.error('Invalid input constraints list')
                 raise Exception('Invalid input constraints list')
+
+        # The lower bound of the cost used for the capping assumes that the
+        # aggregation is monotone and the costs of the tasks not negative
+        if self.adaptive_capping and not self.task_aggregator.is_monotone:
+            SIMULATION_LOGGER.warning('Adaptive capping disabled, the task evaluation '
+                                      'function is not monotone, expression=' +
+                                      self.task_aggregator.expression)
+            self.adaptive_capping = False
+
+        if self.adaptive_capping and self.cost_fcn is not None and \
+                not self.cost_fcn.is_non_negative():
+            SIMULATION_LOGGER.warning('Adaptive capping disabled, the constraints of the '
+                                      'cost function can be negative, constraints=' +
+                                      str([c.__class__.__name__ for c in self.cost_fcn.constraints]))
+            self.adaptive_capping = False
                 
 
     @staticmethod
@@ -204,5 +294,7 @@ class OptConfiguration(object):
         return self.cost_fcn.compute_constraints()
 
     def evaluate_tasks(self, task_costs):
-        assert isinstance(task_costs, list), 'Task costs must be given as a list'
-        return eval(self.tasks_eval_fcn % task_costs)
+        """Aggregate the task costs, given as a dictionary of costs per task
+        filename (weighted with `task_weights`), a list or an array.
+        """
+        return self.task_aggregator.evaluate(task_costs)
@@ -23,21 +23,25 @@ from copy import deepcopy
 from time import sleep
 import random
 import shutil
+import psutil
 from .utils import *
-from uuv_simulation_runner import SimulationRunner
+from uuv_simulation_runner import SimulationRunner, trace_events
 from uuv_bag_evaluation import Evaluation
-from multiprocessing import Pool, Lock, Value
+from uuv_bag_evaluation.multi_bag import get_bag_filenames
+from multiprocessing import Pool, Value
 from .opt_configuration import OptConfiguration
 
 N_SIMULATION_RUNS = Value('i', 0)
 N_SUCCESS = Value('i', 0)
 N_CRASHES = Value('i', 0)
 TERMINATE_ALL_PROCESSES = Value('i', 0)
-
-PROCESS_LOCK = Lock()
+WORKER_SLOT_COUNTER = Value('i', 0)
 
 THREAD_POOL = None
 
+# CPU set assigned to the current pool worker, if CPU affinity is enabled
+WORKER_CPU_SET = None
+
 
 def signal_handler(signal, frame):
     SIMULATION_LOGGER.warning('SIGNAL RECEIVED=%d', int(signal))
@@ -89,14 +93,93 @@ def add_to_run_log(data):
     SIMULATION_LOGGER.info('\tCRASHED=%d' % N_CRASHES.value)
 
 
+def init_worker(cpu_sets):
+    global WORKER_CPU_SET
+    if cpu_sets is None or len(cpu_sets) == 0:
+        WORKER_CPU_SET = None
+        return
+
+    with WORKER_SLOT_COUNTER.get_lock():
+        slot = WORKER_SLOT_COUNTER.value
+        WORKER_SLOT_COUNTER.value += 1
+
+    WORKER_CPU_SET = cpu_sets[slot % len(cpu_sets)]
+    try:
+        # The evaluation of the results also runs on the same CPU set
+        psutil.Process().cpu_affinity(WORKER_CPU_SET)
+        SIMULATION_LOGGER.info('Worker slot %d (PID=%d) pinned to CPUs=%s' % (
+            slot, os.getpid(), str(WORKER_CPU_SET)))
+    except Exception as e:
+        SIMULATION_LOGGER.error('Error setting CPU affinity of worker slot %d, '
+                                'message=%s' % (slot, str(e)))
+        WORKER_CPU_SET = None
+
+
+def create_pool(num_processes):
+    opt_config = OptConfiguration.get_instance()
+
+    cpu_sets = None
+    if opt_config.cpu_affinity:
+        cpu_sets = get_cpu_sets(num_processes, opt_config.cpus_per_process)
+        if cpu_sets is not None:
+            SIMULATION_LOGGER.info('CPU sets for the worker slots=')
+            for i in range(len(cpu_sets)):
+                SIMULATION_LOGGER.info('\t - Slot %d=%s' % (i, str(cpu_sets[i])))
+
+    with WORKER_SLOT_COUNTER.get_lock():
+        WORKER_SLOT_COUNTER.value = 0
+    return Pool(processes=num_processes, initializer=init_worker,
+                initargs=(cpu_sets,))
+
+
+def traced_sleep(duration):
+    with trace_events.trace_span('sleep', 'pool', args=dict(duration=duration)):
+        sleep(duration)
+
+
+def add_evaluation_trace_events(profile):
+    # Convert the stages of the evaluation profile into trace events
+    if not trace_events.is_enabled() or profile is None:
+        return
+    for stage in profile['stages']:
+        item = profile['stages'][stage]
+        if 'start_time' not in item or 'time' not in item:
+            continue
+        trace_events.add_complete_event(
+            'evaluation.' + stage, item['start_time'], item['time'],
+            'evaluation')
+
+
 def run_simulation(task):
-    if TERMINATE_ALL_PROCESSES.value == 1:
+    opt_config = OptConfiguration.get_instance()
+    trace_events.set_thread_name('simulation_worker')
+    with trace_events.trace_span(
+            'run_simulation', 'pool',
+            args=dict(task=str(task),
+                      params_hash=trace_events.get_params_hash(opt_config.params))):
+        try:
+            return _run_simulation(task)
+        finally:
+            # The cost function log entries are written in a background
+            # thread, which is lost when the pool worker exits
+            if opt_config.cost_fcn is not None:
+                for handler in opt_config.cost_fcn.logger.handlers:
+                    handler.flush()
+
+
+def _is_cancelled():
+    return TERMINATE_ALL_PROCESSES.value == 1
+
+
+def _run_simulation(task):
+    random.seed()
+    traced_sleep(random.random())
+
+    if _is_cancelled():
         SIMULATION_LOGGER.warning('Process pool has been terminated, '
                                   'finishing simulation process')
-        return dict()
-
-    random.seed()
-    sleep(random.random())
+        return dict(task=str(task), status=SIM_CANCELLED, cost=None,
+                    sim_time=None, results_dir=None)
     opt_config = OptConfiguration.get_instance()
 
     SIMULATION_LOGGER.info('Starting simulation for task <%s>...' % task)
@@ -110,9 +193,20 @@ def run_simulation(task):
     sim_eval = None
     try:
         runner = SimulationRunner(
-            opt_config.params, task, opt_config.results_dir, opt_config.record_all)
-        runner.run(opt_config.params)
-        sleep(random.random() * 5)
+            opt_config.params, task, opt_config.results_dir, opt_config.record_all,
+            cpu_affinity=WORKER_CPU_SET)
+        runner.run(opt_config.params, budget=opt_config.simulation_budget,
+                   is_cancelled=_is_cancelled)
+        if _is_cancelled():
+            # The simulation was interrupted, its recording is not evaluated
+            SIMULATION_LOGGER.warning('Simulation cancelled, task=%s' % task)
+            output = dict(task=str(task), status=SIM_CANCELLED, cost=None,
+                          sim_time=None, results_dir=runner.current_sim_results_dir)
+            if not runner.record_all_results:
+                runner.remove_recording_dir()
+            del runner
+            return output
+        traced_sleep(random.random() * 5)
 
         recording_dirname = os.path.dirname(runner.recording_filename)
 
@@ -125,14 +219,14 @@ def run_simulation(task):
         if has_recording is False:
             SIMULATION_LOGGER.error('No recording generated for task <%s>' % task)
         else:
-            has_recording = False
+            # Wait for the recorder to close all files, the recording can
+            # be split in several bags (<name>_<index>.bag)
             for _ in range(30):
-                for item in os.listdir(recording_dirname):
-                    if item.endswith('.bag'):
-                        has_recording = True
-                        break
-                    else:
-                        sleep(0.1)
+                if not any([item.endswith('.bag.active')
+                            for item in os.listdir(recording_dirname)]):
+                    break
+                sleep(0.1)
+            has_recording = len(get_bag_filenames(runner.recording_filename)) > 0
 
         if not has_recording:
             raise Exception('No recording generated for task <%s>, file=%s' % (task, runner.recording_filename))
@@ -167,8 +261,8 @@ def run_simulation(task):
         SIMULATION_LOGGER.info('Simulation finished, task=%s' % task)
 
     try:
-        PROCESS_LOCK.acquire()
-
+        # The evaluation uses its own recording and error set instances,
+        # so the evaluations of the workers are not serialized
         time_offset = 0.0
         if opt_config.evaluation_time_offset is not None:
             time_offset = max(0.0, opt_config.evaluation_time_offset)
@@ -177,9 +271,15 @@ def run_simulation(task):
         SIMULATION_LOGGER.info('\tTime offset for KPI evaluation[s]=' + str(time_offset))
         SIMULATION_LOGGER.info('\tResults files directory=' + runner.current_sim_results_dir)
         SIMULATION_LOGGER.info('\tROS bag file=' + runner.recording_filename)
+        # The evaluation window is shortened with the simulation horizon
+        end_time = opt_config.evaluation_end_time
+        if end_time is not None and opt_config.simulation_budget is not None:
+            end_time = end_time * opt_config.simulation_budget
         sim_eval = Evaluation(runner.recording_filename,
                               runner.current_sim_results_dir,
-                              time_offset=time_offset)
+                              time_offset=time_offset,
+                              end_time=end_time,
+                              time_margin=opt_config.evaluation_time_margin)
 
         SIMULATION_LOGGER.info('Evaluation finished')
 
@@ -192,6 +292,8 @@ def run_simulation(task):
             sim_eval.save_evaluation()
             SIMULATION_LOGGER.info('Store KPIs and graphs')
 
+        add_evaluation_trace_events(sim_eval.get_profile())
+
         SIMULATION_LOGGER.info('Calculating cost function')
 
         kpis = sim_eval.get_kpis()
@@ -201,7 +303,8 @@ def run_simulation(task):
                 SIMULATION_LOGGER.info('KPI <%s> returned an invalid value=%.3f' % (tag, kpis[tag]))
                 raise Exception('KPI <%s> returned an invalid value=%.3f' % (tag, kpis[tag]))
                 
-        partial_cost = opt_config.compute_cost_fcn(sim_eval.get_kpis())
+        with trace_events.trace_span('cost_function', 'pool'):
+            partial_cost = opt_config.compute_cost_fcn(sim_eval.get_kpis())
 
         if partial_cost < 0:
             raise Exception('Cost function returned value lower than zero')
@@ -216,6 +319,7 @@ def run_simulation(task):
             status=status,
             cost=float(partial_cost),
             sim_time=sim_time,
+            budget=opt_config.simulation_budget,
             results_dir=runner.current_sim_results_dir,
             recording_filename=runner.recording_filename,
             cost_function_data=opt_config.cost_fcn.get_data(),
@@ -229,7 +333,7 @@ def run_simulation(task):
         with open(os.path.join(runner.current_sim_results_dir, 'smac_result.yaml'), 'w+') as smac_file:
             yaml.dump(output, smac_file, default_flow_style=False)
 
-        sleep(random.random())
+        traced_sleep(random.random())
     except Exception as e:
         SIMULATION_LOGGER.error(
             'Error occurred in this simulation evaluation, '
@@ -252,7 +356,6 @@ def run_simulation(task):
             message=str(e),
             task=str(task),
             results_dir=runner.current_sim_results_dir)
-        PROCESS_LOCK.release()
 
         if runner is not None:
             if not runner.record_all_results:
@@ -273,18 +376,65 @@ def run_simulation(task):
     if sim_eval is not None:
         del sim_eval
 
-    PROCESS_LOCK.release()
-    sleep(random.random() * 5)
+    traced_sleep(random.random() * 5)
     return output
 
 
-def start_simulation_pool(max_num_processes=None, tasks=None, log_filename=None, output_dir=None, del_failed_tasks=False):
+def _run_indexed_simulation(item):
+    index, task = item
+    return index, run_simulation(task)
+
+
+def cancel_simulations():
+    """Cancel the simulations of the pool. The tasks not yet started return
+    immediately and the simulation runners of the running tasks, which poll
+    the termination flag, interrupt their simulations.
+    """
+    with TERMINATE_ALL_PROCESSES.get_lock():
+        TERMINATE_ALL_PROCESSES.value = 1
+
+
+def map_with_early_stop(pool, task_list, early_stop_fcn):
+    """Run the tasks in the pool and, each time a task finishes
+    successfully, call `early_stop_fcn` with the outputs of the finished
+    tasks. If it returns True, the remaining simulations are cancelled and
+    their output has the status `SIM_CANCELLED`.
+    """
+    output = [None for _ in task_list]
+    stopped = False
+    try:
+        for index, item in pool.imap_unordered(_run_indexed_simulation,
+                                               list(enumerate(task_list))):
+            output[index] = item
+            if stopped or item.get('status', None) != SIM_SUCCESS:
+                continue
+            if early_stop_fcn([o for o in output if o is not None]):
+                SIMULATION_LOGGER.warning('Early stop, cancelling the remaining simulations')
+                trace_events.add_event('early_stop', 'i', 'pool',
+                                       args=dict(n_finished=len([o for o in output if o is not None])))
+                stopped = True
+                cancel_simulations()
+    finally:
+        if stopped:
+            with TERMINATE_ALL_PROCESSES.get_lock():
+                TERMINATE_ALL_PROCESSES.value = 0
+    return output
+
+
+def start_simulation_pool(max_num_processes=None, tasks=None, log_filename=None, output_dir=None, del_failed_tasks=False,
+                          budget=None, early_stop_fcn=None):
     global THREAD_POOL
     init_logger(log_filename)
 
     opt_config = OptConfiguration.get_instance()
     opt_config.print_params()
 
+    # Fraction of the simulation horizon of the tasks, set before the
+    # workers are forked (full horizon if None)
+    opt_config.simulation_budget = budget
+    if budget is not None:
+        SIMULATION_LOGGER.info('Simulation budget=%.2f' % budget)
+
     num_processes = max_num_processes
     if num_processes is None:
         num_processes = opt_config.max_num_processes
@@ -298,12 +448,18 @@ def start_simulation_pool(max_num_processes=None, tasks=None, log_filename=None,
         original_results_path = None
 
     try:
-        THREAD_POOL = Pool(processes=num_processes)
+        THREAD_POOL = create_pool(num_processes)
 
         task_list = tasks
         if tasks is None:
             task_list = opt_config.tasks
-        output = THREAD_POOL.map(run_simulation, task_list)
+        with trace_events.trace_span('simulation_pool', 'pool',
+                                     args=dict(num_processes=num_processes,
+                                               n_tasks=len(task_list))):
+            if early_stop_fcn is None:
+                output = THREAD_POOL.map(run_simulation, task_list)
+            else:
+                output = map_with_early_stop(THREAD_POOL, task_list, early_stop_fcn)
     except Exception as e:
         SIMULATION_LOGGER.error('Error! Killing all processes, message=' + str(e))
         if THREAD_POOL is not None:
@@ -324,7 +480,10 @@ def start_simulation_pool(max_num_processes=None, tasks=None, log_filename=None,
     has_crashed = True
     counter = 0
 
-    while has_crashed and counter < 3:
+    # Crashed tasks of a pool stopped early are not run again
+    cancelled = any([item['status'] == SIM_CANCELLED for item in output])
+
+    while has_crashed and counter < 3 and not cancelled:
         failed_tasks = list()
         SIMULATION_LOGGER.warning('List of outputs=' + str(output))
         for i in range(len(output)):
@@ -355,12 +514,15 @@ def start_simulation_pool(max_num_processes=None, tasks=None, log_filename=None,
             SIMULATION_LOGGER.info('Running task %d <%s>' % (i, output[i]['task']))
 
             try:
-                THREAD_POOL = Pool(processes=1)
+                THREAD_POOL = create_pool(1)
 
                 task_list = tasks
                 if tasks is None:
                     task_list = opt_config.tasks
-                output[i] = THREAD_POOL.map(run_simulation, [output[i]['task']])[0]
+                with trace_events.trace_span('simulation_pool_rerun', 'pool',
+                                             args=dict(task=str(output[i]['task']),
+                                                       counter=counter)):
+                    output[i] = THREAD_POOL.map(run_simulation, [output[i]['task']])[0]
             except Exception as e:
                 SIMULATION_LOGGER.error('Error! Killing all processes, message=' + str(e))
                 if THREAD_POOL is not None:
@@ -0,0 +1,169 @@
+# Copyright (c) 2016 The UUV Simulator Authors.
+# All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Aggregation of the costs of the tasks of one configuration into the cost
+returned to the optimizer. The aggregation expression (`task_eval_fcn` in
+the optimization configuration) is parsed once and only numpy reductions
+and arithmetic over the task costs and weights are allowed, e.g.
+
+* `numpy.mean(costs)` (default), `max` (same as `numpy.max(costs)`)
+* `numpy.percentile(costs, 90)`
+* `numpy.sum(weights * costs)`, `numpy.average(costs, weights=weights)`
+
+The legacy format with the `%s` placeholder for the list of costs (e.g.
+`numpy.mean(%s)`) is still accepted.
+"""
+import ast
+import os
+import numpy
+
+# numpy functions that can be called in the expression
+ALLOWED_FUNCTIONS = ['mean', 'median', 'average', 'sum', 'prod', 'max', 'min',
+                     'amax', 'amin', 'std', 'var', 'percentile', 'quantile',
+                     'sqrt', 'abs', 'square', 'power', 'dot', 'maximum',
+                     'minimum']
+
+# Functions that do not decrease if a task cost increases, for non-negative
+# costs and weights
+MONOTONE_FUNCTIONS = ['mean', 'median', 'average', 'sum', 'prod', 'max', 'min',
+                      'amax', 'amin', 'percentile', 'quantile', 'sqrt', 'abs',
+                      'square', 'dot', 'maximum', 'minimum']
+
+# Variables available in the expression, `costs` and `weights` are the
+# arrays of task costs and weights
+ALLOWED_NAMES = ['costs', 'weights', 'numpy', 'np']
+
+# Node types allowed in the expression, depending on the Python version
+ALLOWED_NODES = tuple(getattr(ast, name) for name in [
+    'Expression', 'Call', 'Attribute', 'Name', 'Load', 'keyword', 'BinOp',
+    'UnaryOp', 'Add', 'Sub', 'Mult', 'Div', 'Pow', 'USub', 'UAdd', 'Num',
+    'Constant', 'Tuple', 'List'] if hasattr(ast, name))
+
+
+class TaskAggregator(object):
+    """
+    Callable computing the aggregated cost of the tasks from the compiled
+    expression `expression`. `task_weights` is a dictionary with the
+    weight of each task, given by filename or basename of the task file
+    (default weight is 1).
+    """
+
+    def __init__(self, expression='numpy.mean(costs)', task_weights=None):
+        self._expression = str(expression).strip()
+        self._task_weights = dict() if task_weights is None else dict(task_weights)
+
+        expression = self._expression.replace('%s', 'costs')
+        if expression in ALLOWED_FUNCTIONS:
+            expression = 'numpy.%s(costs)' % expression
+        try:
+            tree = ast.parse(expression, mode='eval')
+        except SyntaxError as e:
+            raise ValueError('Invalid task evaluation function <%s>, '
+                             'message=%s' % (self._expression, str(e)))
+        self._validate(tree)
+        self._is_monotone = self._check_monotone(tree)
+        self._code = compile(tree, '<task_eval_fcn>', 'eval')
+
+        self._namespace = dict(__builtins__=dict(), numpy=numpy, np=numpy)
+        for name in ALLOWED_FUNCTIONS:
+            if hasattr(numpy, name):
+                self._namespace[name] = getattr(numpy, name)
+
+    def _validate(self, tree):
+        for node in ast.walk(tree):
+            if not isinstance(node, ALLOWED_NODES):
+                raise ValueError('Invalid element <%s> in task evaluation function <%s>' %
+                                 (node.__class__.__name__, self._expression))
+            if isinstance(node, ast.Name) and node.id not in ALLOWED_NAMES + ALLOWED_FUNCTIONS:
+                raise ValueError('Invalid name <%s> in task evaluation function <%s>' %
+                                 (node.id, self._expression))
+            if isinstance(node, ast.Attribute):
+                if not isinstance(node.value, ast.Name) or node.value.id not in ['numpy', 'np'] or \
+                        node.attr not in ALLOWED_FUNCTIONS:
+                    raise ValueError('Invalid function <%s> in task evaluation function <%s>' %
+                                     (node.attr, self._expression))
+            if isinstance(node, ast.Call) and not isinstance(node.func, (ast.Attribute, ast.Name)):
+                raise ValueError('Invalid function call in task evaluation function <%s>' %
+                                 self._expression)
+            if hasattr(ast, 'Constant') and isinstance(node, ast.Constant) and \
+                    (isinstance(node.value, bool) or
+                     not isinstance(node.value, (int, float))):
+                raise ValueError('Invalid constant <%s> in task evaluation function <%s>' %
+                                 (str(node.value), self._expression))
+
+    def _check_monotone(self, tree):
+        for node in ast.walk(tree):
+            # Subtractions, negations, divisions and powers can decrease the
+            # aggregated cost when a task cost increases
+            if isinstance(node, (ast.Sub, ast.USub, ast.Div, ast.Pow)):
+                return False
+            if isinstance(node, ast.Attribute) and node.attr not in MONOTONE_FUNCTIONS:
+                return False
+            if isinstance(node, ast.Name) and node.id in ALLOWED_FUNCTIONS and \
+                    node.id not in MONOTONE_FUNCTIONS:
+                return False
+        return True
+
+    @property
+    def expression(self):
+        return self._expression
+
+    @property
+    def is_monotone(self):
+        """True if the aggregated cost never decreases when the cost of a
+        task increases, which is required for `get_lower_bound`.
+        """
+        return self._is_monotone
+
+    def get_weights(self, tasks):
+        """Return the array of weights for a list of task filenames."""
+        weights = list()
+        for task in tasks:
+            if task in self._task_weights:
+                weights.append(self._task_weights[task])
+            else:
+                weights.append(self._task_weights.get(os.path.basename(task), 1.0))
+        return numpy.array(weights, dtype=float)
+
+    def __call__(self, costs, weights=None):
+        costs = numpy.asarray(costs, dtype=float).reshape(-1)
+        if weights is None:
+            weights = numpy.ones(costs.shape)
+        else:
+            weights = numpy.asarray(weights, dtype=float).reshape(-1)
+            assert weights.shape == costs.shape, 'Number of task weights and costs is different'
+        return float(eval(self._code, self._namespace,
+                          dict(costs=costs, weights=weights)))
+
+    def evaluate(self, task_costs):
+        """Aggregate the task costs, given as a dictionary of costs per task
+        filename (the task weights are applied) or as a sequence or array.
+        """
+        if isinstance(task_costs, dict):
+            tasks = sorted(task_costs.keys())
+            return self([task_costs[task] for task in tasks], self.get_weights(tasks))
+        return self(list(task_costs))
+
+    def get_lower_bound(self, task_costs, tasks):
+        """Return a lower bound of the aggregated cost of all `tasks` given
+        the dictionary of costs of the finished tasks. The costs of the
+        remaining tasks are set to zero, which is a lower bound for
+        non-negative task costs if the aggregation is monotone.
+        """
+        assert self._is_monotone, 'The task evaluation function <%s> is not monotone' % self._expression
+        weights = self.get_weights(tasks)
+        assert numpy.all(weights >= 0), 'Task weights must be non-negative'
+        costs = [task_costs.get(task, 0.0) for task in tasks]
+        return self(costs, weights)
@@ -14,7 +14,9 @@
 # limitations under the License.
 import sys
 import os
+import glob
 import logging
+import psutil
 
 # Initializing logger
 SIMULATION_LOGGER = logging.getLogger('smac_utils')
@@ -22,6 +24,8 @@ SIMULATION_LOGGER = logging.getLogger('smac_utils')
 # Initialize useful labels
 SIM_SUCCESS = 'SUCCESS'
 SIM_CRASHED = 'CRASHED'
+# Simulation cancelled by an early stop of the simulation pool
+SIM_CANCELLED = 'CANCELLED'
 
 def parse_param_input(args, input_map):
     if isinstance(args, dict):
@@ -47,6 +51,90 @@ def parse_param_input(args, input_map):
     return params
 
 
+def parse_cpu_list(cpu_list):
+    """Parse a Linux CPU list string (e.g. `0-3,8,10-11`) into a list of
+    CPU indexes.
+    """
+    cpus = list()
+    for item in cpu_list.strip().split(','):
+        if len(item) == 0:
+            continue
+        if '-' in item:
+            start, end = item.split('-')
+            cpus += range(int(start), int(end) + 1)
+        else:
+            cpus.append(int(item))
+    return cpus
+
+
+def get_numa_nodes():
+    """Return the list of CPU indexes of each NUMA node of the host. If the
+    NUMA topology cannot be read, all CPUs are returned as a single node.
+    """
+    nodes = list()
+    node_dirs = glob.glob('/sys/devices/system/node/node[0-9]*')
+    for node_dir in sorted(node_dirs, key=lambda d: int(os.path.basename(d)[4:])):
+        try:
+            with open(os.path.join(node_dir, 'cpulist'), 'r') as cpu_file:
+                cpus = parse_cpu_list(cpu_file.read())
+            if len(cpus):
+                nodes.append(cpus)
+        except Exception as ex:
+            SIMULATION_LOGGER.warning('Error reading NUMA node CPU list, '
+                                      'node=%s, message=%s' % (node_dir, str(ex)))
+    if len(nodes) == 0:
+        nodes.append(list(range(psutil.cpu_count())))
+    return nodes
+
+
+def get_cpu_sets(n_slots, cpus_per_slot=None):
+    """Partition the CPUs available to the current process into `n_slots`
+    disjoint CPU sets, one per simulation worker slot. CPU sets are taken
+    from within a single NUMA node whenever the node has enough CPUs, so that
+    a simulation does not have its threads spread across memory domains.
+
+    Returns `None` if CPU affinity is not supported on this platform.
+    """
+    assert n_slots > 0, 'Number of worker slots must be greater than zero'
+    try:
+        available = psutil.Process().cpu_affinity()
+    except Exception as ex:
+        SIMULATION_LOGGER.warning('CPU affinity is not supported, '
+                                  'message=' + str(ex))
+        return None
+
+    if len(available) < n_slots:
+        SIMULATION_LOGGER.warning(
+            'Less CPUs available (%d) than worker slots (%d), CPU sets will '
+            'be shared between slots' % (len(available), n_slots))
+        return [[available[i % len(available)]] for i in range(n_slots)]
+
+    if cpus_per_slot is None:
+        cpus_per_slot = len(available) // n_slots
+    cpus_per_slot = max(1, min(int(cpus_per_slot), len(available) // n_slots))
+
+    # Only consider the CPUs this process is allowed to run on
+    nodes = [[c for c in node if c in available] for node in get_numa_nodes()]
+    nodes = [node for node in nodes if len(node)]
+
+    # Fill each NUMA node with as many complete CPU sets as possible
+    cpu_sets = list()
+    for node in nodes:
+        for i in range(len(node) // cpus_per_slot):
+            if len(cpu_sets) == n_slots:
+                break
+            cpu_sets.append(node[i * cpus_per_slot:(i + 1) * cpus_per_slot])
+
+    if len(cpu_sets) < n_slots:
+        # The NUMA nodes are too fragmented, fall back to splitting the list
+        # of available CPUs in contiguous blocks
+        SIMULATION_LOGGER.warning('CPU sets cannot be kept within single '
+                                  'NUMA nodes')
+        cpu_sets = [available[i * cpus_per_slot:(i + 1) * cpus_per_slot]
+                    for i in range(n_slots)]
+    return cpu_sets
+
+
 def init_logger(log_filename=None):
     if len(SIMULATION_LOGGER.handlers) == 0:
         out_hdlr = logging.StreamHandler(sys.stdout)
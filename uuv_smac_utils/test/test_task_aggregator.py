@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# Copyright (c) 2016 The UUV Simulator Authors.
+# All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+PKG = 'uuv_smac_utils'
+NAME = 'test_task_aggregator'
+
+import rospy
+import rostest
+import unittest
+import numpy as np
+from uuv_smac_utils.task_aggregator import TaskAggregator
+
+import roslib; roslib.load_manifest(PKG)
+
+TASKS = ['task_%d.yml' % i for i in range(6)]
+
+
+class TestTaskAggregator(unittest.TestCase):
+    def test_legacy_format(self):
+        self.assertEqual(TaskAggregator('numpy.mean(%s)')([1.0, 2.0, 6.0]), 3.0)
+        self.assertEqual(TaskAggregator('max')([1.0, 2.0, 6.0]), 6.0)
+        self.assertEqual(TaskAggregator()([1.0, 2.0, 6.0]), 3.0)
+
+    def test_percentile(self):
+        aggregator = TaskAggregator('numpy.percentile(costs, 50)')
+        self.assertEqual(aggregator([1.0, 2.0, 6.0]), 2.0)
+
+    def test_weights(self):
+        costs = {'task_0.yml': 1.0, 'task_1.yml': 2.0}
+        aggregator = TaskAggregator('numpy.sum(weights * costs)',
+                                    task_weights={'task_1.yml': 3.0})
+        self.assertEqual(aggregator.evaluate(costs), 7.0)
+
+        aggregator = TaskAggregator('numpy.average(costs, weights=weights)',
+                                    task_weights={'task_1.yml': 3.0})
+        self.assertEqual(aggregator.evaluate(costs), 7.0 / 4)
+
+    def test_invalid_expressions(self):
+        for expression in ["__import__('os').getcwd()",
+                           'costs.__class__',
+                           'numpy.os.getcwd()',
+                           'numpy.mean(costs) * len(costs)',
+                           "numpy.mean(costs) * 'a'",
+                           'numpy.mean(costs']:
+            self.assertRaises(ValueError, TaskAggregator, expression)
+
+    def test_is_monotone(self):
+        for expression in ['numpy.mean(costs)', 'max', 'numpy.percentile(costs, 90)',
+                           'numpy.sum(weights * costs)', 'numpy.mean(costs) + numpy.max(costs)']:
+            self.assertTrue(TaskAggregator(expression).is_monotone,
+                            'Expression should be monotone, expression=' + expression)
+        for expression in ['numpy.mean(costs) - numpy.min(costs)', '-numpy.sum(costs)',
+                           '1 / numpy.mean(costs)', 'numpy.sum(costs ** 2)',
+                           'numpy.std(costs)']:
+            self.assertFalse(TaskAggregator(expression).is_monotone,
+                             'Expression should not be monotone, expression=' + expression)
+
+    def test_lower_bound(self):
+        rng = np.random.RandomState(0)
+        task_weights = dict((task, rng.uniform(0.5, 2)) for task in TASKS)
+        for expression in ['numpy.mean(costs)', 'max', 'numpy.percentile(costs, 90)',
+                           'numpy.sum(weights * costs)', 'numpy.average(costs, weights=weights)']:
+            aggregator = TaskAggregator(expression, task_weights)
+            for _ in range(20):
+                costs = dict((task, rng.uniform(0, 10)) for task in TASKS)
+                total_cost = aggregator.evaluate(costs)
+                for n_finished in range(len(TASKS) + 1):
+                    finished = dict((task, costs[task]) for task in TASKS[:n_finished])
+                    self.assertLessEqual(aggregator.get_lower_bound(finished, TASKS),
+                                         total_cost + 1e-9)
+                self.assertAlmostEqual(aggregator.get_lower_bound(costs, TASKS), total_cost)
+
+        aggregator = TaskAggregator('numpy.std(costs)')
+        self.assertRaises(AssertionError, aggregator.get_lower_bound, dict(), TASKS)
+
+
+if __name__ == '__main__':
+    import rosunit
+    rosunit.unitrun(PKG, NAME, TestTaskAggregator)